@@ -14,6 +14,7 @@ pyside-uic -d -o ./user_interface/labelsAndBoxes.py ./user_interface/labelsAndBo
 pyside-uic -d -o ./user_interface/LoginWindowSimulator.py ./user_interface/LoginWindowSimulator.ui
 pyside-uic -d -o ./user_interface/DialogButtons.py ./user_interface/DialogButtons.ui
 pyside-uic -d -o ./user_interface/ImageImport.py ./user_interface/ImageImport.ui
+pyside-uic -d -o ./user_interface/BulkEdit.py ./user_interface/BulkEdit.ui
 pyside-rcc -py3 -compress 9 XRDPConfigurator_resources.qrc -o XRDPConfigurator_resources_rc.py
 echo "Building the libxrdpconfigurator.so helper library..."
 cd libxrdpconfigurator
@@ -1,4 +1,9 @@
 #!/bin/bash
+# With arguments, run a command line command instead of the GUI, e.g. ./XRDPConfigurator.sh validate /etc/xrdp
+if ( test $# -gt 0 )
+then
+    exec python3 -m libxrdpconfigurator "$@"
+fi
 if ( test -e ./libxrdpconfigurator/libxrdpconfigurator.so )
 then
     LD_LIBRARY_PATH=./libxrdpconfigurator python3 xrdpconfigurator.py
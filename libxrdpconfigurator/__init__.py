@@ -0,0 +1,34 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# libxrdpconfigurator - the GUI-free parts of XRDPConfigurator.
+# Importing this package never imports PySide.
+
+from libxrdpconfigurator.inifile import IniDocument, IniParseError
+from libxrdpconfigurator.atomicwrite import atomicWrite, AtomicBatch, DirectoryPermissionError
+from libxrdpconfigurator.sessions import SessionStore, XrdpIniDocument, sessionSectionName, sessionIndex
+from libxrdpconfigurator.connections import ConnectionRegistry
+from libxrdpconfigurator.channels import ChannelOverrides, ChannelResolver, CHANNELS
+from libxrdpconfigurator.presets import SessionPreset, SESSION_PRESETS, findPreset, presetKeys
+from libxrdpconfigurator.changebus import ChangeBus
+from libxrdpconfigurator.keymap import KEYMAP_SECTIONS, KeymapEntry, KeymapBackend, KeymapError, formatKeymap, \
+    generateKeymap
+from libxrdpconfigurator.keymaplocales import keymapLocales, keymapFileName, localeLayout
+from libxrdpconfigurator.xkbkeymap import XkbKeymapCompiler, KeymapPack, generateKeymapPack
+from libxrdpconfigurator.keymapcache import KeymapCache, keymapFingerprint, defaultCacheDirectory
+from libxrdpconfigurator.loader import ModelLoader, ModelLoad, LoadCancelled
+from libxrdpconfigurator.models import IniModel, XrdpIniModel, SesmanIniModel, TRUE_VALUES, FALSE_VALUES, \
+    SESSION_LIBRARIES, isTrue, isFalse
@@ -0,0 +1,247 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# Crash-safe file writing.
+#
+# Opening xrdp.ini with 'w' and writing to it truncates the file first, so a crash or a full disk part way
+# through leaves xrdp with a broken config the next time it starts.
+# Instead, the new contents go to a temporary file in the same directory, which is fsync'd and then
+# renamed over the original. A rename within a directory is atomic, so the target always holds either
+# the old or the new contents. Finally the directory itself is fsync'd so the rename survives a power cut.
+#
+# Only the contents are meant to change:
+#  - A symlink, e.g. /etc/xrdp/xrdp.ini pointing into a config management checkout, is followed, and the
+#    file it points to is replaced rather than the link.
+#  - The new file gets the old one's permissions, and its owner and group where we're allowed to give
+#    them (root always is).
+# Creating the temporary file needs write permission on the directory, not just on the file. Not having
+# it raises a DirectoryPermissionError, which is a PermissionError.
+
+import errno
+import os
+import shutil
+import stat
+import tempfile
+
+BACKUP_SUFFIX = ".bak"
+
+
+# The file could be written to, but the directory it's in can't have the temporary file created in it.
+class DirectoryPermissionError(PermissionError):
+    def __init__(self, fname, directory):
+        super(DirectoryPermissionError, self).__init__(
+            errno.EACCES, "no permission to create files in " + directory + ", which saving " +
+                          os.path.basename(fname) + " needs", directory)
+        self.target = fname
+
+
+def fsyncDirectory(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # Not every filesystem lets you fsync a directory.
+    finally:
+        os.close(fd)
+
+
+# Keeps the previous contents of fname as fname.bak (or fname.bak.1 ... fname.bak.N with several generations).
+def makeBackup(fname, generations=1):
+    if generations < 1 or not os.path.exists(fname):
+        return
+    if generations == 1:
+        names = [fname + BACKUP_SUFFIX]
+    else:
+        names = [fname + BACKUP_SUFFIX + "." + str(number) for number in range(1, generations + 1)]
+        for number in range(generations - 1, 0, -1):
+            if os.path.exists(names[number - 1]):
+                os.replace(names[number - 1], names[number])
+    if os.path.exists(names[0]):
+        os.remove(names[0])
+    try:
+        os.link(fname, names[0])
+    except OSError:
+        shutil.copy2(fname, names[0])
+
+
+# @return: the file fname really is, following any symlinks, so that the file is replaced and not the link
+def resolveTarget(fname):
+    return os.path.realpath(fname)
+
+
+# Gives the temporary file the owner and group of the file it is going to replace. Only root can give a
+# file to someone else, but anyone can give it to one of their own groups.
+def copyOwner(tmpname, info):
+    try:
+        os.chown(tmpname, info.st_uid, info.st_gid)
+    except PermissionError:
+        try:
+            os.chown(tmpname, -1, info.st_gid)
+        except PermissionError:
+            pass
+
+
+# Writes data to a fsync'd temporary file next to fname, which should already be resolveTarget()'d.
+# The temporary file gets the same permissions, owner and group as the file it is going to replace.
+# @return: the temporary file's name
+def writeTemporary(fname, data):
+    directory = os.path.dirname(os.path.abspath(fname))
+    try:
+        fd, tmpname = tempfile.mkstemp(prefix="." + os.path.basename(fname) + ".", suffix=".tmp", dir=directory)
+    except PermissionError:
+        raise DirectoryPermissionError(fname, directory)
+    try:
+        with os.fdopen(fd, 'wb' if isinstance(data, bytes) else 'w') as tmpfile:
+            tmpfile.write(data)
+            tmpfile.flush()
+            os.fsync(tmpfile.fileno())
+        try:
+            info = os.stat(fname)
+        except OSError:
+            info = None
+        if info is None:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        else:
+            mode = stat.S_IMODE(info.st_mode)
+            # chown() can clear the setuid and setgid bits, so it goes before chmod()
+            copyOwner(tmpname, info)
+        os.chmod(tmpname, mode)
+    except BaseException:
+        removeQuietly(tmpname)
+        raise
+    return tmpname
+
+
+def removeQuietly(fname):
+    try:
+        os.remove(fname)
+    except OSError:
+        pass
+
+
+# Atomically replaces fname with data (a str or bytes).
+# @param backups: number of backup generations of the old file to keep, 0 for none
+def atomicWrite(fname, data, backups=0):
+    fname = resolveTarget(fname)
+    tmpname = writeTemporary(fname, data)
+    try:
+        makeBackup(fname, backups)
+        os.replace(tmpname, fname)
+    except BaseException:
+        removeQuietly(tmpname)
+        raise
+    fsyncDirectory(os.path.dirname(os.path.abspath(fname)))
+
+
+# Keeps the current contents of fname under a temporary name, so a batch can put it back.
+# @return: the temporary file's name, or None if there is no fname yet
+def keepOldFile(fname):
+    if not os.path.exists(fname):
+        return None
+    fd, saved = tempfile.mkstemp(prefix="." + os.path.basename(fname) + ".", suffix=".old",
+                                 dir=os.path.dirname(os.path.abspath(fname)))
+    os.close(fd)
+    try:
+        os.remove(saved)
+        os.link(fname, saved)
+    except OSError:
+        shutil.copy2(fname, saved)
+    return saved
+
+
+# Puts back the files a batch has already replaced, most recent first.
+# @param replaced: [target, keepOldFile()'s name for its old contents], in the order they were replaced
+def rollBack(replaced):
+    for fname, saved in reversed(replaced):
+        try:
+            if saved is None:
+                os.remove(fname)
+            else:
+                os.replace(saved, fname)
+        except OSError:
+            pass  # The old contents are left where they were kept rather than lost.
+
+
+# Writes many files at once.
+# Every file is staged to its own fsync'd temporary file first. Only when the with block finishes without
+# an error are they all renamed into place, and then each directory involved is fsync'd just once.
+# If anything goes wrong, the staged files are removed and none of the targets are touched. The renames
+# happen one file at a time, so each file's old contents are kept until they're all done: if a rename
+# fails part way through (another filesystem, a directory without permission...), the files already
+# replaced are put back as they were, and files which didn't exist before are removed again.
+#
+#   with AtomicBatch(backups=1) as batch:
+#       for host in hosts:
+#           batch.write(host + "/etc/xrdp/xrdp.ini", text)
+class AtomicBatch(object):
+    def __init__(self, backups=0):
+        self.backups = backups
+        self.staged = []  # [target, temporary file] pairs
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+    def write(self, fname, data):
+        fname = resolveTarget(fname)
+        self.staged.append([fname, writeTemporary(fname, data)])
+
+    def commit(self):
+        directories = []
+        replaced = []  # [target, its old contents' keepOldFile() name]
+        try:
+            while self.staged:
+                fname, tmpname = self.staged[0]
+                directory = os.path.dirname(os.path.abspath(fname))
+                if directory not in directories:
+                    directories.append(directory)
+                makeBackup(fname, self.backups)
+                saved = keepOldFile(fname)
+                try:
+                    os.replace(tmpname, fname)
+                except BaseException:
+                    if saved is not None:
+                        removeQuietly(saved)
+                    raise
+                replaced.append([fname, saved])
+                self.staged.pop(0)
+        except BaseException:
+            rollBack(replaced)
+            raise
+        else:
+            for fname, saved in replaced:
+                if saved is not None:
+                    removeQuietly(saved)
+        finally:
+            self.abort()
+            for directory in directories:
+                fsyncDirectory(directory)
+
+    def abort(self):
+        for fname, tmpname in self.staged:
+            removeQuietly(tmpname)
+        self.staged = []
@@ -1,3 +1,3 @@
 #!/bin/sh
-gcc -D_GNU_SOURCE -lX11 -Wall -fPIC -c -o libxrdpconfigurator.o libxrdpconfigurator.c
-gcc -lX11 -shared -o libxrdpconfigurator.so libxrdpconfigurator.o
+gcc -D_GNU_SOURCE -Wall -fPIC -c -o libxrdpconfigurator.o libxrdpconfigurator.c
+gcc -shared -o libxrdpconfigurator.so libxrdpconfigurator.o -lX11
@@ -0,0 +1,83 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# Coalescing change notifications.
+#
+# Dragging a colour or scrubbing a spin box edits the model many times a second. Every edit tells the
+# bus which file (and, if it knows, which section) it changed, and the bus tells its subscribers once,
+# with everything that changed since the last time:
+#
+#   bus = ChangeBus(lambda flush: QtCore.QTimer.singleShot(0, flush))
+#   bus.subscribe(window.filesChanged)
+#   bus.notify("xrdp.ini", "globals")
+#   bus.notify("xrdp.ini", "channels")   # ...filesChanged({"xrdp.ini": {"globals", "channels"}}) once
+#
+# The GUI's scheduler runs the flush on the event loop's next turn, once the edits being made now are done.
+# Without a scheduler every notify() is passed on straight away.
+
+
+class ChangeBus(object):
+    # @param schedule: schedule(flush) arranges for flush() to be called later, or None to call it at once
+    def __init__(self, schedule=None):
+        self.schedule = schedule
+        self.subscribers = []
+        self.pending = {}  # filetype -> set of the sections changed, which is empty if nobody said
+        self.flush_scheduled = False
+
+    # @param callback: callback(changes), changes being {filetype: set of sections}
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    # @param filetype: the FILETYPE of the model which changed
+    # @param section: the section which changed, if it's known
+    def notify(self, filetype, section=None):
+        sections = self.pending.setdefault(filetype, set())
+        if section is not None:
+            sections.add(section)
+        if self.flush_scheduled:
+            return
+        if self.schedule is None:
+            self.flush()
+        else:
+            self.flush_scheduled = True
+            self.schedule(self.flush)
+
+    def isPending(self, filetype=None):
+        if filetype is None:
+            return bool(self.pending)
+        return filetype in self.pending
+
+    # Forgets the changes not passed on yet, e.g. when the file they were made to has been closed.
+    def discard(self, filetype=None):
+        if filetype is None:
+            self.pending = {}
+        else:
+            self.pending.pop(filetype, None)
+
+    # Tells the subscribers about everything which has changed since the last flush.
+    def flush(self):
+        self.flush_scheduled = False
+        if not self.pending:
+            return
+        changes = self.pending
+        self.pending = {}
+        for callback in list(self.subscribers):
+            callback(changes)
@@ -0,0 +1,295 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# Virtual channels, and the sessions' channel overrides.
+#
+# [channels] switches each virtual channel on or off for every session. A session can override that
+# with its own channel.<name>= options - xrdp goes by the session's option for each channel it has one
+# for, and by [channels] for the rest. The GUI's Enable Channel Overrides writes all of them at once.
+#
+# ChannelOverrides keeps every session's overrides as bitmasks in arrays of 'H', bit n standing for
+# CHANNELS[n]: one of the channels the session has an option for, one of the channels it switches on.
+# Questions about every session at once, e.g. "which sessions switch rdpsnd off", are then one pass over
+# a small array of ints rather than over the sessions' sections or widgets.
+#
+# ChannelResolver answers "which channels does each session actually get", from both.
+
+from array import array
+from libxrdpconfigurator.sessions import sessionSectionName, sessionIndex
+from libxrdpconfigurator.models import isTrue
+
+# The virtual channels, in bit order
+CHANNELS = ["rdpdr", "rdpsnd", "drdynvc", "cliprdr", "rail", "xrdpvr"]
+ALL_CHANNELS = (1 << len(CHANNELS)) - 1
+
+# The values a session's channel.<name>= override is written with
+OVERRIDE_ON = "true"
+OVERRIDE_OFF = "0"
+
+
+def channelBit(channel_index):
+    return 1 << channel_index
+
+
+# @param channel: a channel name, or its index in CHANNELS
+def channelIndex(channel):
+    if isinstance(channel, int):
+        return channel
+    return CHANNELS.index(channel)
+
+
+def overrideOption(channel_index):
+    return "channel." + CHANNELS[channel_index]
+
+
+# @return: the bitmask of the channels [channels] switches on. A channel it doesn't mention is on.
+def globalChannelMask(model):
+    mask = 0
+    for channel_index, channel in enumerate(CHANNELS):
+        if isTrue(model.get("channels", channel, fallback=OVERRIDE_ON)):
+            mask |= channelBit(channel_index)
+    return mask
+
+
+# @return: [bitmask of the channels the session has an override for, bitmask of those it switches on]
+def sessionOverrides(model, section):
+    present = 0
+    mask = 0
+    for channel_index in range(len(CHANNELS)):
+        value = model.get(section, overrideOption(channel_index), fallback=None)
+        if value is None:
+            continue
+        present |= channelBit(channel_index)
+        if isTrue(value):
+            mask |= channelBit(channel_index)
+    return [present, mask]
+
+
+# @return: the bitmask of the channels a session gets, given its overrides and the [channels] bitmask
+def effectiveChannelMask(present, mask, global_mask):
+    return (global_mask & ~present & ALL_CHANNELS) | (mask & present)
+
+
+class ChannelOverrides(object):
+    def __init__(self):
+        self.masks = array('H')  # per session: bit n set when the session's override switches CHANNELS[n] on
+        self.present = array('H')  # per session: bit n set when the session has a channel.CHANNELS[n] option
+
+    def __len__(self):
+        return len(self.masks)
+
+    def clear(self):
+        del self.masks[:]
+        del self.present[:]
+
+    # Reads every session's overrides from an XrdpIniModel.
+    def load(self, model):
+        self.clear()
+        for section in model.sessionSections():
+            self.appendFromModel(model, section)
+
+    @classmethod
+    def fromModel(cls, model):
+        overrides = cls()
+        overrides.load(model)
+        return overrides
+
+    def append(self, present, mask):
+        self.present.append(present)
+        self.masks.append(mask)
+
+    def appendFromModel(self, model, section):
+        present, mask = sessionOverrides(model, section)
+        self.append(present, mask)
+
+    def readFromModel(self, model, index):
+        self.present[index], self.masks[index] = sessionOverrides(model, sessionSectionName(index))
+
+    # The overrides follow their sessions about...
+
+    def move(self, idx_from, idx_to):
+        for values in (self.masks, self.present):
+            value = values.pop(idx_from)
+            values.insert(idx_to, value)
+
+    def delete(self, index):
+        del self.masks[index]
+        del self.present[index]
+
+    # One session...
+
+    # A session's overrides are switched on when it has any channel.<name>= option.
+    def isActive(self, index):
+        return self.present[index] != 0
+
+    # Switching them on overrides every channel, the same as the GUI does.
+    def setActive(self, index, active):
+        self.present[index] = ALL_CHANNELS if active else 0
+
+    def mask(self, index):
+        return self.masks[index]
+
+    def setMask(self, index, mask):
+        self.masks[index] = mask
+
+    def isEnabled(self, index, channel):
+        return self.masks[index] & channelBit(channelIndex(channel)) != 0
+
+    # Writes the session's overrides to the model: a channel.<name>= option for each channel it
+    # overrides, and none for the others.
+    def writeSession(self, model, index):
+        section = sessionSectionName(index)
+        for channel_index in range(len(CHANNELS)):
+            bit = channelBit(channel_index)
+            if not self.present[index] & bit:
+                model.remove_option(section, overrideOption(channel_index))
+            elif self.masks[index] & bit:
+                model.set(section, overrideOption(channel_index), OVERRIDE_ON)
+            else:
+                model.set(section, overrideOption(channel_index), OVERRIDE_OFF)
+
+    # Every session at once...
+
+    # @return: indexes of the sessions whose own overrides switch the channel on (or off)
+    def sessionsOverriding(self, channel, enabled=True):
+        bit = channelBit(channelIndex(channel))
+        want = bit if enabled else 0
+        return [index for index, (present, mask) in enumerate(zip(self.present, self.masks))
+                if present & bit and mask & bit == want]
+
+    # Switches a channel on or off in the overrides of the given sessions, and in the model if one is given.
+    # Sessions whose overrides are switched off are left alone.
+    def setChannel(self, indexes, channel, enabled, model=None):
+        channel_index = channelIndex(channel)
+        bit = channelBit(channel_index)
+        for index in indexes:
+            if not self.present[index]:
+                continue
+            self.present[index] |= bit
+            if enabled:
+                self.masks[index] |= bit
+            else:
+                self.masks[index] &= ~bit & ALL_CHANNELS
+            if model is not None:
+                model.set(sessionSectionName(index), overrideOption(channel_index),
+                          OVERRIDE_ON if enabled else OVERRIDE_OFF)
+
+
+# The channels each session actually gets, worked out for every session in one pass and kept until something
+# they depend on changes. Tell it what changed with invalidate():
+#
+#   resolver = ChannelResolver(model)
+#   resolver.isEnabled(2, "rdpsnd")
+#   model.set("channels", "rdpsnd", "0")
+#   resolver.invalidate("channels")
+#
+# A session's change only works that session out again, and a [channels] change only the sessions which
+# don't override every channel.
+class ChannelResolver(object):
+    # @param overrides: a ChannelOverrides which its owner keeps up to date with the model (as the GUI does),
+    #                   or None to have the resolver read the sessions' overrides from the model itself
+    def __init__(self, model, overrides=None):
+        self.model = model
+        self.shared_overrides = overrides is not None
+        self.overrides = overrides if overrides is not None else ChannelOverrides()
+        self.global_mask = None  # None when [channels] needs reading again
+        self.effective = None  # array('H') of every session's channels, None when they all need working out again
+        self.stale = set()  # indexes of the sessions whose channels need working out again
+
+    # Starts again with another model, e.g. when a file is opened.
+    def reset(self, model):
+        self.model = model
+        self.invalidate()
+
+    # @param section: "channels", a session's section, or None when sessions have been added, moved or removed
+    def invalidate(self, section=None):
+        if section is None:
+            self.global_mask = None
+            self.effective = None
+            self.stale.clear()
+        elif section == "channels":
+            self.global_mask = None
+        elif sessionIndex(section) >= 0:
+            self.stale.add(sessionIndex(section))
+
+    def _refresh(self):
+        globals_changed = self.global_mask is None
+        if globals_changed:
+            self.global_mask = globalChannelMask(self.model)
+        overrides = self.overrides
+        count = self.model.sessionCount()
+        if self.effective is None or len(self.effective) != count:
+            if not self.shared_overrides:
+                overrides.load(self.model)
+            global_mask = self.global_mask
+            self.effective = array('H', [effectiveChannelMask(present, mask, global_mask)
+                                         for present, mask in zip(overrides.present, overrides.masks)])
+            self.stale.clear()
+            return
+        for index in self.stale:
+            if index >= count:
+                continue
+            if not self.shared_overrides:
+                overrides.readFromModel(self.model, index)
+            self.effective[index] = effectiveChannelMask(overrides.present[index], overrides.masks[index],
+                                                         self.global_mask)
+        self.stale.clear()
+        if globals_changed:
+            for index, present in enumerate(overrides.present):
+                if present != ALL_CHANNELS:
+                    self.effective[index] = effectiveChannelMask(present, overrides.masks[index], self.global_mask)
+
+    def globalMask(self):
+        self._refresh()
+        return self.global_mask
+
+    # @return: bitmask of the channels the session gets
+    def effectiveMask(self, index):
+        self._refresh()
+        return self.effective[index]
+
+    def isEnabled(self, index, channel):
+        return self.effectiveMask(index) & channelBit(channelIndex(channel)) != 0
+
+    # @return: every session's bitmask, in session order
+    def matrix(self):
+        self._refresh()
+        return list(self.effective)
+
+    # @return: indexes of the sessions which get the channel (or don't)
+    def sessionsWith(self, channel, enabled=True):
+        self._refresh()
+        bit = channelBit(channelIndex(channel))
+        want = bit if enabled else 0
+        return [index for index, mask in enumerate(self.effective) if mask & bit == want]
+
+    # @return: {channel: enabled} for the session
+    def sessionChannels(self, index):
+        mask = self.effectiveMask(index)
+        return dict((channel, mask & channelBit(channel_index) != 0) for channel_index, channel in enumerate(CHANNELS))
+
+    # @return: one {"section", "name", "overridden", "channels"} dict per session, "overridden" listing the
+    #          channels the session has its own option for
+    def toList(self):
+        self._refresh()
+        sessions = []
+        for index, section in enumerate(self.model.sessionSections()):
+            present = self.overrides.present[index]
+            sessions.append({"section": section, "name": self.model.get(section, "name", fallback=section),
+                             "overridden": [channel for channel_index, channel in enumerate(CHANNELS)
+                                            if present & channelBit(channel_index)],
+                             "channels": self.sessionChannels(index)})
+        return sessions
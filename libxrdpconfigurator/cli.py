@@ -0,0 +1,314 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# XRDPConfigurator's command line, for working on INI files without the GUI.
+#
+#   python3 -m libxrdpconfigurator validate /srv/hosts/*/xrdp.ini /srv/hosts/sesman/
+#
+# (or ./XRDPConfigurator.sh validate ...). Each command is a subparser set up by an add...Command()
+# function, which points it at the function which runs it.
+
+import argparse
+import json
+import sys
+from libxrdpconfigurator.validate import findConfigFiles, validateFiles, fileTypeOf, UNKNOWN_INI
+from libxrdpconfigurator.fleetdiff import diffFleet, loadBaseline, CHANGED, MISSING
+from libxrdpconfigurator.presets import SESSION_PRESETS
+from libxrdpconfigurator.models import XrdpIniModel
+from libxrdpconfigurator.sessionimport import importSessions
+from libxrdpconfigurator.generate import ConfigGenerator, TemplateError, loadVariables, DEFAULT_OUTPUT
+from libxrdpconfigurator.channels import ChannelResolver, CHANNELS
+from libxrdpconfigurator.keymap import KeymapError, LAST_KEYCODE, MAX_KEYCODE
+from libxrdpconfigurator.xkbkeymap import generateKeymapPack, DEFAULT_RULES, DEFAULT_MODEL
+from libxrdpconfigurator.keymapcache import KeymapCache, defaultCacheDirectory
+
+# Exit statuses
+EXIT_OK = 0
+EXIT_PROBLEMS = 1  # some of the files failed the check, or differ from the baseline
+EXIT_USAGE = 2  # argparse's own status for a bad command line
+
+
+def writeJson(out, data):
+    out.write(json.dumps(data, sort_keys=True) + "\n")
+
+
+# validate...
+
+def addValidateCommand(subparsers):
+    parser = subparsers.add_parser("validate", help="check xrdp.ini and sesman.ini files",
+                                   description="Checks xrdp.ini and sesman.ini files and prints one result per "
+                                               "file. Directories are searched for *.ini files.")
+    parser.add_argument("paths", nargs="+", metavar="PATH", help="a file, directory or glob pattern")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="number of worker processes (default: one per CPU)")
+    parser.add_argument("-f", "--format", choices=["json", "text"], default="json",
+                        help="json prints one JSON object per line (the default), text is for people")
+    parser.add_argument("-p", "--problems-only", action="store_true",
+                        help="only print files which have errors or warnings")
+    parser.set_defaults(run=runValidate)
+
+
+def runValidate(args, out):
+    fnames = findConfigFiles(args.paths)
+    status = EXIT_OK
+    for result in validateFiles(fnames, args.jobs):
+        if not result.isValid():
+            status = EXIT_PROBLEMS
+        if args.problems_only and not result.problems:
+            continue
+        if args.format == "json":
+            writeJson(out, result.toDict())
+        else:
+            if result.filetype == UNKNOWN_INI:
+                out.write(result.filename + ": not an xrdp.ini or sesman.ini, skipped\n")
+            elif result.isValid():
+                out.write(result.filename + ": ok\n")
+            for problem in result.problems:
+                out.write(result.filename + ": " + problem.toText() + "\n")
+    return status
+
+
+# diff...
+
+def addDiffCommand(subparsers):
+    parser = subparsers.add_parser("diff", help="compare xrdp.ini files against a baseline",
+                                   description="Compares hosts' xrdp.ini files against a baseline xrdp.ini. "
+                                               "Identical deviations are grouped, with the hosts they apply to.")
+    parser.add_argument("baseline", metavar="BASELINE", help="the baseline xrdp.ini")
+    parser.add_argument("paths", nargs="+", metavar="PATH", help="a file, directory or glob pattern")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="number of worker processes (default: one per CPU)")
+    parser.add_argument("-f", "--format", choices=["json", "text"], default="json",
+                        help="json prints the report as one JSON object (the default), text is for people")
+    parser.add_argument("-i", "--ignore", action="append", default=[], metavar="SECTION.OPTION",
+                        help="leave out options matching this pattern, e.g. globals.address; may be repeated")
+    parser.set_defaults(run=runDiff)
+
+
+def runDiff(args, out):
+    # The hosts' files are allowed to be unreadable, but without a baseline there's nothing to compare them with.
+    # IniParseError and UnicodeDecodeError are both ValueErrors.
+    try:
+        loadBaseline(args.baseline)
+    except (OSError, ValueError) as error:
+        if args.format == "json":
+            writeJson(out, {"baseline": args.baseline, "error": str(error)})
+        else:
+            out.write(args.baseline + ": cannot be read: " + str(error) + "\n")
+        return EXIT_PROBLEMS
+    # Only files of the baseline's kind are taken from directories, not the hosts' other *.ini files
+    host_fnames = findConfigFiles(args.paths, [fileTypeOf(args.baseline)])
+    report = diffFleet(args.baseline, host_fnames, args.jobs, args.ignore)
+    if args.format == "json":
+        writeJson(out, report.toDict())
+    else:
+        out.write(args.baseline + ": " + str(report.host_count) + " hosts, " + str(len(report.identical)) +
+                  " identical\n")
+        for (section, option, kind, baseline_value, host_value), hosts in report.groups():
+            if kind == CHANGED:
+                change = repr(baseline_value) + " -> " + repr(host_value)
+            elif kind == MISSING:
+                change = "missing, baseline has " + repr(baseline_value)
+            else:
+                change = "extra " + repr(host_value)
+            out.write("[" + section + "] " + option + ": " + change + " (" + str(len(hosts)) + " hosts)\n")
+            for host in hosts:
+                out.write("    " + host + "\n")
+        for host, reason in sorted(report.unreadable.items()):
+            out.write(host + ": cannot be read: " + reason + "\n")
+    if report.isClean():
+        return EXIT_OK
+    return EXIT_PROBLEMS
+
+
+# generate...
+
+def addGenerateCommand(subparsers):
+    parser = subparsers.add_parser("generate", help="generate an xrdp.ini for each host from a base file",
+                                   description="Renders the base xrdp.ini for each row of a CSV or JSON variables "
+                                               "table, replacing ${variable}s with the row's values and adding "
+                                               "the sessions listed in its sessions column.")
+    parser.add_argument("base", metavar="BASE", help="the base xrdp.ini template")
+    parser.add_argument("variables", metavar="VARIABLES", help="a .csv or .json table with one row per host")
+    parser.add_argument("-o", "--output", required=True, metavar="DIRECTORY", help="where to write the files")
+    parser.add_argument("-n", "--name", default=DEFAULT_OUTPUT, metavar="PATTERN",
+                        help="each file's name under the output directory (default: " +
+                             DEFAULT_OUTPUT.replace("%", "%%") + ")")
+    parser.add_argument("-b", "--backups", type=int, default=0, metavar="N",
+                        help="keep N backups of files which are replaced")
+    parser.set_defaults(run=runGenerate)
+
+
+def runGenerate(args, out):
+    try:
+        generator = ConfigGenerator.fromFile(args.base, args.name)
+        fnames = generator.generate(loadVariables(args.variables), args.output, args.backups)
+    except (TemplateError, OSError, ValueError) as error:
+        writeJson(out, {"error": str(error), "written": 0})
+        return EXIT_PROBLEMS
+    writeJson(out, {"written": len(fnames), "files": fnames})
+    return EXIT_OK
+
+
+# import-sessions...
+
+def addImportSessionsCommand(subparsers):
+    parser = subparsers.add_parser("import-sessions", help="add sessions from a table to an xrdp.ini",
+                                   description="Adds the sessions in a CSV or JSON table (one row per session, "
+                                               "with name, preset and option columns) to the end of an "
+                                               "xrdp.ini. Nothing is added unless every row is valid.")
+    parser.add_argument("xrdp_ini", metavar="XRDP_INI", help="the xrdp.ini to add the sessions to")
+    parser.add_argument("table", metavar="TABLE", help="a .csv or .json table of sessions")
+    parser.add_argument("-b", "--backups", type=int, default=0, metavar="N",
+                        help="keep N backups of the xrdp.ini")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="only check the table")
+    parser.set_defaults(run=runImportSessions)
+
+
+def runImportSessions(args, out):
+    try:
+        model = XrdpIniModel.load(args.xrdp_ini)
+        sessions = importSessions(args.table, model.sessionNames())
+    except (OSError, ValueError) as error:
+        writeJson(out, {"error": str(error), "imported": 0})
+        return EXIT_PROBLEMS
+    problems = [problem.toDict() for problem in sessions.result.problems]
+    if not sessions.isValid():
+        writeJson(out, {"imported": 0, "problems": problems})
+        return EXIT_PROBLEMS
+    if not args.dry_run:
+        for name, values in sessions.sessions:
+            model.addSession(name, values)
+        try:
+            model.save(backups=args.backups)
+        except OSError as error:
+            writeJson(out, {"error": str(error), "imported": 0, "problems": problems})
+            return EXIT_PROBLEMS
+    writeJson(out, {"imported": 0 if args.dry_run else len(sessions.sessions), "problems": problems})
+    return EXIT_OK
+
+
+# presets...
+
+def addPresetsCommand(subparsers):
+    parser = subparsers.add_parser("presets", help="list the session presets",
+                                   description="Lists the session presets which generate's sessions column can "
+                                               "name, with the options each one sets.")
+    parser.set_defaults(run=runPresets)
+
+
+def runPresets(args, out):
+    for preset in SESSION_PRESETS:
+        writeJson(out, {"preset": preset.key, "title": preset.title, "options": preset.values})
+    return EXIT_OK
+
+
+# channels...
+
+def addChannelsCommand(subparsers):
+    parser = subparsers.add_parser("channels", help="show the channels each session gets",
+                                   description="Shows the virtual channels each session in an xrdp.ini actually "
+                                               "gets, from [channels] and the session's own channel overrides.")
+    parser.add_argument("xrdp_ini", metavar="XRDP_INI", help="the xrdp.ini to look at")
+    parser.add_argument("-f", "--format", choices=["json", "text"], default="json",
+                        help="json prints one JSON object per session (the default), text is for people")
+    parser.set_defaults(run=runChannels)
+
+
+def runChannels(args, out):
+    try:
+        model = XrdpIniModel.load(args.xrdp_ini)
+    except (OSError, ValueError) as error:
+        writeJson(out, {"error": str(error)})
+        return EXIT_PROBLEMS
+    for session in ChannelResolver(model).toList():
+        if args.format == "json":
+            writeJson(out, session)
+        else:
+            channels = [channel for channel in CHANNELS if session["channels"][channel]]
+            line = "[" + session["section"] + "] " + session["name"] + ": " + (" ".join(channels) or "none")
+            if session["overridden"]:
+                line = line + " (overrides " + " ".join(session["overridden"]) + ")"
+            out.write(line + "\n")
+    return EXIT_OK
+
+
+# keymaps...
+
+def addKeymapsCommand(subparsers):
+    parser = subparsers.add_parser("keymaps", help="make xrdp keymaps without an X server",
+                                   description="Compiles each locale's XKB layout with libxkbcommon and writes its "
+                                               "km-XXXX.ini keymap, for every locale the GUI's Keymap Generator "
+                                               "knows, or the ones given. No X server is needed.")
+    parser.add_argument("-o", "--output", required=True, metavar="DIRECTORY", help="where to write the keymaps")
+    parser.add_argument("-l", "--locale", action="append", metavar="ID",
+                        help="a locale ID such as 0407 (may be repeated; default: every locale)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--rules", default=DEFAULT_RULES, help="XKB rules (default: " + DEFAULT_RULES + ")")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="XKB keyboard model (default: " + DEFAULT_MODEL + ")")
+    parser.add_argument("--options", default="", help="XKB options, e.g. compose:ralt")
+    parser.add_argument("--all-keycodes", action="store_true",
+                        help="include keycodes up to " + str(MAX_KEYCODE) + ", not just up to " + str(LAST_KEYCODE))
+    parser.add_argument("-b", "--backups", type=int, default=0, metavar="N",
+                        help="keep N backups of keymaps which are replaced")
+    parser.add_argument("--cache-dir", default=None, metavar="DIRECTORY",
+                        help="where to cache compiled layouts (default: " + defaultCacheDirectory() + ")")
+    parser.add_argument("--no-cache", action="store_true", help="compile every layout, and don't cache them")
+    parser.set_defaults(run=runKeymaps)
+
+
+def runKeymaps(args, out):
+    last_keycode = MAX_KEYCODE if args.all_keycodes else LAST_KEYCODE
+    cache = None if args.no_cache else KeymapCache(args.cache_dir)
+    try:
+        pack = generateKeymapPack(args.output, args.locale, args.jobs, args.rules, args.model, args.options,
+                                  last_keycode=last_keycode, backups=args.backups, cache=cache)
+    except (KeymapError, OSError) as error:
+        writeJson(out, {"error": str(error), "written": 0})
+        return EXIT_PROBLEMS
+    writeJson(out, {"written": len(pack.written), "cached": pack.cached,
+                    "files": [{"locale": code, "file": fname, "layout": layout} for code, fname, layout in pack.written],
+                    "failed": pack.failed})
+    if pack.isComplete():
+        return EXIT_OK
+    return EXIT_PROBLEMS
+
+
+def buildParser():
+    parser = argparse.ArgumentParser(prog="xrdpconfigurator",
+                                     description="Work on xrdp.ini and sesman.ini files without the GUI.")
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    addValidateCommand(subparsers)
+    addDiffCommand(subparsers)
+    addGenerateCommand(subparsers)
+    addImportSessionsCommand(subparsers)
+    addPresetsCommand(subparsers)
+    addChannelsCommand(subparsers)
+    addKeymapsCommand(subparsers)
+    return parser
+
+
+# @return: the exit status
+def main(argv=None, out=None):
+    if out is None:
+        out = sys.stdout
+    parser = buildParser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return EXIT_USAGE
+    return args.run(args, out)
@@ -0,0 +1,87 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# A registry of signal connections.
+#
+# Qt happily connects the same slot to the same signal more than once, and then calls it once per
+# connection. Code which connects signals whenever a file is opened or a dialog is set up therefore
+# ends up running the same handler several times per event.
+# Connecting through a ConnectionRegistry makes each (widget, signal, slot) connection exactly once,
+# no matter how often the code asks for it, and the registry can say what is currently connected.
+#
+#   registry.connect(widget, "clicked", self.buttonClicked)
+#
+# Nothing in here imports Qt - anything with a signal attribute offering connect() and disconnect() will do.
+
+
+class ConnectionRegistry(object):
+    def __init__(self):
+        # (id(owner), signal name, slot) -> owner. Holding on to the owner keeps its id from being reused.
+        self.connections = {}
+
+    @staticmethod
+    def _key(owner, signal_name, slot):
+        return id(owner), signal_name, slot
+
+    # Connects owner.<signal_name> to slot, unless they are already connected.
+    # @return: True if a new connection was made
+    def connect(self, owner, signal_name, slot):
+        key = self._key(owner, signal_name, slot)
+        if key in self.connections:
+            return False
+        getattr(owner, signal_name).connect(slot)
+        self.connections[key] = owner
+        return True
+
+    # @return: True if there was a connection to remove
+    def disconnect(self, owner, signal_name, slot):
+        key = self._key(owner, signal_name, slot)
+        if key not in self.connections:
+            return False
+        del self.connections[key]
+        getattr(owner, signal_name).disconnect(slot)
+        return True
+
+    # Disconnects everything connected to owner's signals, e.g. before owner is thrown away.
+    def disconnectAll(self, owner):
+        for key in [key for key in self.connections if key[0] == id(owner)]:
+            self.disconnect(owner, key[1], key[2])
+
+    def isConnected(self, owner, signal_name, slot):
+        return self._key(owner, signal_name, slot) in self.connections
+
+    # @param owner: only count connections to this object's signals, or None for all of them
+    def connectionCount(self, owner=None):
+        if owner is None:
+            return len(self.connections)
+        return len([key for key in self.connections if key[0] == id(owner)])
+
+    # @return: {"objectname.signal": number of slots connected} for every live connection
+    def connectionCounts(self):
+        counts = {}
+        for (owner_id, signal_name, slot), owner in self.connections.items():
+            name = self.ownerName(owner) + "." + signal_name
+            counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    @staticmethod
+    def ownerName(owner):
+        object_name = getattr(owner, "objectName", None)
+        if callable(object_name):
+            object_name = object_name()
+        if object_name:
+            return str(object_name)
+        return owner.__class__.__name__
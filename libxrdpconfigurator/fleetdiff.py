@@ -0,0 +1,219 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# Comparing many hosts' xrdp.ini (or sesman.ini) files against one "golden" baseline file.
+#
+# Each file is boiled down to a snapshot - {(section, option): value} - so the comparison doesn't care
+# about the order of sections and options, about comments, or about how a switch is spelled: "yes",
+# "true" and "1" are all the same value, the same as the GUI treats them.
+# Sessions are matched up by their name= rather than their position, so a host whose sessions are in a
+# different order only differs in what it's missing or has extra.
+#
+# The differences are grouped, so that a deviation shared by a thousand hosts is reported once, with
+# the list of hosts it applies to:
+#
+#   report = diffFleet("golden/xrdp.ini", findConfigFiles(["/srv/hosts"], [XRDP_INI]))
+#   for deviation, hosts in report.groups(): ...
+
+import fnmatch
+import os
+from multiprocessing import Pool
+from libxrdpconfigurator.sessions import sessionIndex
+from libxrdpconfigurator.models import XrdpIniModel, SesmanIniModel, isTrue, isFalse
+from libxrdpconfigurator.inifile import IniParseError
+from libxrdpconfigurator.validate import fileType, XRDP_SWITCHES, SESMAN_SWITCHES, SESMAN_INI
+
+# Kinds of deviation
+CHANGED = "changed"  # the host has a different value
+MISSING = "missing"  # the baseline has the option, the host doesn't
+EXTRA = "extra"  # the host has an option the baseline doesn't
+
+TRUE_VALUE = "true"
+FALSE_VALUE = "false"
+
+
+# The section a session is compared under.
+def sessionLabel(name, count=1):
+    label = "session " + name
+    if count > 1:
+        label = label + " #" + str(count)
+    return label
+
+
+# The switches of both files, as (section, option) in lower case - sesman.ini's names aren't lower cased
+# when it's read, and someone may well have written them differently
+SWITCHES = set((section.lower(), option.lower()) for section, option in XRDP_SWITCHES + SESMAN_SWITCHES)
+
+
+def _isSwitch(section, option):
+    return (section == "channels" or option.startswith("channel.") or
+            (section.lower(), option.lower()) in SWITCHES)
+
+
+def normalValue(section, option, value):
+    value = value.strip()
+    if _isSwitch(section, option):
+        if isTrue(value):
+            return TRUE_VALUE
+        if isFalse(value):
+            return FALSE_VALUE
+    return value
+
+
+# @return: {(section, option): value} for every option in the model, with sessions under sessionLabel()
+def snapshot(model):
+    values = {}
+    session_counts = {}
+    for section in model.sections():
+        label = section
+        if sessionIndex(section) >= 0:
+            name = model.get(section, "name", fallback=section)
+            session_counts[name] = session_counts.get(name, 0) + 1
+            label = sessionLabel(name, session_counts[name])
+        for option, value in model.items(section):
+            values[(label, option)] = normalValue(section, option, value)
+    return values
+
+
+# @param ignore: fnmatch patterns of "section.option" names to leave out
+# @return: a sorted list of (section, option, kind, baseline value, host value) deviations
+def compareSnapshots(baseline, host, ignore=()):
+    deviations = []
+    for key in set(baseline) | set(host):
+        section, option = key
+        if ignore and any(fnmatch.fnmatchcase(section + "." + option, pattern) for pattern in ignore):
+            continue
+        baseline_value = baseline.get(key)
+        host_value = host.get(key)
+        if baseline_value == host_value:
+            continue
+        if host_value is None:
+            kind = MISSING
+        elif baseline_value is None:
+            kind = EXTRA
+        else:
+            kind = CHANGED
+        deviations.append((section, option, kind, baseline_value, host_value))
+    deviations.sort(key=lambda deviation: [str(field) for field in deviation])
+    return deviations
+
+
+def loadSnapshot(fname):
+    with open(fname, 'r') as infile:
+        text = infile.read()
+    if fileType(text, fname) == SESMAN_INI:
+        return snapshot(SesmanIniModel.fromString(text, fname))
+    return snapshot(XrdpIniModel.fromString(text, fname))
+
+
+# Baseline snapshots already loaded, by (path, modification time, size)
+_baseline_cache = {}
+
+
+# A baseline is loaded once, however many times it's compared against.
+def loadBaseline(fname):
+    info = os.stat(fname)
+    key = (os.path.abspath(fname), info.st_mtime, info.st_size)
+    if key not in _baseline_cache:
+        _baseline_cache[key] = loadSnapshot(fname)
+    return _baseline_cache[key]
+
+
+class FleetReport(object):
+    def __init__(self, baseline_filename):
+        self.baseline_filename = baseline_filename
+        self.deviations = {}  # deviation -> [host filenames]
+        self.identical = []  # hosts with no deviations
+        self.unreadable = {}  # host filename -> reason
+        self.host_count = 0
+
+    def add(self, fname, deviations):
+        self.host_count += 1
+        if not deviations:
+            self.identical.append(fname)
+        for deviation in deviations:
+            self.deviations.setdefault(deviation, []).append(fname)
+
+    def addUnreadable(self, fname, reason):
+        self.host_count += 1
+        self.unreadable[fname] = reason
+
+    def isClean(self):
+        return not self.deviations and not self.unreadable
+
+    # @return: [(deviation, sorted hosts)], the most widespread deviations first
+    def groups(self):
+        groups = [(deviation, sorted(hosts)) for deviation, hosts in self.deviations.items()]
+        groups.sort(key=lambda group: (-len(group[1]), [str(field) for field in group[0]]))
+        return groups
+
+    def toDict(self):
+        deviations = []
+        for (section, option, kind, baseline_value, host_value), hosts in self.groups():
+            deviations.append({"section": section, "option": option, "kind": kind, "baseline": baseline_value,
+                               "value": host_value, "count": len(hosts), "hosts": hosts})
+        return {"baseline": self.baseline_filename, "hosts": self.host_count,
+                "identical": len(self.identical), "unreadable": self.unreadable, "deviations": deviations}
+
+
+# Each worker process gets the baseline snapshot once, when it starts, rather than with every host.
+_worker_baseline = None
+_worker_ignore = ()
+
+
+def _startWorker(baseline, ignore):
+    global _worker_baseline, _worker_ignore
+    _worker_baseline = baseline
+    _worker_ignore = ignore
+
+
+# @return: (fname, deviations, None) or (fname, None, the reason the file couldn't be loaded)
+def _diffHost(fname):
+    try:
+        host = loadSnapshot(fname)
+    except (OSError, UnicodeDecodeError, IniParseError) as error:
+        return fname, None, str(error)
+    return fname, compareSnapshots(_worker_baseline, host, _worker_ignore), None
+
+
+# Compares every host file against the baseline, across a pool of processes.
+# @param processes: number of worker processes, None for one per CPU
+# @param ignore: see compareSnapshots
+def diffFleet(baseline_fname, host_fnames, processes=None, ignore=()):
+    baseline = loadBaseline(baseline_fname)
+    ignore = tuple(ignore)
+    baseline_path = os.path.abspath(baseline_fname)
+    host_fnames = [fname for fname in host_fnames if os.path.abspath(fname) != baseline_path]
+    report = FleetReport(baseline_fname)
+    if processes == 1 or len(host_fnames) < 2:
+        _startWorker(baseline, ignore)
+        results = map(_diffHost, host_fnames)
+        pool = None
+    else:
+        pool = Pool(processes, _startWorker, (baseline, ignore))
+        chunksize = max(1, len(host_fnames) // ((processes or os.cpu_count() or 1) * 4))
+        results = pool.imap_unordered(_diffHost, host_fnames, chunksize)
+    try:
+        for fname, deviations, error in results:
+            if error is not None:
+                report.addUnreadable(fname, error)
+            else:
+                report.add(fname, deviations)
+    finally:
+        if pool is not None:
+            pool.terminate()
+    report.identical.sort()
+    return report
@@ -0,0 +1,179 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# Generating an xrdp.ini for each of many hosts from one base file.
+#
+# The base xrdp.ini is a template: ${name} (or $name) anywhere in it is replaced by that host's value of
+# the variable, and $$ stands for a "$". The variables come from a table with one row per host - a CSV
+# file with a header line, or a JSON list of objects, see tables - which needs at least a "host" column.
+# A "sessions" column adds sessions from the presets (see presets) after the base file's own sessions:
+#
+#   host,address,sessions
+#   web01,10.0.0.1,X11rdp;console:Local console
+#
+# gives web01 an X11rdp session called "X11rdp" and a console session called "Local console".
+#
+# The base file, the output file name and each preset's session are compiled into templates once, so
+# each host costs one string join per template, and all of the files are written in one AtomicBatch -
+# either every host's file is written or none of them are.
+
+import os
+import string
+from libxrdpconfigurator.atomicwrite import AtomicBatch
+from libxrdpconfigurator.sessions import XrdpIniDocument
+from libxrdpconfigurator.presets import findPreset, presetKeys
+from libxrdpconfigurator.tables import readTable
+
+# Where each host's file goes, under the output directory
+DEFAULT_OUTPUT = "${host}/xrdp.ini"
+
+HOST_COLUMN = "host"
+SESSIONS_COLUMN = "sessions"
+SESSION_SEPARATOR = ";"
+SESSION_NAME_SEPARATOR = ":"
+
+
+class TemplateError(ValueError):
+    pass
+
+
+# A template split into literal text and variable names, so that rendering it is a single join.
+class CompiledTemplate(object):
+    def __init__(self, text):
+        self.parts = []  # literal text, variable name, literal text, variable name, ..., literal text
+        literal = []
+        position = 0
+        for match in string.Template.pattern.finditer(text):
+            literal.append(text[position:match.start()])
+            position = match.end()
+            if match.group("escaped") is not None:
+                literal.append("$")
+                continue
+            name = match.group("named") or match.group("braced")
+            if name is None:
+                line = text.count("\n", 0, match.start()) + 1
+                raise TemplateError("line " + str(line) + ": a $ which isn't a ${variable} (use $$ for a $)")
+            self.parts.append("".join(literal))
+            self.parts.append(name)
+            literal = []
+        literal.append(text[position:])
+        self.parts.append("".join(literal))
+
+    def names(self):
+        return set(self.parts[1::2])
+
+    def render(self, values):
+        parts = list(self.parts)
+        for index in range(1, len(parts), 2):
+            try:
+                parts[index] = values[parts[index]]
+            except KeyError:
+                raise TemplateError("no value for ${" + parts[index] + "}")
+        return "".join(parts)
+
+
+def escapeTemplate(text):
+    return text.replace("$", "$$")
+
+
+# @return: a list of {variable: value} dicts, one per host
+def loadVariables(fname):
+    rows = readTable(fname)
+    for number, row in enumerate(rows, 1):
+        if not row.get(HOST_COLUMN):
+            raise TemplateError(fname + ": row " + str(number) + " has no " + HOST_COLUMN)
+    return rows
+
+
+# "preset" or "preset:session name" entries separated by ";"
+# @return: [[preset, session name]]
+def parseSessionList(text):
+    sessions = []
+    for entry in text.split(SESSION_SEPARATOR):
+        if entry.strip() == "":
+            continue
+        key, separator, name = entry.partition(SESSION_NAME_SEPARATOR)
+        preset = findPreset(key)
+        if preset is None:
+            raise TemplateError("unknown session preset " + repr(key.strip()) + ", expected one of " +
+                                ", ".join(presetKeys()))
+        sessions.append([preset, name.strip() or preset.key])
+    return sessions
+
+
+class ConfigGenerator(object):
+    def __init__(self, base_text, output_pattern=DEFAULT_OUTPUT):
+        self.base = CompiledTemplate(base_text)
+        self.output = CompiledTemplate(output_pattern)
+        # Added sessions are numbered on from the base file's own.
+        self.base_session_count = len(XrdpIniDocument.fromString(base_text).sessions)
+        self.separator = ""  # what goes between the base file and the first added session
+        if not base_text.endswith("\n"):
+            self.separator = "\n\n"
+        elif not base_text.endswith("\n\n"):
+            self.separator = "\n"
+        self.session_templates = {}  # preset key -> CompiledTemplate
+
+    @classmethod
+    def fromFile(cls, fname, output_pattern=DEFAULT_OUTPUT):
+        with open(fname, 'r') as infile:
+            return cls(infile.read(), output_pattern)
+
+    def sessionTemplate(self, preset):
+        if preset.key not in self.session_templates:
+            lines = ["[xrdp${session_number}]", "name=${session_name}"]
+            for option, value in preset.values:
+                lines.append(option + "=" + escapeTemplate(value))
+            self.session_templates[preset.key] = CompiledTemplate("\n".join(lines) + "\n")
+        return self.session_templates[preset.key]
+
+    # @return: the host's xrdp.ini text
+    def render(self, row):
+        text = self.base.render(row)
+        sessions = parseSessionList(row.get(SESSIONS_COLUMN) or "")
+        if not sessions:
+            return text
+        blocks = []
+        for number, (preset, name) in enumerate(sessions, self.base_session_count + 1):
+            blocks.append(self.sessionTemplate(preset).render({"session_number": str(number), "session_name": name}))
+        return text + self.separator + "\n".join(blocks)
+
+    def outputName(self, row, directory):
+        return os.path.join(directory, self.output.render(row))
+
+    # Renders and writes every host's file. Nothing is written unless every host renders.
+    # @return: the files written, in row order
+    def generate(self, rows, directory, backups=0):
+        fnames = []
+        seen = set()
+        made_directories = set()
+        with AtomicBatch(backups) as batch:
+            for row in rows:
+                try:
+                    fname = self.outputName(row, directory)
+                    text = self.render(row)
+                except TemplateError as error:
+                    raise TemplateError("host " + row[HOST_COLUMN] + ": " + str(error))
+                if fname in seen:
+                    raise TemplateError("host " + row[HOST_COLUMN] + ": " + fname + " is written by another host too")
+                seen.add(fname)
+                file_directory = os.path.dirname(os.path.abspath(fname))
+                if file_directory not in made_directories:
+                    os.makedirs(file_directory, exist_ok=True)
+                    made_directories.add(file_directory)
+                batch.write(fname, text)
+                fnames.append(fname)
+        return fnames
@@ -0,0 +1,396 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# A lossless INI file engine.
+#
+# ConfigParser throws away comments, blank lines and the original spelling and spacing of every line,
+# so writing a file back out always reflows the whole thing.
+# IniDocument instead keeps every line of the file exactly as it was read. Editing an option only
+# re-renders that option's line, adding an option or section only adds lines, and everything else is
+# written back out byte for byte.
+#
+# The ConfigParser methods used by XRDPConfigurator (has_section, get, set, items etc.) are provided
+# with the same behaviour and exceptions, so an IniDocument can be used in place of a ConfigParser.
+#
+# Changes are tracked per section and per option. Each section keeps its rendered text until one of
+# its options changes, so writing a document out only re-renders the sections which were edited, and
+# dirtySections()/dirtyKeys()/changedLines() say exactly what a save is going to change.
+
+from configparser import NoSectionError, NoOptionError, DuplicateSectionError
+
+COMMENT_PREFIXES = ('#', ';')
+DELIMITERS = ('=', ':')
+
+# read_string() reports its progress every this many lines
+PROGRESS_LINES = 1000
+
+# Used to tell "no fallback given" apart from fallback=None
+_UNSET = object()
+
+
+# Raised when an INI file cannot be parsed.
+class IniParseError(ValueError):
+    def __init__(self, message, lineno=0):
+        if lineno:
+            message = "line " + str(lineno) + ": " + message
+        super(IniParseError, self).__init__(message)
+        self.lineno = lineno
+
+
+# One "name=value" option.
+# lines holds the option's original text (more than one line if the value was continued onto indented
+# lines), or None once the value has been changed and the line needs to be rendered again.
+class IniOption(object):
+    __slots__ = ['key', 'name', 'value', 'prefix', 'lines']
+
+    def __init__(self, key, name, value, prefix=None, lines=None):
+        self.key = key  # the optionxform'd name, used for lookups
+        self.name = name  # the option name as it is written in the file
+        self.value = value
+        self.prefix = prefix if prefix is not None else name + "="  # "name = " part of the line, kept for re-rendering
+        self.lines = lines
+
+    def render(self):
+        if self.lines is not None:
+            return self.lines
+        values = self.value.split("\n")
+        return [self.prefix + values[0]] + ["    " + value for value in values[1:]]
+
+
+# One [section], along with everything that follows it up to the next section header.
+# entries is a list of IniOption objects and raw strings (comments and blank lines), in file order.
+class IniSection(object):
+    def __init__(self, name, header=None):
+        self.name = name
+        self.header = header if header is not None else "[" + name + "]"
+        self.entries = []
+        self.options = {}  # optionxform'd name -> IniOption
+        self.is_new = header is None  # added since the document was read or last saved
+        self.header_dirty = self.is_new
+        self.dirty_keys = set()  # options changed, added or removed since the last save
+        self.rendered = None  # cached render() result, thrown away whenever the section changes
+        self.rendered_text = None
+
+    def isDirty(self):
+        return self.header_dirty or bool(self.dirty_keys)
+
+    def touch(self, key=None):
+        if key is not None:
+            self.dirty_keys.add(key)
+        self.rendered = None
+        self.rendered_text = None
+
+    # Gives the section a new name, re-rendering only its header line.
+    def rename(self, name):
+        if name == self.name:
+            return
+        self.name = name
+        self.header = "[" + name + "]"
+        self.header_dirty = True
+        self.touch()
+
+    def markClean(self):
+        for entry in self.entries:
+            if isinstance(entry, IniOption) and entry.lines is None:
+                entry.lines = entry.render()
+        self.is_new = False
+        self.header_dirty = False
+        self.dirty_keys = set()
+
+    # Keeps a blank line between this section and whatever gets written after it.
+    def endWithBlankLine(self):
+        if not self.entries or self.entries[-1] != "":
+            self.entries.append("")
+            self.touch()
+
+    def lastOptionPosition(self):
+        for position in range(len(self.entries) - 1, -1, -1):
+            if isinstance(self.entries[position], IniOption):
+                return position
+        return -1
+
+    def render(self):
+        if self.rendered is None:
+            lines = [self.header]
+            for entry in self.entries:
+                if isinstance(entry, IniOption):
+                    lines.extend(entry.render())
+                else:
+                    lines.append(entry)
+            self.rendered = lines
+        return self.rendered
+
+    def renderText(self):
+        if self.rendered_text is None:
+            self.rendered_text = "\n".join(self.render())
+        return self.rendered_text
+
+    # Offsets (relative to the header line) of the lines which differ from what was last saved.
+    def changedLineOffsets(self):
+        if self.is_new:
+            return list(range(len(self.render())))
+        offsets = []
+        if self.header_dirty:
+            offsets.append(0)
+        offset = 1
+        for entry in self.entries:
+            if isinstance(entry, IniOption):
+                length = len(entry.render())
+                if entry.key in self.dirty_keys:
+                    offsets.extend(range(offset, offset + length))
+                offset += length
+            else:
+                offset += 1
+        return offsets
+
+
+class IniDocument(object):
+    def __init__(self, optionxform=str.lower):
+        self.optionxform = optionxform
+        self.preamble = []  # comments and blank lines before the first section
+        self.sectionlist = []
+        self.sectionindex = {}
+        self.trailing_newline = True
+        self.removed_sections = set()  # names of sections removed since the last save
+
+    @classmethod
+    def fromString(cls, text, optionxform=str.lower):
+        document = cls(optionxform)
+        document.read_string(text)
+        return document
+
+    # Parsing...
+
+    # @param progress: optional progress(lines done, total lines), called every PROGRESS_LINES lines.
+    #                  An exception raised by it stops the parse.
+    def read_string(self, text, progress=None):
+        self.preamble = []
+        self.sectionlist = []
+        self.sectionindex = {}
+        self.removed_sections = set()
+        self.trailing_newline = text == "" or text.endswith("\n")
+        section = None
+        option = None  # the last option read, which indented lines continue
+        option_indent = 0
+        lines = text.split("\n")
+        if self.trailing_newline:
+            lines.pop()
+        for lineno, line in enumerate(lines, 1):
+            if progress is not None and lineno % PROGRESS_LINES == 0:
+                progress(lineno, len(lines))
+            stripped = line.strip()
+            indent = len(line) - len(line.lstrip())
+            if stripped == "" or stripped.startswith(COMMENT_PREFIXES):
+                option = None
+                if section is None:
+                    self.preamble.append(line)
+                else:
+                    section.entries.append(line)
+                continue
+            if option is not None and indent > option_indent:
+                # A continuation line of a multi-line value.
+                option.value = option.value + "\n" + stripped
+                option.lines.append(line)
+                continue
+            option = None
+            if stripped.startswith("[") and stripped.rfind("]") > 1:
+                name = stripped[1:stripped.rfind("]")]
+                if name in self.sectionindex:
+                    raise IniParseError("section [" + name + "] appears more than once", lineno)
+                section = IniSection(name, line)
+                self.sectionlist.append(section)
+                self.sectionindex[name] = section
+                continue
+            position = self._delimiterPosition(stripped)
+            if position <= 0:
+                raise IniParseError("cannot parse " + repr(line), lineno)
+            if section is None:
+                raise IniParseError("option " + repr(stripped) + " is not inside a [section]", lineno)
+            name = stripped[:position].rstrip()
+            key = self.optionxform(name)
+            if key in section.options:
+                raise IniParseError("option " + repr(name) + " appears more than once in [" + section.name + "]",
+                                    lineno)
+            # Everything up to the start of the value is kept, so that "name = value" keeps its spacing
+            # when the value is changed later on.
+            value_start = indent + position + 1
+            while value_start < len(line) and line[value_start] in " \t":
+                value_start += 1
+            prefix = line[:value_start]
+            value = line[value_start:].rstrip()
+            option = IniOption(key, name, value, prefix, [line])
+            option_indent = indent
+            section.entries.append(option)
+            section.options[key] = option
+
+    # The first "=" or ":" separates an option's name from its value, the same as ConfigParser.
+    @staticmethod
+    def _delimiterPosition(line):
+        positions = [line.find(delimiter) for delimiter in DELIMITERS if delimiter in line]
+        if not positions:
+            return -1
+        return min(positions)
+
+    # Writing...
+
+    def renderLines(self):
+        lines = list(self.preamble)
+        for section in self.sectionlist:
+            lines.extend(section.render())
+        return lines
+
+    # Clean sections are written from their cached text, so only edited sections get rendered again.
+    # No header is added, so serializing an unedited document gives back exactly the text it was read from.
+    def serialize(self):
+        chunks = list(self.preamble)
+        for section in self.sectionlist:
+            if section.render():  # an empty block of sessions has no lines at all
+                chunks.append(section.renderText())
+        if not chunks:
+            return ""
+        text = "\n".join(chunks)
+        if self.trailing_newline:
+            text = text + "\n"
+        return text
+
+    def write(self, fileobject, space_around_delimiters=False):
+        fileobject.write(self.serialize())
+
+    # Dirty tracking...
+
+    def isDirty(self):
+        if self.removed_sections:
+            return True
+        for section in self.sectionlist:
+            if section.isDirty():
+                return True
+        return False
+
+    # @return: names of the sections which were changed, added or removed since the last save
+    def dirtySections(self):
+        names = [section.name for section in self.sectionlist if section.isDirty()]
+        return names + sorted(self.removed_sections - set(names))
+
+    def dirtyKeys(self, section):
+        if section not in self.sectionindex:
+            return set()
+        return set(self.sectionindex[section].dirty_keys)
+
+    # @return: zero based numbers of the lines in serialize()'s output which are new or changed
+    def changedLines(self):
+        changed = []
+        lineno = len(self.preamble)
+        for section in self.sectionlist:
+            if section.isDirty():
+                changed.extend(lineno + offset for offset in section.changedLineOffsets())
+            lineno += len(section.render())
+        return changed
+
+    # Called once the document has been saved - what has been written becomes the new baseline.
+    def markClean(self):
+        for section in self.sectionlist:
+            if section.isDirty():
+                section.markClean()
+        self.removed_sections = set()
+
+    # ConfigParser compatible interface...
+
+    def _section(self, section):
+        try:
+            return self.sectionindex[section]
+        except KeyError:
+            raise NoSectionError(section)
+
+    # The section which is written out last, or None if there are none.
+    def _lastSection(self):
+        if not self.sectionlist:
+            return None
+        return self.sectionlist[-1]
+
+    def sections(self):
+        return [section.name for section in self.sectionlist]
+
+    def has_section(self, section):
+        return section in self.sectionindex
+
+    def add_section(self, section):
+        if section in self.sectionindex:
+            raise DuplicateSectionError(section)
+        new_section = IniSection(section)
+        # Keep a blank line between the previous section and the new one...
+        previous = self._lastSection()
+        if previous is not None:
+            previous.endWithBlankLine()
+        self.sectionlist.append(new_section)
+        self.sectionindex[section] = new_section
+        return new_section
+
+    def remove_section(self, section):
+        if section not in self.sectionindex:
+            return False
+        old_section = self.sectionindex.pop(section)
+        self.sectionlist.remove(old_section)
+        if not old_section.is_new:
+            self.removed_sections.add(section)
+        return True
+
+    def options(self, section):
+        return [option.name for option in self._section(section).entries if isinstance(option, IniOption)]
+
+    def has_option(self, section, option):
+        if not self.has_section(section):
+            return False
+        return self.optionxform(option) in self._section(section).options
+
+    def get(self, section, option, fallback=_UNSET):
+        try:
+            return self._section(section).options[self.optionxform(option)].value
+        except NoSectionError:
+            if fallback is _UNSET:
+                raise
+        except KeyError:
+            if fallback is _UNSET:
+                raise NoOptionError(option, section)
+        return fallback
+
+    def set(self, section, option, value):
+        this_section = self._section(section)
+        key = self.optionxform(option)
+        value = str(value)
+        existing = this_section.options.get(key)
+        if existing is not None:
+            if existing.value != value:
+                existing.value = value
+                existing.lines = None
+                this_section.touch(key)
+            return
+        new_option = IniOption(key, key, value)
+        this_section.entries.insert(this_section.lastOptionPosition() + 1, new_option)
+        this_section.options[key] = new_option
+        this_section.touch(key)
+
+    def remove_option(self, section, option):
+        this_section = self._section(section)
+        old_option = this_section.options.pop(self.optionxform(option), None)
+        if old_option is None:
+            return False
+        this_section.entries.remove(old_option)
+        this_section.touch(old_option.key)
+        return True
+
+    def items(self, section):
+        return [(option.key, option.value) for option in self._section(section).entries
+                if isinstance(option, IniOption)]
@@ -0,0 +1,283 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# Keymap (km-XXXX.ini) generation, from the keycodes as seen by an X server.
+#
+# The C helper library libxrdpconfigurator.so looks every key up in every modifier state in one call -
+# getkeymaptable() fills in an array of KeymapEntry records - and formatKeymap() turns the lot into the
+# km-XXXX.ini text in one pass:
+#
+#   [noshift]
+#   Key8=0:0
+#   Key9=65307:27
+#   ...
+#
+# Only ctypes is needed here, not PySide. See the C helper for how the keys are looked up.
+#
+# None of the lookups allocate anything per key: they write into records (or a buffer) the caller owns,
+# and a KeymapTable keeps its records from one generation to the next, so generating keymaps over and over
+# in a long running process doesn't grow its memory.
+#
+# A KeymapBackend loads the libraries and declares their functions once, and keeps its X display open
+# between keymaps, so generating another one only costs the lookups:
+#
+#   backend = KeymapBackend()
+#   text = backend.generate()
+#   ...
+#   backend.close()
+#
+# Given a KeymapCache (see keymapcache), it fingerprints the display's XKB layout first and only looks the
+# keys up when that layout hasn't been seen before.
+
+import os
+from libxrdpconfigurator.keymapcache import keymapFingerprint, X11_ENGINE
+from ctypes import c_char_p, c_int, c_void_p, create_string_buffer, Structure, POINTER, CDLL
+
+# The keymap's sections, and the X modifier state each one is looked up in, in file order
+KEYMAP_SECTIONS = [["noshift", 0],
+                   ["shift", 1],
+                   ["altgr", 0x80],
+                   ["capslock", 2],
+                   ["shiftcapslock", 3],
+                   ["shiftaltgr", 0x81]]
+
+FIRST_KEYCODE = 8
+LAST_KEYCODE = 137  # the range xrdp's own keymaps cover
+MAX_KEYCODE = 255  # the highest keycode X has
+
+
+class KeymapEntry(Structure):
+    _fields_ = [("keycode", c_int),
+                ("state", c_int),
+                ("keysym", c_int),
+                ("unicode", c_int)]
+
+
+class KeymapError(OSError):
+    pass
+
+
+# An Xlib Display, only ever handled through a pointer
+class XDisplay(Structure):
+    pass
+
+
+# Big enough for any "Key<keycode>=<keysym>:<unicode>" string
+LOOKUP_STRING_SIZE = 32
+
+# Big enough for any sane _XKB_RULES_NAMES, which is five names
+RULES_NAMES_SIZE = 1024
+
+
+# Declares the C helper's functions.
+# @param lib: the loaded libxrdpconfigurator.so
+# @param display_type: the ctypes type of an Xlib Display *
+def declareKeymapFunctions(lib, display_type):
+    lib.getkeymaptable.argtypes = [display_type, c_int, c_int, POINTER(c_int), c_int, POINTER(KeymapEntry)]
+    lib.getkeymaptable.restype = c_int
+    lib.getlookupentry.argtypes = [display_type, c_int, c_int, POINTER(KeymapEntry)]
+    lib.getlookupentry.restype = c_int
+    lib.formatlookupstring.argtypes = [display_type, c_int, c_int, c_char_p, c_int]
+    lib.formatlookupstring.restype = c_int
+    # getlookupstring's result has to be handed back to freeme(), so it's kept as a plain pointer...
+    lib.getlookupstring.argtypes = [display_type, c_int, c_int]
+    lib.getlookupstring.restype = c_void_p
+    lib.freeme.argtypes = [c_void_p]
+    lib.freeme.restype = None
+    lib.displayconnected.argtypes = [display_type]
+    lib.displayconnected.restype = c_int
+    lib.refreshkeyboardmapping.argtypes = [display_type]
+    lib.refreshkeyboardmapping.restype = c_int
+    lib.getxkbrulesnames.argtypes = [display_type, c_char_p, c_int]
+    lib.getxkbrulesnames.restype = c_int
+
+
+# Every key in every section's modifier state, in records which are reused each time it's filled in.
+class KeymapTable(object):
+    def __init__(self, first_keycode=FIRST_KEYCODE, last_keycode=LAST_KEYCODE):
+        self.first_keycode = first_keycode
+        self.last_keycode = last_keycode
+        self.states = (c_int * len(KEYMAP_SECTIONS))(*[state for name, state in KEYMAP_SECTIONS])
+        self.entries = (KeymapEntry * ((last_keycode - first_keycode + 1) * len(KEYMAP_SECTIONS)))()
+        self.count = 0  # records filled in by the last lookup
+
+    # Looks every key up, in one call to the helper library.
+    def lookup(self, lib, display):
+        self.count = lib.getkeymaptable(display, self.first_keycode, self.last_keycode, self.states,
+                                        len(KEYMAP_SECTIONS), self.entries)
+        return self.count
+
+    def format(self):
+        return formatKeymap(self.entries[:self.count], self.first_keycode, self.last_keycode)
+
+
+# @return: the KeymapEntry records, section by section, each section's keycodes in order
+def lookupKeymap(lib, display, first_keycode=FIRST_KEYCODE, last_keycode=LAST_KEYCODE):
+    table = KeymapTable(first_keycode, last_keycode)
+    table.lookup(lib, display)
+    return table.entries[:table.count]
+
+
+# Looks one key up into entry, or into a new KeymapEntry.
+def lookupKey(lib, display, keycode, state, entry=None):
+    if entry is None:
+        entry = KeymapEntry()
+    lib.getlookupentry(display, keycode, state, entry)
+    return entry
+
+
+# @param buffer: a create_string_buffer() of at least LOOKUP_STRING_SIZE to write into, or None for a new one
+# @return: "Key<keycode>=<keysym>:<unicode>"
+def lookupString(lib, display, keycode, state, buffer=None):
+    if buffer is None:
+        buffer = create_string_buffer(LOOKUP_STRING_SIZE)
+    length = lib.formatlookupstring(display, keycode, state, buffer, len(buffer))
+    if length < 0:
+        raise ValueError("the buffer is too small for key " + str(keycode) + "'s lookup")
+    return buffer.value.decode('ascii')
+
+
+# @param entries: KeymapEntry records (or anything with keycode, keysym and unicode), as lookupKeymap gives
+# @return: the km-XXXX.ini text
+def formatKeymap(entries, first_keycode=FIRST_KEYCODE, last_keycode=LAST_KEYCODE):
+    key_count = last_keycode - first_keycode + 1
+    sections = []
+    for section_index, (name, state) in enumerate(KEYMAP_SECTIONS):
+        lines = ["[" + name + "]"]
+        for entry in entries[section_index * key_count:(section_index + 1) * key_count]:
+            lines.append("Key%d=%d:%d" % (entry.keycode, entry.keysym, entry.unicode))
+        sections.append("\n".join(lines) + "\n")
+    return "\n".join(sections)
+
+
+# @param table: a KeymapTable to reuse, or None for a new one
+def generateKeymap(lib, display, first_keycode=FIRST_KEYCODE, last_keycode=LAST_KEYCODE, table=None):
+    if table is None:
+        table = KeymapTable(first_keycode, last_keycode)
+    table.lookup(lib, display)
+    return table.format()
+
+
+class KeymapBackend(object):
+    HELPER_LIBRARY = "libxrdpconfigurator.so"
+    X11_LIBRARY = "libX11.so.6"
+
+    # @param display_name: the X display to look the keys up on, None for $DISPLAY
+    # @param cache: a KeymapCache to keep the keymaps in, or None to always look the keys up
+    def __init__(self, display_name=None, helper_library=HELPER_LIBRARY, x11_library=X11_LIBRARY, cache=None):
+        self.display_name = display_name
+        self.cache = cache
+        self.helper_library = helper_library
+        self.x11_library = x11_library
+        self.lib = None
+        self.xlib = None
+        self.display = None
+        self.connected_to = None  # the display name the connection was opened with
+        self.tables = {}  # (first keycode, last keycode) -> KeymapTable
+        self.names_buffer = None  # reused by rulesNames()
+
+    def _loadLibraries(self):
+        if self.lib is not None:
+            return
+        try:
+            lib = CDLL(self.helper_library)
+            xlib = CDLL(self.x11_library)
+        except OSError as error:
+            raise KeymapError("could not load the keymap libraries: " + str(error))
+        declareKeymapFunctions(lib, POINTER(XDisplay))
+        xlib.XOpenDisplay.argtypes = [c_char_p]
+        xlib.XOpenDisplay.restype = POINTER(XDisplay)
+        xlib.XCloseDisplay.argtypes = [POINTER(XDisplay)]
+        xlib.XCloseDisplay.restype = c_int
+        self.lib = lib
+        self.xlib = xlib
+
+    def _displayName(self):
+        if self.display_name is not None:
+            return self.display_name
+        return os.environ.get("DISPLAY", "")
+
+    # @return: the open display, connecting (again) if it isn't open, has gone away, or $DISPLAY has changed
+    def connect(self):
+        self._loadLibraries()
+        name = self._displayName()
+        if self.display is not None and name != self.connected_to:
+            self.close()
+        if self.display is not None and not self.lib.displayconnected(self.display):
+            # Xlib would end the process on any call on a dead connection, XCloseDisplay included, so the
+            # old Display is just let go of...
+            self.display = None
+        if self.display is None:
+            display = self.xlib.XOpenDisplay(name.encode() if name else None)
+            if not display:
+                raise KeymapError("could not open display " + repr(name))
+            self.display = display
+            self.connected_to = name
+        return self.display
+
+    def isConnected(self):
+        return self.display is not None
+
+    def close(self):
+        if self.display is not None:
+            self.xlib.XCloseDisplay(self.display)
+            self.display = None
+            self.connected_to = None
+
+    def table(self, first_keycode, last_keycode):
+        key = (first_keycode, last_keycode)
+        if key not in self.tables:
+            self.tables[key] = KeymapTable(first_keycode, last_keycode)
+        return self.tables[key]
+
+    # @return: [rules, model, layout, variant, options] the display's keyboard was set up with, or None
+    #          if the X server doesn't say (no XKB, or its keymap was loaded some other way)
+    def rulesNames(self):
+        display = self.connect()
+        if self.names_buffer is None:
+            self.names_buffer = create_string_buffer(RULES_NAMES_SIZE)
+        length = self.lib.getxkbrulesnames(display, self.names_buffer, len(self.names_buffer))
+        if length < 0:
+            return None
+        names = self.names_buffer.raw[:length].decode("latin-1").split("\0")
+        if len(names) < 5 or not names[0]:
+            return None
+        return names[:5]
+
+    # @return: the keymapFingerprint of the display's current layout, or None if it has no XKB rules names
+    def fingerprint(self, first_keycode=FIRST_KEYCODE, last_keycode=LAST_KEYCODE):
+        names = self.rulesNames()
+        if names is None:
+            return None
+        return keymapFingerprint(*([X11_ENGINE] + names + [first_keycode, last_keycode]))
+
+    # @return: the km-XXXX.ini text for the display's current keyboard layout
+    def generate(self, first_keycode=FIRST_KEYCODE, last_keycode=LAST_KEYCODE):
+        display = self.connect()
+        # Pick up any change of layout since the last keymap...
+        self.lib.refreshkeyboardmapping(display)
+        fingerprint = None
+        if self.cache is not None:
+            fingerprint = self.fingerprint(first_keycode, last_keycode)
+            if fingerprint is not None:
+                text = self.cache.get(fingerprint)
+                if text is not None:
+                    return text
+        text = generateKeymap(self.lib, display, first_keycode, last_keycode,
+                              self.table(first_keycode, last_keycode))
+        if fingerprint is not None:
+            self.cache.put(fingerprint, text)
+        return text
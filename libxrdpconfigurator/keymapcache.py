@@ -0,0 +1,144 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# A cache of generated keymaps on disk.
+#
+# A keymap depends on the XKB layout it was made from - the rules, model, layout, variant and options,
+# as setxkbmap -query shows them - on the keycodes it covers, and on what looked the keys up. An X server
+# (XLookupString, see keymap) and libxkbcommon (see xkbkeymap) don't always agree on the same layout, e.g.
+# XLookupString's Latin-1 characters come out as :0 in a UTF-8 locale, so the GUI's preview has to show
+# what its own X server gives. keymapFingerprint() hashes all of those, and the cache keeps each keymap's
+# text in a file named after its fingerprint, so the same layout is only ever looked up once by each:
+#
+#   cache = KeymapCache()
+#   fingerprint = keymapFingerprint(XKBCOMMON_ENGINE, "evdev", "pc105", "gb", "", "", 8, 137)
+#   text = cache.get(fingerprint)
+#   if text is None:
+#       text = cache.put(fingerprint, compiler.generate("gb"))
+#
+# Only the max_entries keymaps used last are kept. Reading one marks it as used, by its modification time.
+
+import hashlib
+import os
+from libxrdpconfigurator.atomicwrite import atomicWrite, removeQuietly
+
+# Bump this when the keymap text changes for the same layout, so older entries are never handed out.
+CACHE_FORMAT = "2"
+
+# What looked the keys up
+X11_ENGINE = "x11"
+XKBCOMMON_ENGINE = "xkbcommon"
+
+CACHE_SUFFIX = ".ini"
+DEFAULT_MAX_ENTRIES = 256  # every locale's layout, a few times over
+
+
+# @return: $XDG_CACHE_HOME/xrdpconfigurator/keymaps, or ~/.cache/xrdpconfigurator/keymaps
+def defaultCacheDirectory():
+    base = os.environ.get("XDG_CACHE_HOME", "")
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "xrdpconfigurator", "keymaps")
+
+
+# @param engine: X11_ENGINE or XKBCOMMON_ENGINE
+# @return: the hex SHA-256 of everything a keymap depends on
+def keymapFingerprint(engine, rules, model, layout, variant, options, first_keycode, last_keycode):
+    fields = [CACHE_FORMAT, engine, rules or "", model or "", layout or "", variant or "", options or "",
+              str(first_keycode), str(last_keycode)]
+    return hashlib.sha256("\0".join(fields).encode("utf-8")).hexdigest()
+
+
+class KeymapCache(object):
+    def __init__(self, directory=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.directory = directory if directory is not None else defaultCacheDirectory()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, fingerprint):
+        return os.path.join(self.directory, fingerprint + CACHE_SUFFIX)
+
+    # @return: the keymap text, or None if it isn't cached
+    def get(self, fingerprint):
+        fname = self.path(fingerprint)
+        try:
+            with open(fname, encoding="ascii") as cached:
+                text = cached.read()
+            os.utime(fname, None)
+        except (OSError, ValueError):
+            # Missing, unreadable or damaged - it'll be made again and written over
+            self.misses += 1
+            return None
+        self.hits += 1
+        return text
+
+    # Caches the keymap text, making room for it if need be. A cache which can't be written to is only
+    # a cache, so that isn't an error.
+    # @return: text
+    def put(self, fingerprint, text):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            atomicWrite(self.path(fingerprint), text)
+            self.evict(keep=fingerprint)
+        except OSError:
+            pass
+        return text
+
+    # @param generate: generate() makes the keymap's text when it isn't cached
+    def fetch(self, fingerprint, generate):
+        text = self.get(fingerprint)
+        if text is None:
+            text = self.put(fingerprint, generate())
+        return text
+
+    # @return: [[modification time, file], ...] of every cached keymap, least recently used first
+    def entries(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            fname = os.path.join(self.directory, name)
+            try:
+                entries.append([os.stat(fname).st_mtime_ns, fname])
+            except OSError:
+                continue
+        entries.sort()
+        return entries
+
+    # Removes the least recently used keymaps beyond max_entries.
+    # @param keep: a fingerprint not to remove, e.g. the one just written, whose time may tie with others'
+    # @return: the number removed
+    def evict(self, keep=None):
+        entries = self.entries()
+        if keep is not None:
+            kept = self.path(keep)
+            entries = [entry for entry in entries if entry[1] != kept]
+            surplus = len(entries) + 1 - self.max_entries
+        else:
+            surplus = len(entries) - self.max_entries
+        surplus = max(surplus, 0)
+        for mtime, fname in entries[:surplus]:
+            removeQuietly(fname)
+        return surplus
+
+    def clear(self):
+        for mtime, fname in self.entries():
+            removeQuietly(fname)
@@ -0,0 +1,197 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# The locales xrdp keymaps are made for.
+#
+# Each one has a Windows locale ID, which names its keymap file (km-0407.ini is German (Germany)), a
+# language tag and a description. For making keymaps without an X server (see xkbkeymap), each locale
+# also has the XKB layout, and maybe variant, its keyboards use.
+
+KEYMAP_LIST = """0436 af Afrikaans
+041C sq Albanian
+0001 ar Arabic
+0401 ar-sa Arabic (Saudi Arabia)
+0801 ar-iq Arabic (Iraq)
+0C01 ar-eg Arabic (Egypt)
+1001 ar-ly Arabic (Libya)
+1401 ar-dz Arabic (Algeria)
+1801 ar-ma Arabic (Morocco)
+1C01 ar-tn Arabic (Tunisia)
+2001 ar-om Arabic (Oman)
+2401 ar-ye Arabic (Yemen)
+2801 ar-sy Arabic (Syria)
+2C01 ar-jo Arabic (Jordan)
+3001 ar-lb Arabic (Lebanon)
+3401 ar-kw Arabic (Kuwait)
+3801 ar-ae Arabic (U.A.E.)
+3C01 ar-bh Arabic (Bahrain)
+4001 ar-qa Arabic (Qatar)
+042D eu Basque
+0402 bg Bulgarian
+0423 be Belarusian
+0403 ca Catalan
+0004 zh Chinese
+0404 zh-tw Chinese (Taiwan)
+0804 zh-cn Chinese (China)
+0C04 zh-hk Chinese (Hong Kong SAR)
+1004 zh-sg Chinese (Singapore)
+041A hr Croatian
+0405 cs Czech
+0406 da Danish
+0413 nl Dutch (Netherlands)
+0813 nl-be Dutch (Belgium)
+0009 en English
+0409 en-us English (United States)
+0809 en-gb English (United Kingdom)
+0C09 en-au English (Australia)
+1009 en-ca English (Canada)
+1409 en-nz English (New Zealand)
+1809 en-ie English (Ireland)
+1C09 en-za English (South Africa)
+2009 en-jm English (Jamaica)
+2809 en-bz English (Belize)
+2C09 en-tt English (Trinidad)
+0425 et Estonian
+0438 fo Faeroese
+0429 fa Farsi
+040B fi Finnish
+040C fr French (France)
+080C fr-be French (Belgium)
+0C0C fr-ca French (Canada)
+100C fr-ch French (Switzerland)
+140C fr-lu French (Luxembourg)
+043C gd Gaelic
+0407 de German (Germany)
+0807 de-ch German (Switzerland)
+0C07 de-at German (Austria)
+1007 de-lu German (Luxembourg)
+1407 de-li German (Liechtenstein)
+0408 el Greek
+040D he Hebrew
+0439 hi Hindi
+040E hu Hungarian
+040F is Icelandic
+0421 in Indonesian
+0410 it Italian (Italy)
+0810 it-ch Italian (Switzerland)
+0411 ja Japanese
+0412 ko Korean
+0426 lv Latvian
+0427 lt Lithuanian
+042F mk FYRO Macedonian
+043E ms Malay (Malaysia)
+043A mt Maltese
+0414 no Norwegian (Bokmal)
+0814 no Norwegian (Nynorsk)
+0415 pl Polish
+0416 pt-br Portuguese (Brazil)
+0816 pt Portuguese (Portugal)
+0417 rm Rhaeto-Romanic
+0418 ro Romanian
+0818 ro-mo Romanian (Moldova)
+0419 ru Russian
+0819 ru-mo Russian (Moldova)
+0C1A sr Serbian (Cyrillic)
+081A sr Serbian (Latin)
+041B sk Slovak
+0424 sl Slovenian
+042E sb Sorbian
+040A es Spanish (Traditional Sort)
+080A es-mx Spanish (Mexico)
+0C0A es Spanish (International Sort)
+100A es-gt Spanish (Guatemala)
+140A es-cr Spanish (Costa Rica)
+180A es-pa Spanish (Panama)
+1C0A es-do Spanish (Dominican Republic)
+200A es-ve Spanish (Venezuela)
+240A es-co Spanish (Colombia)
+280A es-pe Spanish (Peru)
+2C0A es-ar Spanish (Argentina)
+300A es-ec Spanish (Ecuador)
+340A es-cl Spanish (Chile)
+380A es-uy Spanish (Uruguay)
+3C0A es-py Spanish (Paraguay)
+400A es-bo Spanish (Bolivia)
+440A es-sv Spanish (El Salvador)
+480A es-hn Spanish (Honduras)
+4C0A es-ni Spanish (Nicaragua)
+500A es-pr Spanish (Puerto Rico)
+0430 sx Sutu
+041D sv Swedish
+081D sv-fi Swedish (Finland)
+041E th Thai
+0431 ts Tsonga
+0432 tn Tswana
+041F tr Turkish
+0422 uk Ukrainian
+0420 ur Urdu
+042A vi Vietnamese
+0434 xh Xhosa
+043D ji Yiddish
+0435 zu Zulu
+"""
+
+# XKB layouts, as "layout" or "layout(variant)", by language tag. A tag which isn't here gets its
+# language's layout, or for a regional variant of a language in REGIONAL_LAYOUTS, that one.
+TAG_LAYOUTS = {
+    "af": "za", "sq": "al", "ar": "ara", "eu": "es", "bg": "bg", "be": "by", "ca": "es(cat)",
+    "zh": "cn", "zh-tw": "tw", "hr": "hr", "cs": "cz", "da": "dk", "nl": "nl", "nl-be": "be",
+    "en": "us", "en-gb": "gb", "en-ca": "ca(eng)", "en-ie": "ie", "en-za": "za",
+    "et": "ee", "fo": "fo", "fa": "ir", "fi": "fi",
+    "fr": "fr", "fr-be": "be", "fr-ca": "ca", "fr-ch": "ch(fr)", "fr-lu": "ch(fr)", "gd": "gb(gla)",
+    "de": "de", "de-ch": "ch", "de-at": "at", "de-lu": "ch", "de-li": "ch",
+    "el": "gr", "he": "il", "hi": "in", "hu": "hu", "is": "is", "in": "id", "it": "it", "it-ch": "ch",
+    "ja": "jp", "ko": "kr", "lv": "lv", "lt": "lt", "mk": "mk", "ms": "us", "mt": "mt", "no": "no",
+    "pl": "pl", "pt": "pt", "pt-br": "br", "rm": "ch", "ro": "ro", "ro-mo": "md", "ru": "ru",
+    "sr": "rs", "sk": "sk", "sl": "si", "sb": "de", "es": "es", "sx": "za", "sv": "se", "sv-fi": "fi",
+    "th": "th", "ts": "za", "tn": "za", "tr": "tr", "uk": "ua", "ur": "pk", "vi": "vn", "xh": "za",
+    "ji": "il", "zu": "za",
+}
+
+REGIONAL_LAYOUTS = {"es": "latam"}
+
+# Locales which share a language tag with another but not its layout, by locale ID
+LOCALE_LAYOUTS = {"081A": "rs(latin)"}
+
+
+# @return: [[locale ID, language tag, description], ...] in KEYMAP_LIST order
+def keymapLocales():
+    locales = []
+    for line in KEYMAP_LIST.split("\n"):
+        if line.strip() == "":
+            continue
+        code, tag, description = line.split(" ", 2)
+        locales.append([code, tag, description])
+    return locales
+
+
+def keymapFileName(code):
+    return "km-" + code.lower() + ".ini"
+
+
+# @return: [layout, variant] for the locale, the variant being "" for the layout's basic one
+def localeLayout(code, tag):
+    layout = LOCALE_LAYOUTS.get(code.upper())
+    if layout is None:
+        layout = TAG_LAYOUTS.get(tag)
+    if layout is None:
+        language = tag.split("-")[0]
+        if language != tag and language in REGIONAL_LAYOUTS:
+            layout = REGIONAL_LAYOUTS[language]
+        else:
+            layout = TAG_LAYOUTS.get(language, "us")
+    name, separator, variant = layout.partition("(")
+    return [name, variant.rstrip(")")]
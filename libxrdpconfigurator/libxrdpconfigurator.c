@@ -16,8 +16,8 @@
 
 // libxrdpconfigurator - Helper shared library for XRDPConfigurator, for generating keymaps.
 // Uses a similar method to the xrdp project's xrdp-genkeymap to access Xlib in order to retrieve key codes.
-// Most of the heavy lifting is done in Python, which then calls this helper lib, which then returns a key code
-// back to the python application.
+// Most of the heavy lifting is done in Python, which then calls this helper lib, which then returns the key codes
+// back to the python application - a whole keymap's worth at once with getkeymaptable.
 //
 // The xrdp project can be found at https://github.com/neutrinolabs/xrdp
 
@@ -25,21 +25,39 @@
 #include <stdlib.h>
 #include <string.h>
 #include <locale.h>
+#include <poll.h>
+#include <sys/socket.h>
 #include <X11/Xlib.h>
 #include <X11/Xutil.h>
+#include <X11/Xatom.h>
+
+// One key's lookup in one modifier state, see getkeymaptable.
+struct keymap_entry
+{
+    int keycode;
+    int state;
+    int keysym;
+    int unicode;
+};
 
 char* getlookupstring(Display *dsplay, int keycode, int state);
+int getlookupentry(Display *dsplay, int keycode, int state, struct keymap_entry *entry);
+int formatlookupstring(Display *dsplay, int keycode, int state, char *buffer, int size);
+void freeme(char *ptr);
+int getkeymaptable(Display *dsplay, int first_keycode, int last_keycode, const int *states, int state_count,
+                   struct keymap_entry *entries);
+int displayconnected(Display *dsplay);
+int refreshkeyboardmapping(Display *dsplay);
+int getxkbrulesnames(Display *dsplay, char *buffer, int size);
 
 
-char* getlookupstring(Display *dsplay, int keycode, int state)
+// Looks the key up as it would be pressed in the given modifier state.
+static void lookupkey(Display *dsplay, int keycode, int state, KeySym *ksym, int *code)
 {
     XKeyPressedEvent kpe;
-    KeySym ksym; // an Xlib KeySym struct
     int count = 0; // size of the returned string in bytes.
-    int code; // the returned unicode
     char text[256];
     wchar_t wtext[256];
-    char *msgOut;
 
     memset(&kpe, 0, sizeof(kpe));
     kpe.type = KeyPress;
@@ -49,19 +67,178 @@ char* getlookupstring(Display *dsplay, int keycode, int state)
     kpe.same_screen = True;
     kpe.keycode = keycode;
     kpe.state = state;
-    count = XLookupString(&kpe, text, 255, &ksym, NULL);
+    count = XLookupString(&kpe, text, 255, ksym, NULL);
     text[count] = 0;
-    code = 0;
+    *code = 0;
     if (mbstowcs(wtext, text, 255) == 1)
     {
-        code = wtext[0];
+        *code = wtext[0];
+    }
+}
+
+// Returns "Key<keycode>=<keysym>:<unicode>" in a string which the caller must give back to freeme(),
+// or NULL if it couldn't be allocated.
+// Prefer getlookupentry or formatlookupstring, which write into the caller's own memory.
+char* getlookupstring(Display *dsplay, int keycode, int state)
+{
+    KeySym ksym; // an Xlib KeySym struct
+    int code; // the returned unicode
+    char *msgOut;
+
+    lookupkey(dsplay, keycode, state, &ksym, &code);
+    if (asprintf(&msgOut, "Key%d=%d:%d", keycode, (int) ksym, code) < 0)
+    {
+        return NULL;
+    }
+    return msgOut; // return the result back to the application.
+}
+
+// Fills in the caller's entry for the key. Nothing is allocated.
+// Returns 1.
+int getlookupentry(Display *dsplay, int keycode, int state, struct keymap_entry *entry)
+{
+    KeySym ksym;
+    int code;
+
+    lookupkey(dsplay, keycode, state, &ksym, &code);
+    entry->keycode = keycode;
+    entry->state = state;
+    entry->keysym = (int) ksym;
+    entry->unicode = code;
+    return 1;
+}
+
+// Writes "Key<keycode>=<keysym>:<unicode>" into the caller's buffer of size bytes. Nothing is allocated.
+// Returns the length of the string, or -1 if the buffer is too small for it (32 bytes is always enough).
+int formatlookupstring(Display *dsplay, int keycode, int state, char *buffer, int size)
+{
+    KeySym ksym;
+    int code;
+    int length;
+
+    lookupkey(dsplay, keycode, state, &ksym, &code);
+    length = snprintf(buffer, size, "Key%d=%d:%d", keycode, (int) ksym, code);
+    if (length < 0 || length >= size)
+    {
+        return -1;
+    }
+    return length;
+}
+
+// Looks up every keycode from first_keycode to last_keycode in every one of the states, all in one call.
+// entries must have room for (last_keycode - first_keycode + 1) * state_count records, which are filled in
+// state by state, each state's keycodes in order.
+// Nothing is allocated. Returns the number of records filled in.
+int getkeymaptable(Display *dsplay, int first_keycode, int last_keycode, const int *states, int state_count,
+                   struct keymap_entry *entries)
+{
+    KeySym ksym;
+    int code;
+    int keycode;
+    int index;
+    int count = 0;
+
+    for (index = 0; index < state_count; index++)
+    {
+        for (keycode = first_keycode; keycode <= last_keycode; keycode++)
+        {
+            lookupkey(dsplay, keycode, states[index], &ksym, &code);
+            entries[count].keycode = keycode;
+            entries[count].state = states[index];
+            entries[count].keysym = (int) ksym;
+            entries[count].unicode = code;
+            count++;
+        }
     }
-    asprintf(&msgOut, "Key%d=%d:%d", keycode, (int) ksym, code);
-    char *msg_out = strdup(msgOut);
-    return msg_out; // return the result back to the application.
+    return count;
 }
 
 void freeme(char *ptr)
 {
   free(ptr);
-}
\ No newline at end of file
+}
+
+// For a display connection which is kept open between keymaps...
+
+// Returns 1 if the connection to the X server is still there, 0 if the server has gone away.
+// This only looks at the socket, so unlike an Xlib call on a dead connection it can't end the process.
+int displayconnected(Display *dsplay)
+{
+    struct pollfd pfd;
+    char byte;
+
+    pfd.fd = ConnectionNumber(dsplay);
+    pfd.events = POLLIN;
+    pfd.revents = 0;
+    if (poll(&pfd, 1, 0) < 0)
+    {
+        return 0;
+    }
+    if (pfd.revents & (POLLERR | POLLHUP | POLLNVAL))
+    {
+        return 0;
+    }
+    // Readable with nothing to read means the server closed the connection...
+    if ((pfd.revents & POLLIN) && recv(pfd.fd, &byte, 1, MSG_PEEK | MSG_DONTWAIT) == 0)
+    {
+        return 0;
+    }
+    return 1;
+}
+
+// XLookupString works from Xlib's copy of the keyboard mapping, which is only brought up to date when
+// the server's MappingNotify events are read. Reads any waiting events, refreshing the copy.
+// Returns the number of mapping changes seen.
+int refreshkeyboardmapping(Display *dsplay)
+{
+    XEvent event;
+    int changes = 0;
+
+    while (XPending(dsplay) > 0)
+    {
+        XNextEvent(dsplay, &event);
+        if (event.type == MappingNotify)
+        {
+            XRefreshKeyboardMapping(&event.xmapping);
+            changes++;
+        }
+    }
+    return changes;
+}
+
+// Copies the root window's _XKB_RULES_NAMES property - the XKB rules, model, layout, variant and options
+// the keyboard was set up with, each followed by a NUL, as setxkbmap -query shows them - into the caller's
+// buffer of size bytes.
+// Returns the number of bytes copied, or -1 if the property isn't there or doesn't fit.
+int getxkbrulesnames(Display *dsplay, char *buffer, int size)
+{
+    Atom rules_atom;
+    Atom actual_type;
+    int actual_format;
+    unsigned long item_count;
+    unsigned long bytes_after;
+    unsigned char *data = NULL;
+    int length = -1;
+
+    rules_atom = XInternAtom(dsplay, "_XKB_RULES_NAMES", True);
+    if (rules_atom == None)
+    {
+        return -1;
+    }
+    if (XGetWindowProperty(dsplay, DefaultRootWindow(dsplay), rules_atom, 0, size / 4, False, XA_STRING,
+                           &actual_type, &actual_format, &item_count, &bytes_after, &data) != Success)
+    {
+        return -1;
+    }
+    if (data != NULL && actual_type == XA_STRING && actual_format == 8 && bytes_after == 0 &&
+        item_count <= (unsigned long) size)
+    {
+        memcpy(buffer, data, item_count);
+        length = (int) item_count;
+    }
+    if (data != NULL)
+    {
+        XFree(data);
+    }
+    return length;
+}
@@ -0,0 +1,152 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# Loading INI files in the background.
+#
+# Reading and parsing a big file (or one on a slow mount) takes a while, and a GUI which does it on its
+# own thread stops responding until it's done. A ModelLoader reads and parses files on a worker thread
+# instead, reporting how far it has got as it goes, and hands over the finished model in one piece.
+#
+#   loader = ModelLoader()
+#   loader.start(XrdpIniModel, "/etc/xrdp/xrdp.ini", progress=showPercent, done=loaded)
+#
+# progress(percent) and done(load) are called on the worker thread - a GUI has to pass them on to its
+# own thread itself (a queued Qt signal does that).
+# Starting a load cancels the load of the same type of file which is still running, if there is one.
+
+import os
+import threading
+from concurrent import futures
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+# One load of one file.
+class ModelLoad(object):
+    READ_SIZE = 65536
+    READ_PERCENT = 50  # the share of the progress taken by reading the file, the rest is parsing
+
+    def __init__(self, model_class, fname, progress=None, done=None):
+        self.model_class = model_class
+        self.filename = fname
+        self.progress = progress
+        self.done = done
+        self.model = None  # the loaded model, once the load has finished
+        self.error = None  # or the reason it couldn't be loaded
+        self.percent = 0
+        self.cancel_event = threading.Event()
+
+    def filetype(self):
+        return self.model_class.FILETYPE
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def isCancelled(self):
+        return self.cancel_event.is_set()
+
+    # Loads the file, then calls done(self) unless the load was cancelled.
+    # A file which can't be read or parsed leaves model as None and the reason in error, the same as
+    # IniModel.loadOrNone(). So does anything else going wrong - the executor would swallow the exception,
+    # and without done() the load would never be finished.
+    def run(self):
+        try:
+            self.model = self._load()
+        except LoadCancelled:
+            return
+        except Exception as error:
+            self.error = error
+        if self.done is not None and not self.isCancelled():
+            self.done(self)
+
+    def _load(self):
+        size = max(os.path.getsize(self.filename), 1)
+        chunks = []
+        done = 0
+        with open(self.filename, 'r') as infile:
+            while True:
+                self._checkCancelled()
+                chunk = infile.read(self.READ_SIZE)
+                if chunk == "":
+                    break
+                chunks.append(chunk)
+                done += len(chunk)
+                self._report(min(done, size) * self.READ_PERCENT // size)
+        model = self.model_class()
+        model.readString("".join(chunks), self._parsed)
+        model.filename = self.filename
+        self._checkCancelled()
+        self._report(100)
+        return model
+
+    def _parsed(self, line, lines):
+        self._checkCancelled()
+        self._report(self.READ_PERCENT + line * (100 - self.READ_PERCENT) // lines)
+
+    def _checkCancelled(self):
+        if self.isCancelled():
+            raise LoadCancelled()
+
+    # Only reports a change in the percentage, so a big file doesn't flood the GUI with progress updates.
+    def _report(self, percent):
+        if percent == self.percent:
+            return
+        self.percent = percent
+        if self.progress is not None:
+            self.progress(percent)
+
+
+class ModelLoader(object):
+    def __init__(self, workers=2):
+        self.executor = futures.ThreadPoolExecutor(max_workers=workers)
+        self.loads = {}  # file type -> the ModelLoad running for it
+
+    # Starts loading fname into a new model_class model, cancelling any load of the same file type.
+    # @return: the ModelLoad
+    def start(self, model_class, fname, progress=None, done=None):
+        load = ModelLoad(model_class, fname, progress, done)
+        self.cancel(load.filetype())
+        self.loads[load.filetype()] = load
+        self.executor.submit(load.run)
+        return load
+
+    def cancel(self, filetype):
+        load = self.loads.pop(filetype, None)
+        if load is not None:
+            load.cancel()
+
+    # A load which has been cancelled or replaced may still finish before it notices; its model should
+    # then be thrown away.
+    def isCurrent(self, load):
+        return self.loads.get(load.filetype()) is load and not load.isCancelled()
+
+    # @param filetype: a file type, or None for any
+    def isLoading(self, filetype=None):
+        if filetype is None:
+            return bool(self.loads)
+        return filetype in self.loads
+
+    # Forgets a load once its result has been dealt with.
+    def finish(self, load):
+        if self.loads.get(load.filetype()) is load:
+            del self.loads[load.filetype()]
+
+    def shutdown(self):
+        for filetype in list(self.loads):
+            self.cancel(filetype)
+        self.executor.shutdown(wait=False)
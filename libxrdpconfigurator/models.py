@@ -0,0 +1,292 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# Models for the xrdp.ini and sesman.ini files.
+# Nothing in here touches Qt, so these can be used to load, edit and write INI files
+# from scripts and command line tools as well as from the XRDPConfigurator GUI.
+
+from libxrdpconfigurator.inifile import IniDocument, IniParseError
+from libxrdpconfigurator.sessions import XrdpIniDocument, sessionSectionName
+from libxrdpconfigurator.atomicwrite import atomicWrite
+
+# Values which xrdp treats as "on" or "off"...
+TRUE_VALUES = ["1", "yes", "true"]
+FALSE_VALUES = ["0", "no", "false"]
+
+# The session back-end libraries ("lib=" in an [xrdpN] section) XRDPConfigurator knows about
+SESSION_LIBRARIES = ["libxup.so", "libvnc.so", "librdp.so", "libxrdpfreerdp1.so", "libxrdpneutrinordp.so"]
+
+def isTrue(value):
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def isFalse(value):
+    return str(value).strip().lower() in FALSE_VALUES
+
+
+# Common base for both INI file types.
+# Offers the ConfigParser methods the rest of XRDPConfigurator already uses, so a model can be dropped
+# in wherever a ConfigParser was used before.
+# The file itself is held in a lossless IniDocument, so comments, ordering and untouched lines survive
+# a load/save round trip.
+class IniModel(object):
+    FILETYPE = ""
+
+    def __init__(self):
+        self.filename = ""
+        self.config = self.newParser()
+
+    @staticmethod
+    def newParser():
+        return IniDocument()
+
+    @classmethod
+    def load(cls, fname):
+        model = cls()
+        model.read(fname)
+        return model
+
+    @classmethod
+    def fromString(cls, text, fname=""):
+        model = cls()
+        model.readString(text)
+        model.filename = fname
+        return model
+
+    def read(self, fname):
+        with open(fname, 'r') as infile:
+            self.readString(infile.read())
+        self.filename = fname
+
+    # @param progress: see IniDocument.read_string
+    def readString(self, text, progress=None):
+        self.config = self.newParser()
+        self.config.read_string(text, progress)
+
+    # Reads and parses fname, returning None rather than raising if it can't be read or parsed.
+    @classmethod
+    def loadOrNone(cls, fname):
+        try:
+            return cls.load(fname)
+        except (OSError, UnicodeDecodeError, IniParseError):
+            return None
+
+    def toString(self):
+        return self.config.serialize()
+
+    # The file is replaced atomically, see atomicwrite.
+    # @param backups: number of backup generations of the old file to keep
+    def save(self, fname=None, backups=0):
+        if fname is None:
+            fname = self.filename
+        atomicWrite(fname, self.toString(), backups)
+        self.filename = fname
+        self.markClean()
+
+    # Dirty tracking, see IniDocument...
+    def isDirty(self):
+        return self.config.isDirty()
+
+    def dirtySections(self):
+        return self.config.dirtySections()
+
+    def dirtyKeys(self, section):
+        return self.config.dirtyKeys(section)
+
+    def changedLines(self):
+        return self.config.changedLines()
+
+    def markClean(self):
+        self.config.markClean()
+
+    # ConfigParser compatible interface...
+    def sections(self):
+        return self.config.sections()
+
+    def has_section(self, section):
+        return self.config.has_section(section)
+
+    def add_section(self, section):
+        self.config.add_section(section)
+
+    def remove_section(self, section):
+        return self.config.remove_section(section)
+
+    def has_option(self, section, option):
+        return self.config.has_option(section, option)
+
+    def get(self, section, option, **kwargs):
+        return self.config.get(section, option, **kwargs)
+
+    def set(self, section, option, value):
+        self.config.set(section, option, value)
+
+    def remove_option(self, section, option):
+        return self.config.remove_option(section, option)
+
+    def items(self, section):
+        return self.config.items(section)
+
+    def write(self, fileobject, space_around_delimiters=False):
+        fileobject.write(self.toString())
+
+    # Typed accessors...
+    def getBool(self, section, option, default=False):
+        if not self.config.has_option(section, option):
+            return default
+        return isTrue(self.config.get(section, option))
+
+    def getInt(self, section, option, default=0):
+        if not self.config.has_option(section, option):
+            return default
+        try:
+            return int(self.config.get(section, option))
+        except ValueError:
+            return default
+
+    def setBool(self, section, option, value, true_value="yes", false_value="no"):
+        if value:
+            self.config.set(section, option, true_value)
+        else:
+            self.config.set(section, option, false_value)
+
+
+class XrdpIniModel(IniModel):
+    FILETYPE = "xrdp.ini"
+
+    DEFAULT_LOGGING = [['logfile', 'xrdp.log'],
+                       ['loglevel', 'DEBUG'],
+                       ['enablesyslog', '1'],
+                       ['sysloglevel', 'DEBUG']]
+
+    DEFAULT_CHANNELS = [['rdpdr', 'true'],
+                        ['rdpsnd', 'true'],
+                        ['drdynvc', 'true'],
+                        ['cliprdr', 'true'],
+                        ['rail', 'true'],
+                        ['xrdpvr', 'true']]
+
+    # The [xrdpN] sections are kept in order by position, see sessions.
+    @staticmethod
+    def newParser():
+        return XrdpIniDocument()
+
+    # An xrdp.ini file needs at least these...
+    def isXrdpIni(self):
+        return self.config.has_section("globals") and self.config.has_section("xrdp1")
+
+    # ini_version=1 marks the newer xrdp.ini format with the ls_* login screen options.
+    def isNewVersion(self):
+        return self.config.get("globals", "ini_version", fallback="") == "1"
+
+    def addDefaultLoggingSection(self):
+        self.config.add_section("Logging")
+        for name, value in self.DEFAULT_LOGGING:
+            self.config.set("Logging", name, value)
+
+    def addDefaultChannelsSection(self):
+        self.config.add_section("channels")
+        for name, value in self.DEFAULT_CHANNELS:
+            self.config.set("channels", name, value)
+
+    # Sessions...
+    def sessionSections(self):
+        return self.config.sessionNames()
+
+    def sessionCount(self):
+        return len(self.config.sessions)
+
+    def sessionNames(self):
+        return [self.config.get(section, "name", fallback=section) for section in self.sessionSections()]
+
+    # Appends a new [xrdpN] section.
+    # @param values: list of [option, value] pairs, in the order they should be written
+    # @return: the new section's name
+    def addSession(self, name, values):
+        section = sessionSectionName(self.sessionCount())
+        self.config.add_section(section)
+        self.config.set(section, "name", name)
+        for option, value in values:
+            self.config.set(section, option, value)
+        return section
+
+    # Moves a session to another position; the sessions in between move up or down one place.
+    # @param idx_from, idx_to: zero based session indexes
+    def moveSession(self, idx_from, idx_to):
+        self.config.moveSession(idx_from, idx_to)
+
+    # Removes a session; the sessions after it move up one place.
+    def removeSession(self, index):
+        self.config.deleteSession(index)
+
+    # Sets a session's lib= along with the options which go with it: X11rdp (libxup.so) sessions need
+    # code=10, and librdp.so sessions have no username or password, as the RDP server asks for those itself.
+    def setSessionLibrary(self, section, library):
+        self.config.set(section, "lib", library)
+        if library == "libxup.so":
+            if not self.config.has_option(section, "code"):
+                self.config.set(section, "code", "10")
+        else:
+            self.config.remove_option(section, "code")
+        for option in ["username", "password"]:
+            if library == "librdp.so":
+                self.config.remove_option(section, option)
+            elif not self.config.has_option(section, option):
+                self.config.set(section, option, "ask")
+
+    # Bulk edits - one change made to many sessions at once...
+
+    # @param value: the new value, or None to remove the option
+    def setSessionsOption(self, sections, option, value):
+        for section in sections:
+            if value is None:
+                self.config.remove_option(section, option)
+            else:
+                self.config.set(section, option, value)
+
+    def setSessionsLibrary(self, sections, library):
+        for section in sections:
+            self.setSessionLibrary(section, library)
+
+
+class SesmanIniModel(IniModel):
+    FILETYPE = "sesman.ini"
+
+    # sesman.ini option names are CamelCase, so keep them as they are.
+    @staticmethod
+    def newParser():
+        return IniDocument(optionxform=str)
+
+    def isSesmanIni(self):
+        return (self.config.has_section("Globals") and self.config.has_section("Security") and
+                self.config.has_section("Sessions"))
+
+    # The [X11rdp] and [Xvnc] sections hold the X server command line as param1=, param2=, ...
+    def xserverParams(self, section):
+        if not self.config.has_section(section):
+            return []
+        return [value for name, value in self.config.items(section) if "param" in name]
+
+    def setXserverParams(self, section, params):
+        if not self.config.has_section(section):
+            self.config.add_section(section)
+        for option in self.config.options(section):
+            self.config.remove_option(section, option)
+        param_num = 1
+        for value in params:
+            if value != '':
+                self.config.set(section, "param" + str(param_num), value)
+            param_num += 1
@@ -0,0 +1,67 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# Session presets - the options a new session of each connection type starts off with.
+#
+# SESSION_PRESETS is in the same order as the New Session window's connection type list.
+
+class SessionPreset(object):
+    __slots__ = ("key", "title", "values")
+
+    # @param values: list of [option, value] pairs, in the order they should be written after name=
+    def __init__(self, key, title, values):
+        self.key = key
+        self.title = title
+        self.values = values
+
+
+SESSION_PRESETS = [
+    SessionPreset("X11rdp", "X11rdp (libxup.so)",
+                  [["lib", "libxup.so"], ["ip", "127.0.0.1"], ["port", "-1"],
+                   ["username", "ask"], ["password", "ask"]]),
+    SessionPreset("sesman-Xvnc", "sesman-Xvnc (libvnc.so)",
+                  [["lib", "libvnc.so"], ["ip", "127.0.0.1"], ["port", "-1"],
+                   ["username", "ask"], ["password", "ask"]]),
+    SessionPreset("console", "console (VNC) (libvnc.so)",
+                  [["lib", "libvnc.so"], ["ip", "127.0.0.1"], ["port", "5900"],
+                   ["username", "na"], ["password", "ask"]]),
+    SessionPreset("vnc-any", "vnc-any (VNC) (libvnc.so)",
+                  [["lib", "libvnc.so"], ["ip", "ask"], ["port", "ask5900"],
+                   ["username", "na"], ["password", "ask"]]),
+    SessionPreset("sesman-any", "sesman-any (VNC) (libvnc.so)",
+                  [["lib", "libvnc.so"], ["ip", "ask"], ["port", "-1"],
+                   ["username", "ask"], ["password", "ask"]]),
+    # An RDP server asks for the user name and password itself.
+    SessionPreset("rdp-any", "rdp-any (librdp.so)",
+                  [["lib", "librdp.so"], ["ip", "ask"], ["port", "ask3389"]]),
+    SessionPreset("freerdp", "freerdp (libxrdpfreerdp1.so)",
+                  [["lib", "libxrdpfreerdp1.so"], ["ip", "ask"], ["port", "ask3389"],
+                   ["username", "ask"], ["password", "ask"]]),
+    SessionPreset("neutrinordp", "Neutrinolabs back-end (libxrdpneutrinordp.so)",
+                  [["lib", "libxrdpneutrinordp.so"], ["ip", "ask"], ["port", "ask3389"],
+                   ["username", "ask"], ["password", "ask"]]),
+]
+
+_presets_by_key = dict((preset.key.lower(), preset) for preset in SESSION_PRESETS)
+
+
+def presetKeys():
+    return [preset.key for preset in SESSION_PRESETS]
+
+
+# @return: the preset called key (in any case), or None
+def findPreset(key):
+    return _presets_by_key.get(key.strip().lower())
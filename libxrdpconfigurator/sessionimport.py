@@ -0,0 +1,116 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# Importing many sessions at once from a table (see tables) with one row per session.
+#
+# Every row needs a "name". A "preset" column starts the session off with that connection type's
+# defaults (see presets), and every other column is one of the session's options, overriding the
+# preset's value. Empty values are left out:
+#
+#   name,preset,ip,port
+#   build farm,vnc-any,10.1.0.5,ask5900
+#   render node,sesman-Xvnc,10.1.0.6,
+#
+# All of the rows are checked before anything is imported, so a table with a mistake in it doesn't leave
+# a file with half of its sessions added.
+
+from libxrdpconfigurator.tables import readTable
+from libxrdpconfigurator.inifile import COMMENT_PREFIXES, DELIMITERS
+from libxrdpconfigurator.presets import findPreset, presetKeys
+from libxrdpconfigurator.validate import FileResult, checkSessionOptions, ERROR, WARNING, XRDP_INI
+
+NAME_COLUMN = "name"
+PRESET_COLUMN = "preset"
+
+
+class SessionImport(object):
+    def __init__(self, fname):
+        self.filename = fname
+        self.sessions = []  # [session name, [[option, value], ...]] ready for XrdpIniModel.addSession
+        self.result = FileResult(fname, XRDP_INI)  # the problems found, by row
+
+    def isValid(self):
+        return self.result.isValid()
+
+
+def rowLabel(number):
+    return "row " + str(number)
+
+
+# @return: why a column can't be written to xrdp.ini as an option name, or None if it can
+def optionNameProblem(option):
+    if option == "":
+        return "the column has no name"
+    if option.startswith(COMMENT_PREFIXES):
+        return "an option name can't start with " + repr(option[0])
+    for character in DELIMITERS + ("[", "]"):
+        if character in option:
+            return "an option name can't have " + repr(character) + " in it"
+    if any(character.isspace() for character in option):
+        return "an option name can't have spaces in it"
+    return None
+
+
+# @return: [[option, value], ...] for the session, starting from its preset's values
+def sessionValues(row, number, result):
+    bad_columns = set()
+    for option in row:
+        problem = optionNameProblem(option)
+        if problem is not None:
+            result.add(ERROR, rowLabel(number), option, problem)
+            bad_columns.add(option)
+    values = []
+    preset_key = row.get(PRESET_COLUMN, "")
+    if preset_key:
+        preset = findPreset(preset_key)
+        if preset is None:
+            result.add(ERROR, rowLabel(number), PRESET_COLUMN,
+                       "unknown preset " + repr(preset_key) + ", expected one of " + ", ".join(presetKeys()))
+        else:
+            values = [list(pair) for pair in preset.values]
+    positions = dict((option, index) for index, (option, value) in enumerate(values))
+    for option, value in row.items():
+        if option in (NAME_COLUMN, PRESET_COLUMN) or option in bad_columns or value == "":
+            continue
+        if "\n" in value:
+            result.add(ERROR, rowLabel(number), option, "a value can't run over more than one line")
+            continue
+        if option in positions:
+            values[positions[option]][1] = value
+        else:
+            positions[option] = len(values)
+            values.append([option, value])
+    return values
+
+
+# Reads and checks the sessions in fname.
+# @param existing_names: names of the sessions already in the file they're going into
+def importSessions(fname, existing_names=()):
+    sessions = SessionImport(fname)
+    names = set(existing_names)
+    for number, row in enumerate(readTable(fname), 1):
+        # xrdp.ini option names are lower case, see XrdpIniModel
+        row = dict((column.strip().lower(), value.strip()) for column, value in row.items())
+        name = row.get(NAME_COLUMN, "")
+        values = sessionValues(row, number, sessions.result)
+        checkSessionOptions(sessions.result, rowLabel(number), [(NAME_COLUMN, name)] + values)
+        if name == "":
+            sessions.result.add(ERROR, rowLabel(number), NAME_COLUMN, "the session has no name")
+        elif name in names:
+            sessions.result.add(WARNING, rowLabel(number), NAME_COLUMN, "there is already a session called " + repr(name))
+        names.add(name)
+        sessions.sessions.append([name, values])
+    return sessions
@@ -0,0 +1,280 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# The [xrdp1] ... [xrdpN] session sections of an xrdp.ini file.
+#
+# A session's section name is nothing more than its position in the list of sessions, so rather than
+# keeping sessions under their names (and having to rebuild every following section whenever a session
+# is moved or deleted), they are held in an ordered list and their names are worked out from their
+# positions when the file is written out.
+# Moving a session is then a list move, deleting one is a list delete, and only the header lines of the
+# sessions which ended up in a different position get rendered again.
+#
+# "xrdpN" always means the Nth session in the list, whatever its section was called in the file.
+
+import re
+from configparser import NoSectionError, DuplicateSectionError
+from libxrdpconfigurator.inifile import IniDocument, IniSection
+
+# Session sections in xrdp.ini are named [xrdp1], [xrdp2] ... [xrdpN]
+SESSION_SECTION = re.compile(r"^xrdp([0-9]+)$")
+
+
+def sessionSectionName(index):
+    # @param index: zero based session index
+    return "xrdp" + str(index + 1)
+
+
+# @return: the zero based session index named by an "xrdpN" section name, or -1 if it isn't one
+def sessionIndex(name):
+    match = SESSION_SECTION.match(name)
+    if match is None:
+        return -1
+    return int(match.group(1)) - 1
+
+
+# The sessions, in file order.
+# A SessionStore sits in an IniDocument's sectionlist where the first session section was, and renders
+# all of the sessions one after another, the same as if they were sections of their own.
+class SessionStore(object):
+    def __init__(self):
+        self.sessions = []  # IniSection objects
+        self.renumber_from = None  # sessions from here on may be named after an old position
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __iter__(self):
+        return iter(self.sessions)
+
+    def __getitem__(self, index):
+        return self.sessions[index]
+
+    def names(self):
+        return [sessionSectionName(index) for index in range(len(self.sessions))]
+
+    def _renumberFrom(self, index):
+        if self.renumber_from is None or index < self.renumber_from:
+            self.renumber_from = index
+
+    # Brings the section names (and so the header lines) into line with the sessions' positions.
+    def renumber(self):
+        if self.renumber_from is None:
+            return
+        for index in range(self.renumber_from, len(self.sessions)):
+            self.sessions[index].rename(sessionSectionName(index))
+        self.renumber_from = None
+
+    # @param section: an IniSection already named after its new position
+    def append(self, section):
+        self.sessions.append(section)
+
+    def move(self, idx_from, idx_to):
+        section = self.sessions.pop(idx_from)
+        self.sessions.insert(idx_to, section)
+        self._renumberFrom(min(idx_from, idx_to))
+        # A session which used to be the last one in the file may not end with a blank line...
+        for index in range(min(idx_from, idx_to), min(max(idx_from, idx_to) + 1, len(self.sessions) - 1)):
+            self.sessions[index].endWithBlankLine()
+
+    # @return: the removed IniSection
+    def delete(self, index):
+        section = self.sessions.pop(index)
+        self._renumberFrom(index)
+        return section
+
+    # The section-like interface IniDocument uses to write sections out...
+
+    def isDirty(self):
+        self.renumber()
+        for section in self.sessions:
+            if section.isDirty():
+                return True
+        return False
+
+    def dirtyNames(self):
+        self.renumber()
+        return [section.name for section in self.sessions if section.isDirty()]
+
+    def markClean(self):
+        self.renumber()
+        for section in self.sessions:
+            if section.isDirty():
+                section.markClean()
+
+    def render(self):
+        self.renumber()
+        lines = []
+        for section in self.sessions:
+            lines.extend(section.render())
+        return lines
+
+    def renderText(self):
+        self.renumber()
+        return "\n".join(section.renderText() for section in self.sessions)
+
+    def changedLineOffsets(self):
+        self.renumber()
+        offsets = []
+        offset = 0
+        for section in self.sessions:
+            if section.isDirty():
+                offsets.extend(offset + line for line in section.changedLineOffsets())
+            offset += len(section.render())
+        return offsets
+
+
+# An IniDocument which keeps the [xrdpN] sections in a SessionStore.
+class XrdpIniDocument(IniDocument):
+    def __init__(self, optionxform=str.lower):
+        super(XrdpIniDocument, self).__init__(optionxform)
+        self.sessions = SessionStore()
+
+    # Session sections are collected into the store as they come, and the store takes the place of the
+    # first one. xrdp itself only goes by file order, so a file whose sessions are numbered out of order
+    # (or are split up by other sections) gets them renumbered in file order when it is next saved.
+    def read_string(self, text, progress=None):
+        super(XrdpIniDocument, self).read_string(text, progress)
+        self.sessions = SessionStore()
+        sectionlist = []
+        for section in self.sectionlist:
+            if sessionIndex(section.name) < 0:
+                sectionlist.append(section)
+                continue
+            del self.sectionindex[section.name]
+            if not self.sessions:
+                sectionlist.append(self.sessions)
+            if section.name != sessionSectionName(len(self.sessions)):
+                self.sessions._renumberFrom(len(self.sessions))
+            self.sessions.sessions.append(section)
+        self.sectionlist = sectionlist
+
+    def _sessionsPlaced(self):
+        return any(block is self.sessions for block in self.sectionlist)
+
+    # Sessions...
+
+    def sessionNames(self):
+        return self.sessions.names()
+
+    def moveSession(self, idx_from, idx_to):
+        if idx_from == idx_to:
+            return
+        old_last = self.sessions[-1]
+        ended_bare = not old_last.entries or old_last.entries[-1] != ""
+        self.sessions.move(idx_from, idx_to)
+        if self.sectionlist[-1] is not self.sessions:
+            self.sessions[-1].endWithBlankLine()
+        elif ended_bare:
+            self._tidyEnd(old_last)
+
+    def deleteSession(self, index):
+        count = len(self.sessions)
+        old_last = self.sessions[-1]
+        ended_bare = not old_last.entries or old_last.entries[-1] != ""
+        section = self.sessions.delete(index)
+        if self.sectionlist[-1] is self.sessions and ended_bare:
+            self._tidyEnd(old_last)
+        # The last name drops out of the file, unless it only ever belonged to a session added since the save.
+        if not (section.is_new and index == count - 1):
+            self.removed_sections.add(sessionSectionName(count - 1))
+
+    # When the sessions are at the end of the file and a different session ends up last, the file should
+    # still end without a blank line, the way it did before.
+    def _tidyEnd(self, old_last):
+        if not self.sessions or self.sessions[-1] is old_last:
+            return
+        new_last = self.sessions[-1]
+        if new_last.entries and new_last.entries[-1] == "":
+            new_last.entries.pop()
+            new_last.touch()
+
+    # Dirty tracking...
+
+    def dirtySections(self):
+        names = []
+        for block in self.sectionlist:
+            if block is self.sessions:
+                names.extend(self.sessions.dirtyNames())
+            elif block.isDirty():
+                names.append(block.name)
+        return names + sorted(self.removed_sections - set(names))
+
+    def dirtyKeys(self, section):
+        try:
+            return set(self._section(section).dirty_keys)
+        except NoSectionError:
+            return set()
+
+    # ConfigParser compatible interface...
+
+    def _section(self, section):
+        index = sessionIndex(section)
+        if index < 0:
+            return super(XrdpIniDocument, self)._section(section)
+        if index >= len(self.sessions):
+            raise NoSectionError(section)
+        return self.sessions[index]
+
+    def sections(self):
+        names = []
+        for block in self.sectionlist:
+            if block is self.sessions:
+                names.extend(self.sessions.names())
+            else:
+                names.append(block.name)
+        return names
+
+    def has_section(self, section):
+        index = sessionIndex(section)
+        if index < 0:
+            return section in self.sectionindex
+        return index < len(self.sessions)
+
+    def _lastSection(self):
+        for block in reversed(self.sectionlist):
+            if block is not self.sessions:
+                return block
+            if self.sessions:
+                return self.sessions[-1]
+        return None
+
+    # A new session section always goes on the end of the sessions, whatever number it was asked for.
+    def add_section(self, section):
+        index = sessionIndex(section)
+        if index < 0:
+            return super(XrdpIniDocument, self).add_section(section)
+        if index < len(self.sessions):
+            raise DuplicateSectionError(section)
+        new_section = IniSection(sessionSectionName(len(self.sessions)))
+        if self.sessions:
+            self.sessions[-1].endWithBlankLine()
+        elif not self._sessionsPlaced():
+            previous = self._lastSection()
+            if previous is not None:
+                previous.endWithBlankLine()
+            self.sectionlist.append(self.sessions)
+        self.sessions.append(new_section)
+        return new_section
+
+    def remove_section(self, section):
+        index = sessionIndex(section)
+        if index < 0:
+            return super(XrdpIniDocument, self).remove_section(section)
+        if index >= len(self.sessions):
+            return False
+        self.deleteSession(index)
+        return True
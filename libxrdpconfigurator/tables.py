@@ -0,0 +1,49 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# Reading tables of values - a CSV file with a header line, or a JSON list of objects - as used by
+# generate and sessionimport.
+
+import csv
+import json
+
+
+class TableError(ValueError):
+    pass
+
+
+def _jsonValue(value):
+    if value is None:
+        return ""
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    return str(value)
+
+
+# A .json file is read as JSON, anything else as CSV.
+# @return: a list of {column: value} dicts, with every value a string ("" where a row has no value)
+def readTable(fname):
+    with open(fname, 'r', newline="") as infile:
+        if fname.lower().endswith(".json"):
+            rows = json.load(infile)
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                raise TableError(fname + ": expected a JSON list of objects")
+            return [dict((str(name), _jsonValue(value)) for name, value in row.items()) for row in rows]
+        # A short row's missing values come back as None, and a long row's extra ones under None.
+        return [dict((name, value or "") for name, value in row.items() if name is not None)
+                for row in csv.DictReader(infile)]
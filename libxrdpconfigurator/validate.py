@@ -0,0 +1,336 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# Checking xrdp.ini and sesman.ini files, without the GUI.
+#
+# validateFile() reads one file, works out which kind of file it is and returns a FileResult listing its
+# problems. validateFiles() does the same for any number of files across a pool of processes, which is
+# what "python3 -m libxrdpconfigurator validate" uses to check a whole fleet's worth of configs.
+#
+# A problem is either an error (xrdp or sesman won't work properly with the file) or a warning (the file
+# is probably not what was meant, e.g. a library XRDPConfigurator doesn't know about).
+
+import fnmatch
+import glob
+import os
+import re
+from multiprocessing import Pool
+from libxrdpconfigurator.inifile import IniParseError
+from libxrdpconfigurator.models import XrdpIniModel, SesmanIniModel, SESSION_LIBRARIES, TRUE_VALUES, FALSE_VALUES
+
+ERROR = "error"
+WARNING = "warning"
+
+XRDP_INI = XrdpIniModel.FILETYPE
+SESMAN_INI = SesmanIniModel.FILETYPE
+UNKNOWN_INI = "unrecognised"  # any other INI file, e.g. the km-XXXX.ini keymaps next to xrdp.ini
+
+MAX_BPP_VALUES = ["8", "15", "16", "24", "32"]
+SERVER_BPP_VALUES = ["15", "16", "24", "32"]
+CRYPT_LEVELS = ["low", "medium", "high", "fips"]
+
+# [globals] options which are switched on or off
+XRDP_GLOBALS_SWITCHES = ["bitmap_cache", "bitmap_compression", "bulk_compression", "channel_code", "fork",
+                         "hidelogwindow", "new_cursors", "require_credentials", "tcp_keepalive", "tcp_nodelay"]
+
+# Options every session needs
+SESSION_REQUIRED = ["name", "lib"]
+
+SESMAN_REQUIRED_SECTIONS = ["Globals", "Security", "Sessions"]
+
+# sesman.ini options which have to be whole numbers, zero or more
+SESMAN_COUNTS = [["Security", "MaxLoginRetry"],
+                 ["Sessions", "X11DisplayOffset"],
+                 ["Sessions", "MaxSessions"],
+                 ["Sessions", "IdleTimeLimit"],
+                 ["Sessions", "DisconnectedTimeLimit"]]
+
+SESMAN_SWITCHES = [["Globals", "EnableUserWindowManager"],
+                   ["Security", "AllowRootLogin"],
+                   ["Security", "AlwaysGroupCheck"],
+                   ["Sessions", "KillDisconnected"],
+                   ["Logging", "EnableSyslog"]]
+
+# Every xrdp.ini option outside [channels] which is switched on or off, the same ones the GUI has a check
+# box for. xrdp.ini option names are lower case.
+XRDP_SWITCHES = [["globals", option] for option in XRDP_GLOBALS_SWITCHES] + [["Logging", "enablesyslog"]]
+
+# xrdp.ini always has a [globals] section; sesman.ini has [Globals], [Security] and [Sessions] instead.
+XRDP_GLOBALS_HEADER = re.compile(r"^[ \t]*\[globals\]", re.MULTILINE)
+SESMAN_SECTION_HEADER = re.compile(r"^[ \t]*\[(" + "|".join(SESMAN_REQUIRED_SECTIONS) + r")\]", re.MULTILINE)
+
+# A file with one of these names is taken to be that kind of file even when it has none of its sections
+CONFIG_FILE_NAMES = {"xrdp.ini": XRDP_INI, "sesman.ini": SESMAN_INI}
+
+# Files found when a directory is given
+CONFIG_FILE_PATTERN = "*.ini"
+
+GLOB_CHARACTERS = re.compile(r"[*?[]")
+
+
+class Problem(object):
+    __slots__ = ("severity", "section", "option", "message")
+
+    def __init__(self, severity, section, option, message):
+        self.severity = severity
+        self.section = section  # "" when the problem isn't in one section
+        self.option = option  # "" when the problem isn't with one option
+        self.message = message
+
+    def toDict(self):
+        return {"severity": self.severity, "section": self.section, "option": self.option,
+                "message": self.message}
+
+    def toText(self):
+        where = ""
+        if self.section:
+            where = "[" + self.section + "]"
+        if self.option:
+            where = where + " " + self.option
+        if where:
+            where = where.strip() + ": "
+        return self.severity + ": " + where + self.message
+
+
+class FileResult(object):
+    def __init__(self, filename, filetype=""):
+        self.filename = filename
+        self.filetype = filetype  # XRDP_INI, SESMAN_INI, UNKNOWN_INI, or "" if the file couldn't be read
+        self.problems = []
+
+    def add(self, severity, section, option, message):
+        self.problems.append(Problem(severity, section, option, message))
+
+    def errors(self):
+        return [problem for problem in self.problems if problem.severity == ERROR]
+
+    def warnings(self):
+        return [problem for problem in self.problems if problem.severity == WARNING]
+
+    def isValid(self):
+        return not self.errors()
+
+    def toDict(self):
+        return {"file": self.filename, "type": self.filetype, "valid": self.isValid(),
+                "problems": [problem.toDict() for problem in self.problems]}
+
+
+# Option checks...
+
+def _isSwitch(value):
+    return value.strip().lower() in TRUE_VALUES + FALSE_VALUES
+
+
+def _isCount(value):
+    return value.strip().isdigit()
+
+
+def _isPortNumber(value):
+    value = value.strip()
+    return value.isdigit() and 1 <= int(value) <= 65535
+
+
+# A session's port can also be "-1" (let sesman choose), "ask" or "askNNNN" (ask the user, suggesting NNNN),
+# or the path of a unix socket.
+def _isSessionPort(value):
+    value = value.strip()
+    if value.startswith("ask"):
+        return value == "ask" or _isPortNumber(value[3:])
+    return value == "-1" or value.startswith("/") or _isPortNumber(value)
+
+
+def _checkPort(result, section, option, value):
+    if not _isPortNumber(value):
+        result.add(ERROR, section, option, repr(value) + " is not a port number from 1 to 65535")
+
+
+def _checkSwitch(result, section, option, value):
+    if not _isSwitch(value):
+        result.add(WARNING, section, option,
+                   repr(value) + " is not one of " + ", ".join(TRUE_VALUES + FALSE_VALUES))
+
+
+def _checkChoice(result, section, option, value, choices, severity=ERROR):
+    if value.strip().lower() not in choices:
+        result.add(severity, section, option, repr(value) + " is not one of " + ", ".join(choices))
+
+
+# xrdp.ini...
+
+def validateXrdpIni(model, result):
+    if not model.has_section("globals"):
+        result.add(ERROR, "globals", "", "section is missing")
+    else:
+        _checkXrdpGlobals(model, result)
+    if model.sessionCount() == 0:
+        result.add(ERROR, "", "", "there are no [xrdpN] session sections")
+    if model.has_section("channels"):
+        for name, value in model.items("channels"):
+            _checkSwitch(result, "channels", name, value)
+    if model.has_option("Logging", "enablesyslog"):
+        _checkSwitch(result, "Logging", "enablesyslog", model.get("Logging", "enablesyslog"))
+    session_names = {}
+    for section in model.sessionSections():
+        _checkSession(model, section, result)
+        name = model.get(section, "name", fallback="")
+        if name == "":
+            continue
+        if name in session_names:
+            result.add(WARNING, section, "name", "the same name as [" + session_names[name] + "]")
+        else:
+            session_names[name] = section
+
+
+def _checkXrdpGlobals(model, result):
+    for name, value in model.items("globals"):
+        if name == "port":
+            _checkPort(result, "globals", name, value)
+        elif name == "max_bpp":
+            _checkChoice(result, "globals", name, value, MAX_BPP_VALUES)
+        elif name == "crypt_level":
+            _checkChoice(result, "globals", name, value, CRYPT_LEVELS)
+        elif name in XRDP_GLOBALS_SWITCHES:
+            _checkSwitch(result, "globals", name, value)
+
+
+def _checkSession(model, section, result):
+    checkSessionOptions(result, section, model.items(section))
+
+
+# Checks one session's options; sessionimport uses this on sessions before they are added to a file.
+# @param items: list of (option, value) pairs
+def checkSessionOptions(result, section, items):
+    names = set(name for name, value in items)
+    for option in SESSION_REQUIRED:
+        if option not in names:
+            result.add(ERROR, section, option, "required option is missing")
+    for name, value in items:
+        if name == "lib":
+            _checkChoice(result, section, name, value, SESSION_LIBRARIES, WARNING)
+        elif name == "port":
+            if not _isSessionPort(value):
+                result.add(ERROR, section, name, repr(value) + " is not a port number, -1, ask, askNNNN or a socket")
+        elif name == "chansrvport":
+            if not (value.strip().startswith("/") or _isPortNumber(value)):
+                result.add(ERROR, section, name, repr(value) + " is not a port number or a socket")
+        elif name == "xserverbpp":
+            _checkChoice(result, section, name, value, SERVER_BPP_VALUES)
+        elif name.startswith("channel."):
+            _checkSwitch(result, section, name, value)
+
+
+# sesman.ini...
+
+def validateSesmanIni(model, result):
+    for section in SESMAN_REQUIRED_SECTIONS:
+        if not model.has_section(section):
+            result.add(ERROR, section, "", "section is missing")
+    if model.has_option("Globals", "ListenPort"):
+        _checkPort(result, "Globals", "ListenPort", model.get("Globals", "ListenPort"))
+    for section, option in SESMAN_COUNTS:
+        if model.has_option(section, option) and not _isCount(model.get(section, option)):
+            result.add(ERROR, section, option, repr(model.get(section, option)) + " is not a whole number")
+    for section, option in SESMAN_SWITCHES:
+        if model.has_option(section, option):
+            _checkSwitch(result, section, option, model.get(section, option))
+
+
+# Files...
+
+# @param fname: the file's name, which settles it when the text has none of either file's sections
+# @return: XRDP_INI, SESMAN_INI or UNKNOWN_INI
+def fileType(text, fname=None):
+    if XRDP_GLOBALS_HEADER.search(text) is not None:
+        return XRDP_INI
+    if SESMAN_SECTION_HEADER.search(text) is not None:
+        return SESMAN_INI
+    if fname is not None:
+        return CONFIG_FILE_NAMES.get(os.path.basename(fname).lower(), UNKNOWN_INI)
+    return UNKNOWN_INI
+
+
+# @return: the fileType of the file, going by its name alone if it can't be read
+def fileTypeOf(fname):
+    try:
+        with open(fname, 'r') as infile:
+            text = infile.read()
+    except (OSError, UnicodeDecodeError):
+        text = ""
+    return fileType(text, fname)
+
+
+# Reads and checks one file. Never raises for a bad file - not being able to read or parse it is a problem
+# like any other. A file which is neither an xrdp.ini nor a sesman.ini is left unchecked, as UNKNOWN_INI
+# with no problems.
+def validateFile(fname):
+    result = FileResult(fname)
+    try:
+        with open(fname, 'r') as infile:
+            text = infile.read()
+    except (OSError, UnicodeDecodeError) as error:
+        result.add(ERROR, "", "", "cannot read the file: " + str(error))
+        return result
+    result.filetype = fileType(text, fname)
+    if result.filetype == UNKNOWN_INI:
+        return result
+    try:
+        if result.filetype == XRDP_INI:
+            validateXrdpIni(XrdpIniModel.fromString(text, fname), result)
+        else:
+            validateSesmanIni(SesmanIniModel.fromString(text, fname), result)
+    except IniParseError as error:
+        result.add(ERROR, "", "", str(error))
+    return result
+
+
+# Expands files, directories (searched for CONFIG_FILE_PATTERN files) and glob patterns into a sorted
+# list of files, each listed once.
+# @param filetypes: the fileTypes to take from directories and glob patterns, None for every file. Files
+#                   given by name are always taken.
+def findConfigFiles(paths, filetypes=None):
+    found = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, subdirectories, filenames in os.walk(path):
+                for filename in fnmatch.filter(filenames, CONFIG_FILE_PATTERN):
+                    fname = os.path.join(directory, filename)
+                    if filetypes is None or fileTypeOf(fname) in filetypes:
+                        found.add(fname)
+        elif GLOB_CHARACTERS.search(path) is not None:
+            found.update(match for match in glob.glob(path)
+                         if os.path.isfile(match) and (filetypes is None or fileTypeOf(match) in filetypes))
+        else:
+            found.add(path)
+    return sorted(found)
+
+
+# Checks the files across a pool of processes.
+# @param processes: number of worker processes, None for one per CPU
+# @return: a FileResult for each file, in the order the files were given
+def validateFiles(fnames, processes=None):
+    fnames = list(fnames)
+    if processes == 1 or len(fnames) < 2:
+        for fname in fnames:
+            yield validateFile(fname)
+        return
+    pool = Pool(processes)
+    try:
+        # Big chunks keep the per-file overhead down when there are thousands of small files.
+        chunksize = max(1, len(fnames) // ((processes or os.cpu_count() or 1) * 4))
+        for result in pool.imap(validateFile, fnames, chunksize):
+            yield result
+    finally:
+        pool.terminate()
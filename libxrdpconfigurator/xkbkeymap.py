@@ -0,0 +1,250 @@
+# XRDPConfigurator
+# Copyright (c) 2014 Kevin Cave
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# Making keymaps without an X server.
+#
+# libxkbcommon compiles any XKB layout from the system's XKB data (/usr/share/X11/xkb), the same as an X
+# server would, and looks the keys up in it. Its keycodes are the X server's, and the real modifiers are
+# numbered the same way as in an X event's state - Shift, Lock, Control, Mod1 ... Mod5 - so each keymap
+# section's state (see keymap) can be used as the modifier mask as it is.
+#
+# generateKeymapPack() makes the keymap of every locale in keymaplocales, or of the ones asked for, across
+# a pool of processes. Locales which share a layout share its compiled keymap:
+#
+#   written = generateKeymapPack("/srv/keymaps")
+#
+# Given a KeymapCache (see keymapcache), only the layouts it doesn't already have are compiled.
+#
+# Only ctypes is needed - no xkbcommon headers, no X libraries and no display.
+
+import os
+from ctypes import c_char_p, c_int, c_uint32, c_void_p, Structure, POINTER, CDLL
+from multiprocessing import Pool
+from libxrdpconfigurator.atomicwrite import AtomicBatch
+from libxrdpconfigurator.keymapcache import keymapFingerprint, XKBCOMMON_ENGINE
+from libxrdpconfigurator.keymap import KeymapError, KeymapTable, KEYMAP_SECTIONS, FIRST_KEYCODE, LAST_KEYCODE
+from libxrdpconfigurator.keymaplocales import keymapLocales, keymapFileName, localeLayout
+
+XKBCOMMON_LIBRARY = "libxkbcommon.so.0"
+
+DEFAULT_RULES = "evdev"
+DEFAULT_MODEL = "pc105"
+
+XKB_LOG_LEVEL_CRITICAL = 10  # xkbcommon's own error messages are left out; failures are reported instead
+
+
+class XkbRuleNames(Structure):
+    _fields_ = [("rules", c_char_p),
+                ("model", c_char_p),
+                ("layout", c_char_p),
+                ("variant", c_char_p),
+                ("options", c_char_p)]
+
+
+def _encode(text):
+    if not text:
+        return None
+    return text.encode()
+
+
+class XkbKeymapCompiler(object):
+    def __init__(self, rules=DEFAULT_RULES, model=DEFAULT_MODEL, options="", library=XKBCOMMON_LIBRARY):
+        self.rules = rules
+        self.model = model
+        self.options = options
+        try:
+            xkb = CDLL(library)
+        except OSError as error:
+            raise KeymapError("could not load " + library + ": " + str(error))
+        xkb.xkb_context_new.argtypes = [c_int]
+        xkb.xkb_context_new.restype = c_void_p
+        xkb.xkb_context_set_log_level.argtypes = [c_void_p, c_int]
+        xkb.xkb_context_set_log_level.restype = None
+        xkb.xkb_context_unref.argtypes = [c_void_p]
+        xkb.xkb_context_unref.restype = None
+        xkb.xkb_keymap_new_from_names.argtypes = [c_void_p, POINTER(XkbRuleNames), c_int]
+        xkb.xkb_keymap_new_from_names.restype = c_void_p
+        xkb.xkb_keymap_unref.argtypes = [c_void_p]
+        xkb.xkb_keymap_unref.restype = None
+        xkb.xkb_state_new.argtypes = [c_void_p]
+        xkb.xkb_state_new.restype = c_void_p
+        xkb.xkb_state_unref.argtypes = [c_void_p]
+        xkb.xkb_state_unref.restype = None
+        xkb.xkb_state_update_mask.argtypes = [c_void_p] + [c_uint32] * 6
+        xkb.xkb_state_update_mask.restype = c_int
+        xkb.xkb_state_key_get_one_sym.argtypes = [c_void_p, c_uint32]
+        xkb.xkb_state_key_get_one_sym.restype = c_uint32
+        xkb.xkb_state_key_get_utf32.argtypes = [c_void_p, c_uint32]
+        xkb.xkb_state_key_get_utf32.restype = c_uint32
+        self.xkb = xkb
+        self.context = xkb.xkb_context_new(0)
+        if not self.context:
+            raise KeymapError("could not create an xkbcommon context")
+        xkb.xkb_context_set_log_level(self.context, XKB_LOG_LEVEL_CRITICAL)
+        self.tables = {}  # (first keycode, last keycode) -> KeymapTable
+
+    def close(self):
+        if self.context:
+            self.xkb.xkb_context_unref(self.context)
+            self.context = None
+
+    def table(self, first_keycode, last_keycode):
+        key = (first_keycode, last_keycode)
+        if key not in self.tables:
+            self.tables[key] = KeymapTable(first_keycode, last_keycode)
+        return self.tables[key]
+
+    # @return: the km-XXXX.ini text for the layout
+    def generate(self, layout, variant="", first_keycode=FIRST_KEYCODE, last_keycode=LAST_KEYCODE):
+        xkb = self.xkb
+        names = XkbRuleNames(_encode(self.rules), _encode(self.model), _encode(layout), _encode(variant),
+                             _encode(self.options))
+        keymap = xkb.xkb_keymap_new_from_names(self.context, names, 0)
+        if not keymap:
+            name = layout + ("(" + variant + ")" if variant else "")
+            raise KeymapError("could not compile XKB layout " + name)
+        state = xkb.xkb_state_new(keymap)
+        try:
+            table = self.table(first_keycode, last_keycode)
+            entries = table.entries
+            count = 0
+            for section, modifiers in KEYMAP_SECTIONS:
+                xkb.xkb_state_update_mask(state, modifiers, 0, 0, 0, 0, 0)
+                for keycode in range(first_keycode, last_keycode + 1):
+                    entry = entries[count]
+                    entry.keycode = keycode
+                    entry.state = modifiers
+                    entry.keysym = xkb.xkb_state_key_get_one_sym(state, keycode)
+                    entry.unicode = xkb.xkb_state_key_get_utf32(state, keycode)
+                    count += 1
+            table.count = count
+            return table.format()
+        finally:
+            xkb.xkb_state_unref(state)
+            xkb.xkb_keymap_unref(keymap)
+
+
+# Each worker process compiles with its own compiler, made once when it starts.
+_worker_compiler = None
+_worker_keycodes = (FIRST_KEYCODE, LAST_KEYCODE)
+_worker_error = None  # why the compiler couldn't be made, if it couldn't
+
+
+def _startWorker(rules, model, options, keycodes, library=XKBCOMMON_LIBRARY):
+    global _worker_compiler, _worker_keycodes, _worker_error
+    _worker_keycodes = keycodes
+    # An error raised here would only get the worker replaced, over and over, so it's kept for
+    # _generateLayout to hand back instead...
+    try:
+        _worker_compiler = XkbKeymapCompiler(rules, model, options, library)
+        _worker_error = None
+    except KeymapError as error:
+        _worker_compiler = None
+        _worker_error = str(error)
+
+
+# @return: ((layout, variant), keymap text, None) or ((layout, variant), None, the reason it failed)
+def _generateLayout(layout):
+    if _worker_compiler is None:
+        return layout, None, _worker_error
+    try:
+        return layout, _worker_compiler.generate(layout[0], layout[1], *_worker_keycodes), None
+    except KeymapError as error:
+        return layout, None, str(error)
+
+
+class KeymapPack(object):
+    def __init__(self):
+        self.written = []  # [locale ID, file written, layout], in locale order
+        self.failed = {}  # locale ID -> the reason its keymap couldn't be made
+        self.cached = 0  # layouts which came from the cache rather than being compiled
+
+    def isComplete(self):
+        return not self.failed
+
+
+# Makes the keymap of each locale, and writes each one to directory as km-XXXX.ini.
+# @param codes: locale IDs to make keymaps for, None for every one in KEYMAP_LIST
+# @param processes: number of worker processes, None for one per CPU
+# @param cache: a KeymapCache to take the layouts' keymaps from and keep them in, or None
+def generateKeymapPack(directory, codes=None, processes=None, rules=DEFAULT_RULES, model=DEFAULT_MODEL,
+                       options="", first_keycode=FIRST_KEYCODE, last_keycode=LAST_KEYCODE, backups=0, cache=None,
+                       library=XKBCOMMON_LIBRARY):
+    locales = keymapLocales()
+    if codes is not None:
+        wanted = set(code.upper() for code in codes)
+        unknown = wanted - set(code for code, tag, description in locales)
+        if unknown:
+            raise KeymapError("unknown locale " + ", ".join(sorted(unknown)))
+        locales = [locale for locale in locales if locale[0] in wanted]
+    layouts = {}  # (layout, variant) -> [locale IDs]
+    for code, tag, description in locales:
+        layouts.setdefault(tuple(localeLayout(code, tag)), []).append(code)
+
+    texts = {}
+    pack = KeymapPack()
+    fingerprints = {}  # (layout, variant) -> its keymapFingerprint
+    wanted = list(layouts)
+    if cache is not None:
+        wanted = []
+        for layout in layouts:
+            fingerprint = keymapFingerprint(XKBCOMMON_ENGINE, rules, model, layout[0], layout[1], options,
+                                            first_keycode, last_keycode)
+            fingerprints[layout] = fingerprint
+            text = cache.get(fingerprint)
+            if text is None:
+                wanted.append(layout)
+            else:
+                texts[layout] = text
+                pack.cached += 1
+
+    keycodes = (first_keycode, last_keycode)
+    if wanted:
+        # Make sure libxkbcommon can be loaded before anything is started, so it's reported as a KeymapError
+        XkbKeymapCompiler(rules, model, options, library).close()
+    if processes == 1 or len(wanted) < 2:
+        if wanted:
+            _startWorker(rules, model, options, keycodes, library)
+        results = map(_generateLayout, wanted)
+        pool = None
+    else:
+        # No more workers than there are layouts left to compile...
+        processes = min(processes or os.cpu_count() or 1, len(wanted))
+        pool = Pool(processes, _startWorker, (rules, model, options, keycodes, library))
+        results = pool.imap_unordered(_generateLayout, wanted)
+    try:
+        for layout, text, error in results:
+            if error is None:
+                texts[layout] = text
+                if cache is not None:
+                    cache.put(fingerprints[layout], text)
+            else:
+                for code in layouts[layout]:
+                    pack.failed[code] = error
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    os.makedirs(directory, exist_ok=True)
+    with AtomicBatch(backups) as batch:
+        for code, tag, description in locales:
+            layout = tuple(localeLayout(code, tag))
+            if layout not in texts:
+                continue
+            fname = os.path.join(directory, keymapFileName(code))
+            batch.write(fname, texts[layout])
+            pack.written.append([code, fname, layout[0] + ("(" + layout[1] + ")" if layout[1] else "")])
+    return pack
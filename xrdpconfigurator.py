@@ -18,11 +18,16 @@ import os
 import sys
 import socket
 import locale
-from time import strftime
-from ctypes import c_char_p, c_int, Structure, cast, c_void_p, CDLL, POINTER
+import html
 from PySide import *
-from configparser import ConfigParser
 from io import StringIO
+from libxrdpconfigurator import XrdpIniModel, SesmanIniModel, ConnectionRegistry, ModelLoader, SESSION_LIBRARIES, \
+    SESSION_PRESETS, atomicWrite, sessionSectionName, ChangeBus, DirectoryPermissionError
+from libxrdpconfigurator.channels import ChannelOverrides, ChannelResolver, channelBit
+from libxrdpconfigurator.sessionimport import importSessions
+from libxrdpconfigurator.keymap import KeymapBackend, KeymapError
+from libxrdpconfigurator.keymapcache import KeymapCache
+from libxrdpconfigurator.keymaplocales import KEYMAP_LIST
 from user_interface.XRDPConfiguratorMainWindow import Ui_XRDPConfigurator
 from user_interface.LoginWindowSimulator import Ui_LoginWindowSimulator
 from user_interface.SessionFrame import Ui_sessionConfigForm
@@ -37,6 +42,7 @@ from user_interface.dialogSize import Ui_dialogSize
 from user_interface.logoPosition import Ui_logoPosition
 from user_interface.labelsAndBoxes import Ui_labelsAndBoxes
 from user_interface.DialogButtons import Ui_DialogButtonsCustomizationForm
+from user_interface.BulkEdit import Ui_BulkEdit
 
 
 class BoxShades(QtGui.QGraphicsItemGroup):
@@ -160,6 +166,79 @@ class sessionConfigForm(QtGui.QWidget, Ui_sessionConfigForm):
         self.setupUi(self)
 
 
+# Handles on the child widgets of a sessionConfigForm which the session handlers use.
+# Each widget is looked up once when the form is created, rather than with a findChild() tree walk
+# every time a handler runs.
+class SessionWidgets(object):
+    __slots__ = ['sessionSectionName', 'sessionNameBox', 'libraryComboBox', 'serverbppcombobox', 'sessionIPAddress',
+                 'sessionport_label', 'sessionPortEntryBox', 'chansrvport_label', 'chansrvPortEntryBox',
+                 'username_label', 'sessionUserNameEntryBox', 'password_label', 'sessionPasswordEntryBox',
+                 'debugXRDPCheckbox', 'enableOverridesCheckBox', 'channelsFrame', 'channelCheckBoxes', 'editables']
+
+    # @param form: a sessionConfigForm
+    # @param channel_checkbox_names: the names of the channel override checkboxes
+    def __init__(self, form, channel_checkbox_names):
+        self.sessionSectionName = form.findChild(QtGui.QLabel, "sessionSectionName")
+        self.sessionNameBox = form.findChild(QtGui.QLineEdit, "sessionNameBox")
+        self.libraryComboBox = form.findChild(QtGui.QComboBox, "libraryComboBox")
+        self.serverbppcombobox = form.findChild(QtGui.QComboBox, "serverbppcombobox")
+        self.sessionIPAddress = form.findChild(QtGui.QLineEdit, "sessionIPAddress")
+        self.sessionport_label = form.findChild(QtGui.QLabel, "sessionport_label")
+        self.sessionPortEntryBox = form.findChild(QtGui.QLineEdit, "sessionPortEntryBox")
+        self.chansrvport_label = form.findChild(QtGui.QLabel, "chansrvport_label")
+        self.chansrvPortEntryBox = form.findChild(QtGui.QLineEdit, "chansrvPortEntryBox")
+        self.username_label = form.findChild(QtGui.QLabel, "label_4")
+        self.sessionUserNameEntryBox = form.findChild(QtGui.QLineEdit, "sessionUserNameEntryBox")
+        self.password_label = form.findChild(QtGui.QLabel, "label_8")
+        self.sessionPasswordEntryBox = form.findChild(QtGui.QLineEdit, "sessionPasswordEntryBox")
+        self.debugXRDPCheckbox = form.findChild(QtGui.QCheckBox, "debugXRDPCheckbox")
+        self.enableOverridesCheckBox = form.findChild(QtGui.QCheckBox, "enableOverridesCheckBox")
+        self.channelsFrame = form.findChild(QtGui.QFrame, "channelsFrame")
+        # checkbox name -> channel override QCheckBox
+        self.channelCheckBoxes = dict((name, form.findChild(QtGui.QCheckBox, name)) for name in channel_checkbox_names)
+        # Everything the user can change, i.e. everything whose signals get blocked while the form is filled in
+        self.editables = [self.sessionNameBox, self.libraryComboBox, self.serverbppcombobox, self.sessionIPAddress,
+                          self.sessionPortEntryBox, self.sessionUserNameEntryBox, self.sessionPasswordEntryBox,
+                          self.enableOverridesCheckBox, self.debugXRDPCheckbox]
+        self.editables.extend(self.channelCheckBoxes[name] for name in channel_checkbox_names)
+
+
+# Holds back repaints and signals from a set of widgets while a lot of changes are made to them at once,
+# such as while a file is loaded, then repaints them once at the end.
+# Widgets which already had their signals blocked (or updates disabled) are left that way, so these
+# can be nested, and code run inside one should restore blockSignals() to its previous value rather
+# than to False.
+#
+#   with BulkUpdate(self, self.sessionsTab):
+#       ...
+class BulkUpdate(object):
+    def __init__(self, *widgets):
+        self.widgets = widgets
+        self.states = []  # [updates enabled, signals blocked] for each widget
+
+    def __enter__(self):
+        self.states = []
+        for widget in self.widgets:
+            self.states.append([widget.updatesEnabled(), widget.blockSignals(True)])
+            widget.setUpdatesEnabled(False)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for widget, (updates_enabled, signals_blocked) in zip(self.widgets, self.states):
+            widget.blockSignals(signals_blocked)
+            widget.setUpdatesEnabled(updates_enabled)
+        for widget in self.widgets:
+            widget.update()
+        return False
+
+
+# Carries a background load's progress and result over to the GUI thread, see libxrdpconfigurator.loader.
+# This lives on the GUI thread, so emitting its signals from the worker thread queues the slots up there.
+class LoadSignals(QtCore.QObject):
+    progress = QtCore.Signal(str, int)  # file type, percent
+    finished = QtCore.Signal(object)  # the ModelLoad
+
+
 class PreviewWindow(QtGui.QDialog, Ui_PreviewWindow):
     def __init__(self, parent=None, f=QtCore.Qt.WindowFlags()):
         QtGui.QDialog.__init__(self, parent, f)
@@ -171,6 +250,38 @@ class NewSession(QtGui.QDialog, Ui_NewSession):
     def __init__(self, parent=None, f=QtCore.Qt.WindowFlags()):
         QtGui.QDialog.__init__(self, parent, f)
         self.setupUi(self)
+        # The connection types are the session presets, in the same order...
+        self.connectionTypeComboBox.clear()
+        self.connectionTypeComboBox.addItems([preset.title for preset in SESSION_PRESETS])
+
+
+# Bulk edit window - picks sessions, and the changes to make to all of them...
+class BulkEditWindow(QtGui.QDialog, Ui_BulkEdit):
+    def __init__(self, session_names, current_index, libraries, bpp_list, parent=None, f=QtCore.Qt.WindowFlags()):
+        QtGui.QDialog.__init__(self, parent, f)
+        self.setupUi(self)
+        self.libraries = libraries
+        self.bpp_list = bpp_list  # the first entry means "not set"
+        self.sessionList.addItems(session_names)
+        if 0 <= current_index < len(session_names):
+            self.sessionList.item(current_index).setSelected(True)
+        self.libraryComboBox.addItems(libraries)
+        self.serverbppcombobox.addItems(["(not set)"] + bpp_list[1:])
+
+    # @return: the selected sessions' indexes, in order
+    def selectedSessions(self):
+        return sorted(self.sessionList.row(item) for item in self.sessionList.selectedItems())
+
+    # @return: {option: new value}, with None for an option which is to be removed
+    def changes(self):
+        changes = {}
+        if self.changeIPCheckBox.isChecked():
+            changes["ip"] = self.sessionIPAddress.text()
+        if self.changeLibraryCheckBox.isChecked():
+            changes["lib"] = self.libraries[self.libraryComboBox.currentIndex()]
+        if self.changeBppCheckBox.isChecked():
+            changes["xserverbpp"] = self.bpp_list[self.serverbppcombobox.currentIndex()] or None
+        return changes
 
 
 # The About window...
@@ -362,10 +473,10 @@ def getColour(value):
     return colour
 
 
-def verifyXrdpIni(fname):
-    in_file = ConfigParser()
-    in_file.read(fname)
-    if (in_file.has_section("globals")) and (in_file.has_section("xrdp1")):  # and (file.has_section("channels")):
+# Both verify functions take an already loaded model (or None if it couldn't be loaded),
+# so that each file is only read and parsed once when it's opened.
+def verifyXrdpIni(in_file):
+    if in_file is not None and in_file.isXrdpIni():
         return True
     else:
         message_window = InfoWindow(
@@ -374,10 +485,8 @@ def verifyXrdpIni(fname):
         return False
 
 
-def verifySesmanIni(fname):
-    in_file = ConfigParser()
-    in_file.read(fname)
-    if (in_file.has_section("Globals")) and (in_file.has_section("Security")) and (in_file.has_section("Sessions")):
+def verifySesmanIni(in_file):
+    if in_file is not None and in_file.isSesmanIni():
         return True
     else:
         message_window = InfoWindow(
@@ -397,6 +506,8 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
         self.actionLogin_Window.triggered.connect(self.showLoginWindowSim)
         self.actionOpenSesman_ini.triggered.connect(self.fileOpenSesmanIni)
         self.actionOpenXrdp_ini.triggered.connect(self.fileOpenXrdpIni)
+        self.actionImport_sessions.triggered.connect(self.importSessions)
+        self.actionEdit_sessions.triggered.connect(self.editSessions)
         self.actionQuit.triggered.connect(self.fileQuit)
         self.actionSave.triggered.connect(self.fileSave)
         self.actionSave_as.triggered.connect(self.fileSaveAs)
@@ -467,11 +578,26 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
         self.keymapname = ""  # Name of the keymap.
         self.keymappreview = []
         self.keymappreview = StringIO()
-        self.sessions_channel_override_active_list = []
-        self.overridearray = []
+        self.channel_overrides = ChannelOverrides()  # every session's channel overrides, see channels
         self.xrdpfilename = ""
-        self.xrdp_ini_file = ConfigParser()
-        self.xrdp_debug_checkbox = None
+        self.xrdp_ini_file = XrdpIniModel()
+        # The channels each session actually gets, from [channels] and the channel overrides...
+        self.channel_resolver = ChannelResolver(self.xrdp_ini_file, self.channel_overrides)
+        # Signals which may get connected more than once are connected through here, see connections...
+        self.connections = ConnectionRegistry()
+        self.session_editor = None  # the one sessionConfigForm shared by all of the session tabs
+        self.session_editor_index = -1  # the session it is showing
+        self.session_widgets = None  # SessionWidgets of the session editor
+        # Files are read and parsed on a worker thread, so a big file doesn't freeze the window...
+        self.model_loader = ModelLoader()
+        self.load_signals = LoadSignals()
+        self.load_signals.progress.connect(self.loadProgress)
+        self.load_signals.finished.connect(self.modelLoaded)
+        # Edits are passed on to the title bar (and anything else subscribed) once per turn of the event
+        # loop, however many of them there were, see changebus...
+        self.change_bus = ChangeBus(lambda flush: QtCore.QTimer.singleShot(0, flush))
+        self.change_bus.subscribe(self.filesChanged)
+        self.keymap_backend = KeymapBackend(cache=KeymapCache())  # see generatekeymap
         self.editingSesman = False
         self.editingXrdpIni = False
         self.sesman_ini_filename = ""
@@ -493,7 +619,8 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
         self.helpbtn_xpos = 0
         self.helpbtn_ypos = 0
         self.tab_bar = self.sessionsTab.findChild(QtGui.QTabBar, "qt_tabwidget_tabbar")
-        self.tab_bar.tabMoved[int, int].connect(self.reordersessiontabs)
+        self.connections.connect(self.tab_bar, "tabMoved", self.reordersessiontabs)
+        self.connections.connect(self.sessionsTab, "currentChanged", self.showSessionEditor)
         self.boxlength = 0
         self.dialog_width = 0
         self.dialog_height = 0
@@ -541,135 +668,23 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
                             ['rail', 'channel.rail', 'useRAILCheckBox'],
                             ['xrdpvr', 'channel.xrdpvr', 'useXrdpVrCheckBox']]
 
+    # The session libraries, in libraryComboBox order...
+    SESSION_LIBRARIES = SESSION_LIBRARIES
+
+    # xserverbpp values, in serverbppcombobox order. The first entry means "not set".
+    SERVER_BPP_LIST = ["", "15", "16", "24", "32"]
+
+    # [xrdp1] is pointed at these when debugging xrdp...
+    XRDP_DEBUG_PORT = "/tmp/.xrdp/xrdp_display_10"
+    XRDP_DEBUG_CHANSRVPORT = "/tmp/.xrdp/xrdp_chansrv_socket_7210"
+
     # Used for parsing channels...
     CHANNEL_LIST = ["useRdpDrCheckBox", "useRdpSndCheckBox", "useDrDynVcCheckBox", "useClipRdrCheckBox",
                     "useRAILCheckBox", "useXrdpVrCheckBox"]
 
     # initialise keymaps...
     keymap = [[]]
-    KEYMAP_LIST = """0436 af Afrikaans
-041C sq Albanian
-0001 ar Arabic
-0401 ar-sa Arabic (Saudi Arabia)
-0801 ar-iq Arabic (Iraq)
-0C01 ar-eg Arabic (Egypt)
-1001 ar-ly Arabic (Libya)
-1401 ar-dz Arabic (Algeria)
-1801 ar-ma Arabic (Morocco)
-1C01 ar-tn Arabic (Tunisia)
-2001 ar-om Arabic (Oman)
-2401 ar-ye Arabic (Yemen)
-2801 ar-sy Arabic (Syria)
-2C01 ar-jo Arabic (Jordan)
-3001 ar-lb Arabic (Lebanon)
-3401 ar-kw Arabic (Kuwait)
-3801 ar-ae Arabic (U.A.E.)
-3C01 ar-bh Arabic (Bahrain)
-4001 ar-qa Arabic (Qatar)
-042D eu Basque
-0402 bg Bulgarian
-0423 be Belarusian
-0403 ca Catalan
-0004 zh Chinese
-0404 zh-tw Chinese (Taiwan)
-0804 zh-cn Chinese (China)
-0C04 zh-hk Chinese (Hong Kong SAR)
-1004 zh-sg Chinese (Singapore)
-041A hr Croatian
-0405 cs Czech
-0406 da Danish
-0413 nl Dutch (Netherlands)
-0813 nl-be Dutch (Belgium)
-0009 en English
-0409 en-us English (United States)
-0809 en-gb English (United Kingdom)
-0C09 en-au English (Australia)
-1009 en-ca English (Canada)
-1409 en-nz English (New Zealand)
-1809 en-ie English (Ireland)
-1C09 en-za English (South Africa)
-2009 en-jm English (Jamaica)
-2809 en-bz English (Belize)
-2C09 en-tt English (Trinidad)
-0425 et Estonian
-0438 fo Faeroese
-0429 fa Farsi
-040B fi Finnish
-040C fr French (France)
-080C fr-be French (Belgium)
-0C0C fr-ca French (Canada)
-100C fr-ch French (Switzerland)
-140C fr-lu French (Luxembourg)
-043C gd Gaelic
-0407 de German (Germany)
-0807 de-ch German (Switzerland)
-0C07 de-at German (Austria)
-1007 de-lu German (Luxembourg)
-1407 de-li German (Liechtenstein)
-0408 el Greek
-040D he Hebrew
-0439 hi Hindi
-040E hu Hungarian
-040F is Icelandic
-0421 in Indonesian
-0410 it Italian (Italy)
-0810 it-ch Italian (Switzerland)
-0411 ja Japanese
-0412 ko Korean
-0426 lv Latvian
-0427 lt Lithuanian
-042F mk FYRO Macedonian
-043E ms Malay (Malaysia)
-043A mt Maltese
-0414 no Norwegian (Bokmal)
-0814 no Norwegian (Nynorsk)
-0415 pl Polish
-0416 pt-br Portuguese (Brazil)
-0816 pt Portuguese (Portugal)
-0417 rm Rhaeto-Romanic
-0418 ro Romanian
-0818 ro-mo Romanian (Moldova)
-0419 ru Russian
-0819 ru-mo Russian (Moldova)
-0C1A sr Serbian (Cyrillic)
-081A sr Serbian (Latin)
-041B sk Slovak
-0424 sl Slovenian
-042E sb Sorbian
-040A es Spanish (Traditional Sort)
-080A es-mx Spanish (Mexico)
-0C0A es Spanish (International Sort)
-100A es-gt Spanish (Guatemala)
-140A es-cr Spanish (Costa Rica)
-180A es-pa Spanish (Panama)
-1C0A es-do Spanish (Dominican Republic)
-200A es-ve Spanish (Venezuela)
-240A es-co Spanish (Colombia)
-280A es-pe Spanish (Peru)
-2C0A es-ar Spanish (Argentina)
-300A es-ec Spanish (Ecuador)
-340A es-cl Spanish (Chile)
-380A es-uy Spanish (Uruguay)
-3C0A es-py Spanish (Paraguay)
-400A es-bo Spanish (Bolivia)
-440A es-sv Spanish (El Salvador)
-480A es-hn Spanish (Honduras)
-4C0A es-ni Spanish (Nicaragua)
-500A es-pr Spanish (Puerto Rico)
-0430 sx Sutu
-041D sv Swedish
-081D sv-fi Swedish (Finland)
-041E th Thai
-0431 ts Tsonga
-0432 tn Tswana
-041F tr Turkish
-0422 uk Ukrainian
-0420 ur Urdu
-042A vi Vietnamese
-0434 xh Xhosa
-043D ji Yiddish
-0435 zu Zulu
-"""
+    KEYMAP_LIST = KEYMAP_LIST
 
     changed_background_colour = "8feda4"
     line_edit_changed_stylesheet = "QLineEdit{background: #" + changed_background_colour + "; font: bold 'Ariel'; }"
@@ -748,75 +763,48 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
         # compiled and installed somewhere the system can supply it to this program - /usr/lib for example.
         # Perhaps some time in the future, a way can be found to call the necessary Xlib functions within this function,
         # and the C helper library could be dispensed with.
-        if 'self.keymappreview' in globals():
-            del self.keymappreview
-
+        # The libraries and the display connection are kept in self.keymap_backend from one keymap to the next.
+        # A layout which has been generated before, on any display, comes straight from its keymap cache.
         self.keymapbrowser.clear()
 
-        class Display(Structure):
-            pass
-
-        sects = ["noshift", "shift", "altgr", "capslock", "shiftcapslock", "shiftaltgr"]
-        sectcount = len(sects)
-
-        states = [c_int(0), c_int(1), c_int(0x80), c_int(2), c_int(3), c_int(0x81)]
-
-        lib = CDLL("libxrdpconfigurator.so")
-
-        GetLookupString = lib.getlookupstring
-        GetLookupString.restype = c_void_p
-        lib.freeme.argtypes = []
-        lib.freeme.restype = c_void_p
-
-        xlib = CDLL('libX11.so.6')
-        xlib.XOpenDisplay.argtypes = [c_char_p]
-        xlib.XOpenDisplay.restype = POINTER(Display)
-        xdisplay = xlib.XOpenDisplay(None)
-
-        if not xdisplay:
-            print("ERROR: could not open DISPLAY.")
+        try:
+            # Every key in every modifier state is looked up in one call to the helper library...
+            self.keymappreview = StringIO(self.keymap_backend.generate())
+        except KeymapError as error:
+            print("ERROR: " + str(error))
             return
-
-        index = 0
-        while index < sectcount:
-            secname = sects[index]
-            name = str("[" + secname + "]\n")
-            self.keymappreview.write(name)
-            keycode = 8
-            while keycode <= 137:
-                state = states[index]
-                ptr = GetLookupString(xdisplay, c_int(keycode), state)
-                output = cast(ptr, c_char_p).value.decode('utf-8')
-                self.keymappreview.write(output)
-                if keycode <= 137:
-                    self.keymappreview.write("\n")
-                keycode += 1
-            index += 1
-            if index <= sectcount - 1:
-                self.keymappreview.write("\n")
-        xlib.XCloseDisplay(xdisplay)
         self.keymapbrowser.appendPlainText(self.keymappreview.getvalue())
 
     def saveKeymapFile(self):
         fname = QtGui.QFileDialog.getSaveFileName(self, "Save keymap file as...", self.keymapname, "Ini files (*.ini)")
         if fname[0] != "":
-            with open(fname[0], 'w') as keymapfile:
-                keymapfile.writelines(self.keymappreview.getvalue())
-            keymapfile.close()
+            try:
+                atomicWrite(fname[0], self.keymappreview.getvalue())
+            except DirectoryPermissionError as error:
+                self.showDirectoryPermissionError(error)
+            except OSError as error:
+                self.showSaveError(error)
 
     def xrdpIniPreview(self):
         preview_window = PreviewWindow()
         preview_window.setAttribute(QtCore.Qt.WA_DeleteOnClose)
         if self.editingXrdpIni:
-            config = self.ConfigFileGenerator("xrdp.ini")
-            self.xrdp_ini_file.write(config, space_around_delimiters=False)
+            ini_file = self.xrdp_ini_file
         else:
-            config = self.ConfigFileGenerator("sesman.ini")
-            self.sesman_ini_file.write(config, space_around_delimiters=False)
-        preview_window.previewBrowser.appendPlainText(config.getvalue())
+            ini_file = self.sesman_ini_file
+        preview_window.previewBrowser.appendPlainText(ini_file.toString())
+        # Highlight the lines which will change when the file is saved...
+        highlights = []
+        textdocument = preview_window.previewBrowser.document()
+        for lineno in ini_file.changedLines():
+            highlight = QtGui.QTextEdit.ExtraSelection()
+            highlight.format.setBackground(QtGui.QColor("#" + self.changed_background_colour))
+            highlight.format.setProperty(QtGui.QTextFormat.FullWidthSelection, True)
+            highlight.cursor = QtGui.QTextCursor(textdocument.findBlockByNumber(lineno))
+            highlights.append(highlight)
+        preview_window.previewBrowser.setExtraSelections(highlights)
         preview_window.previewBrowser.moveCursor(QtGui.QTextCursor.Start)
         preview_window.exec_()
-        config.close()
 
     def showAbout(self):
         self.about_window.exec()
@@ -990,44 +978,31 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
 
     # Set or unset the xrdp1 session for debugging XRDP if the debug checkbox is enabled by the user...
     def debugClicked(self):
-        self.debugHandler(0, "xrdp1")
+        checkbox = self.session_widgets.debugXRDPCheckbox
+        self.debugHandler(0, "xrdp1", checkbox.checkState() != 0)
+        checkbox.setStyleSheet(self.checkbox_changed_stylesheet)
 
-    def debugHandler(self, index, secname):
+    def debugHandler(self, index, secname, enabled):
         # This function decides what to do when the Debug option on [xrdp1] is clicked (or not).
         # It has to handle the re-ordering of tabs - hence the re-ordering of the xrdp.ini file,
         # and 'hand the torch over' to whatever new tab/xrdpX section will become the [xrdp1] session.
         # @param index: the number/id/index of the tab in question
         # @param secname: the section name
+        # @param enabled: whether the session should be set up for debugging or not
         global original_port_setting
-        sessionport_widget = self.sessionsTab.widget(index).findChild(QtGui.QLineEdit, "sessionPortEntryBox")
-        chansrvport_widget = self.sessionsTab.widget(index).findChild(QtGui.QLineEdit, "chansrvPortEntryBox")
-        sessionport_label_widget = self.sessionsTab.widget(index).findChild(QtGui.QLabel, "sessionport_label")
-        chansrvport_label_widget = self.sessionsTab.widget(index).findChild(QtGui.QLabel, "chansrvport_label")
-        checkbox = self.sessionsTab.widget(index).findChild(QtGui.QCheckBox, "debugXRDPCheckbox")
-        if checkbox.checkState() == 0:
+        if not enabled:
             if self.xrdp_ini_file.has_option(secname, 'chansrvport'):
                 self.xrdp_ini_file.remove_option(secname, 'chansrvport')
             if 'original_port_setting' not in globals():
-                #self.original_port_setting = sessionport_widget.text()
                 original_port_setting = '-1'
             self.xrdp_ini_file.set(secname, 'port', original_port_setting)
-            sessionport_widget.setText(original_port_setting)
-            chansrvport_widget.setVisible(False)
-            chansrvport_label_widget.setVisible(False)
-            sessionport_label_widget.setEnabled(True)
-            sessionport_widget.setEnabled(True)
         else:
             original_port_setting = self.xrdp_ini_file.get(secname, 'port')
-            self.xrdp_ini_file.set(secname, 'port', '/tmp/.xrdp/xrdp_display_10')
-            sessionport_widget.setText('/tmp/.xrdp/xrdp_display_10')
-            chansrvport_widget.setVisible(True)
-            chansrvport_label_widget.setVisible(True)
-            self.xrdp_ini_file.set(secname, 'chansrvport', '/tmp/.xrdp/xrdp_chansrv_socket_7210')
-            chansrvport_widget.setText('/tmp/.xrdp/xrdp_chansrv_socket_7210')
-            sessionport_label_widget.setEnabled(False)
-            sessionport_widget.setEnabled(False)
+            self.xrdp_ini_file.set(secname, 'port', self.XRDP_DEBUG_PORT)
+            self.xrdp_ini_file.set(secname, 'chansrvport', self.XRDP_DEBUG_CHANSRVPORT)
+        if index == self.session_editor_index:
+            self.showSessionPorts(secname)
         self.xrdp_changed()
-        checkbox.setStyleSheet(self.checkbox_changed_stylesheet)
 
     # LOGGING --- Click/change event handlers...
     def logFileNameChanged(self):
@@ -1087,7 +1062,8 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
             self.xrdp_ini_file.set('channels', 'rdpdr', "0")
         else:
             self.xrdp_ini_file.set('channels', 'rdpdr', "true")
-        self.xrdp_changed()
+        self.globalChannelsChanged()
+        self.xrdp_changed("channels")
         self.useRdpDrCheckBox.setStyleSheet(self.checkbox_changed_stylesheet)
 
     def useRdpSndChanged(self):
@@ -1097,7 +1073,8 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
             self.xrdp_ini_file.set('channels', 'rdpsnd', "0")
         else:
             self.xrdp_ini_file.set('channels', 'rdpsnd', "true")
-        self.xrdp_changed()
+        self.globalChannelsChanged()
+        self.xrdp_changed("channels")
         self.useRdpSndCheckBox.setStyleSheet(self.checkbox_changed_stylesheet)
 
     def useDrDynVcChanged(self):
@@ -1107,7 +1084,8 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
             self.xrdp_ini_file.set('channels', 'drdynvc', "0")
         else:
             self.xrdp_ini_file.set('channels', 'drdynvc', "true")
-        self.xrdp_changed()
+        self.globalChannelsChanged()
+        self.xrdp_changed("channels")
         self.useDrDynVcCheckBox.setStyleSheet(self.checkbox_changed_stylesheet)
 
     def useClipRdrChanged(self):
@@ -1117,7 +1095,8 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
             self.xrdp_ini_file.set('channels', 'cliprdr', "0")
         else:
             self.xrdp_ini_file.set('channels', 'cliprdr', "true")
-        self.xrdp_changed()
+        self.globalChannelsChanged()
+        self.xrdp_changed("channels")
         self.useClipRdrCheckBox.setStyleSheet(self.checkbox_changed_stylesheet)
 
     def useRAILChanged(self):
@@ -1127,7 +1106,8 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
             self.xrdp_ini_file.set('channels', 'rail', "0")
         else:
             self.xrdp_ini_file.set('channels', 'rail', "true")
-        self.xrdp_changed()
+        self.globalChannelsChanged()
+        self.xrdp_changed("channels")
         self.useRAILCheckBox.setStyleSheet(self.checkbox_changed_stylesheet)
 
     def useXrdpVrChanged(self):
@@ -1137,232 +1117,89 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
             self.xrdp_ini_file.set('channels', 'xrdpvr', "0")
         else:
             self.xrdp_ini_file.set('channels', 'xrdpvr', "true")
-        self.xrdp_changed()
+        self.globalChannelsChanged()
+        self.xrdp_changed("channels")
         self.useXrdpVrCheckBox.setStyleSheet(self.checkbox_changed_stylesheet)
 
+    # Sessions without channel overrides get the [channels] settings, so the session editor shows the new ones...
+    def globalChannelsChanged(self):
+        self.channel_resolver.invalidate("channels")
+        if self.session_editor_index >= 0:
+            self.loadSessionChannels(self.session_editor_index)
+
     # Add new Session...
     def newsession(self):
         if self.newsesswindow.newSessionName.isModified():
-            tab_index = self.sessionsTab.count()
-            new_sesssion_name = self.newsesswindow.newSessionName.displayText()
-            self.createsessionstab(new_sesssion_name)
-            self.addSessionName(tab_index, new_sesssion_name)
-            self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox, 'enableOverridesCheckBox').clicked.connect(self.sessionOverridesEventHandler)
-            self.sessionsTab.widget(tab_index).findChild(QtGui.QComboBox, 'serverbppcombobox').currentIndexChanged.connect(self.sessionbppcomboboxchanged)
-            section_name = "xrdp" + str(tab_index + 1)
-            self.sessionsTab.widget(tab_index).findChild(QtGui.QLabel, 'sessionSectionName').setText("[" + section_name + "]")
-            # set default values for new session according to connection type...
-            index = self.newsesswindow.connectionTypeComboBox.currentIndex()
-
-            # X11rdp libxup.so
-            if index == 0:
-                self.addSessionLib(tab_index, "libxup.so")
-                self.addSessionIP(tab_index, "127.0.0.1")
-                self.addSessionPort(tab_index, "-1")
-                self.addSessionUsername(tab_index, "ask")
-                self.addSessionPassword(tab_index, "ask")
-                # Also add new session to xrdp.ini ConfigParser object...
-                self.xrdp_ini_file.add_section(section_name)
-                self.xrdp_ini_file.set(section_name, "name", new_sesssion_name)
-                self.xrdp_ini_file.set(section_name, "lib", "libxup.so")
-                self.xrdp_ini_file.set(section_name, "ip", "127.0.0.1")
-                self.xrdp_ini_file.set(section_name, "port", "-1")
-                self.xrdp_ini_file.set(section_name, "username", "ask")
-                self.xrdp_ini_file.set(section_name, "password", "ask")
-
-            # sesman-Xvnc libvnc.so
-            if index == 1:
-                self.addSessionLib(tab_index, "libvnc.so")
-                self.addSessionIP(tab_index, "127.0.0.1")
-                self.addSessionPort(tab_index, "-1")
-                self.addSessionUsername(tab_index, "ask")
-                self.addSessionPassword(tab_index, "ask")
-                # Also add new session to xrdp.ini ConfigParser object...
-                self.xrdp_ini_file.add_section(section_name)
-                self.xrdp_ini_file.set(section_name, "name", new_sesssion_name)
-                self.xrdp_ini_file.set(section_name, "lib", "libvnc.so")
-                self.xrdp_ini_file.set(section_name, "ip", "127.0.0.1")
-                self.xrdp_ini_file.set(section_name, "port", "-1")
-                self.xrdp_ini_file.set(section_name, "username", "ask")
-                self.xrdp_ini_file.set(section_name, "password", "ask")
-
-            # console libvnc.so
-            if index == 2:
-                self.addSessionLib(tab_index, "libvnc.so")
-                self.addSessionIP(tab_index, "127.0.0.1")
-                self.addSessionPort(tab_index, "5900")
-                self.addSessionUsername(tab_index, "na")
-                self.addSessionPassword(tab_index, "ask")
-                # Also add new session to xrdp.ini ConfigParser object...
-                self.xrdp_ini_file.add_section(section_name)
-                self.xrdp_ini_file.set(section_name, "name", new_sesssion_name)
-                self.xrdp_ini_file.set(section_name, "lib", "libvnc.so")
-                self.xrdp_ini_file.set(section_name, "ip", "127.0.0.1")
-                self.xrdp_ini_file.set(section_name, "port", "5900")
-                self.xrdp_ini_file.set(section_name, "username", "na")
-                self.xrdp_ini_file.set(section_name, "password", "ask")
-
-            # vnc-any libvnc.so
-            if index == 3:
-                self.addSessionLib(tab_index, "libvnc.so")
-                self.addSessionIP(tab_index, "ask")
-                self.addSessionPort(tab_index, "ask5900")
-                self.addSessionUsername(tab_index, "na")
-                self.addSessionPassword(tab_index, "ask")
-                # Also add new session to xrdp.ini ConfigParser object...
-                self.xrdp_ini_file.add_section(section_name)
-                self.xrdp_ini_file.set(section_name, "name", new_sesssion_name)
-                self.xrdp_ini_file.set(section_name, "lib", "libvnc.so")
-                self.xrdp_ini_file.set(section_name, "ip", "ask")
-                self.xrdp_ini_file.set(section_name, "port", "ask5900")
-                self.xrdp_ini_file.set(section_name, "username", "na")
-                self.xrdp_ini_file.set(section_name, "password", "ask")
-
-            # sesman-any libvnc.so
-            if index == 4:
-                self.addSessionLib(tab_index, "libvnc.so")
-                self.addSessionIP(tab_index, "ask")
-                self.addSessionPort(tab_index, "-1")
-                self.addSessionUsername(tab_index, "ask")
-                self.addSessionPassword(tab_index, "ask")
-                # Also add new session to xrdp.ini ConfigParser object...
-                self.xrdp_ini_file.add_section(section_name)
-                self.xrdp_ini_file.set(section_name, "name", new_sesssion_name)
-                self.xrdp_ini_file.set(section_name, "lib", "libvnc.so")
-                self.xrdp_ini_file.set(section_name, "ip", "ask")
-                self.xrdp_ini_file.set(section_name, "port", "-1")
-                self.xrdp_ini_file.set(section_name, "username", "ask")
-                self.xrdp_ini_file.set(section_name, "password", "ask")
-
-            # rdp-any librdp.so
-            if index == 5:
-                self.addSessionLib(tab_index, "librdp.so")
-                self.addSessionIP(tab_index, "ask")
-                self.addSessionPort(tab_index, "ask3389")
-                # Also add new session to xrdp.ini ConfigParser object...
-                self.xrdp_ini_file.add_section(section_name)
-                self.xrdp_ini_file.set(section_name, "name", new_sesssion_name)
-                self.xrdp_ini_file.set(section_name, "lib", "librdp.so")
-                self.xrdp_ini_file.set(section_name, "ip", "ask")
-                self.xrdp_ini_file.set(section_name, "port", "ask3389")
-
-            # freerdp libxrdpfreerdp1.so
-            if index == 6:
-                self.addSessionLib(tab_index, "libxrdpfreerdp1.so")
-                self.addSessionIP(tab_index, "ask")
-                self.addSessionPort(tab_index, "ask3389")
-                self.addSessionUsername(tab_index, "ask")
-                self.addSessionPassword(tab_index, "ask")
-                # Also add new session to xrdp.ini ConfigParser object...
-                self.xrdp_ini_file.add_section(section_name)
-                self.xrdp_ini_file.set(section_name, "name", new_sesssion_name)
-                self.xrdp_ini_file.set(section_name, "lib", "libxrdpfreerdp1.so")
-                self.xrdp_ini_file.set(section_name, "ip", "ask")
-                self.xrdp_ini_file.set(section_name, "port", "ask3389")
-                self.xrdp_ini_file.set(section_name, "username", "ask")
-                self.xrdp_ini_file.set(section_name, "password", "ask")
-
-            # neutrinolabs libxrdpneutrinordp.so
-            if index == 7:
-                self.addSessionLib(tab_index, "libxrdpneutrinordp.so")
-                self.addSessionIP(tab_index, "ask")
-                self.addSessionPort(tab_index, "ask3389")
-                self.addSessionUsername(tab_index, "ask")
-                self.addSessionPassword(tab_index, "ask")
-                # Also add new session to xrdp.ini ConfigParser object...
-                self.xrdp_ini_file.add_section(section_name)
-                self.xrdp_ini_file.set(section_name, "name", new_sesssion_name)
-                self.xrdp_ini_file.set(section_name, "lib", "libxrdpneutrinordp.so")
-                self.xrdp_ini_file.set(section_name, "ip", "ask")
-                self.xrdp_ini_file.set(section_name, "port", "ask3389")
-                self.xrdp_ini_file.set(section_name, "username", "ask")
-                self.xrdp_ini_file.set(section_name, "password", "ask")
-                # Lastly, update No. Of configured sessions counter..
-            self.configuredSessionsLabel.setText(str(tab_index + 1))
-            self.sessionsTab.setCurrentIndex(tab_index)
+            new_session_name = self.newsesswindow.newSessionName.displayText()
+            # The new session starts off with the defaults for its connection type...
+            preset = SESSION_PRESETS[self.newsesswindow.connectionTypeComboBox.currentIndex()]
+            self.addSessions([[new_session_name, preset.values]])
+            self.sessionsTab.setCurrentIndex(self.sessionsTab.count() - 1)
 
             self.newsesswindow.newSessionName.setText("")
             self.newsesswindow.newSessionName.setModified(False)
             self.newsesswindow.close()
 
-            self.sessionsOverrideAddToArray(tab_index)
-
-            self.sessionsOverrideUpdateActiveList(tab_index, "add")
-
             self.xrdp_changed()
 
+    # Adds sessions to the end of the model and gives each one a tab and an entry in the session combo
+    # boxes, holding back the widgets' signals and repaints until they are all in.
+    # @param sessions: list of [session name, [[option, value], ...]], see XrdpIniModel.addSession
+    def addSessions(self, sessions):
+        with BulkUpdate(self.sessionsTab, self.autoRunComboBox, self.simmodulebox):
+            for name, values in sessions:
+                tab_index = self.sessionsTab.count()
+                self.xrdp_ini_file.addSession(name, values)
+                self.channel_overrides.appendFromModel(self.xrdp_ini_file, sessionSectionName(tab_index))
+                self.createsessionstab(name)
+                self.autoRunComboBox.addItem(name)
+                self.simmodulebox.addItem(name)
+            self.channel_resolver.invalidate()
+        self.configuredSessionsLabel.setText(str(self.sessionsTab.count()))
+        # The tab bar couldn't say so itself if the first tab became the current one...
+        if self.sessionsTab.currentIndex() != self.session_editor_index:
+            self.showSessionEditor(self.sessionsTab.currentIndex())
+
     def reordersessiontabs(self, idx_from, *idx_to):
         if idx_to == ():
             return
-        debugcheckbox = self.sessionsTab.widget(1).findChild(QtGui.QCheckBox, "debugXRDPCheckbox")
+        idx_to = idx_to[0]
         tab_count = self.sessionsTab.count()
         if tab_count < 1:
             return
-        xrdp_from = "xrdp" + str(idx_from + 1)
-        xrdp_to = "xrdp" + str(idx_to[0] + 1)
-
-        # step 1 - make a copy of xrdp_from
-        xrdp_from_items = self.xrdp_ini_file.items(xrdp_from)
-        xrdp_from_overrides = self.overridearray[idx_from]
-        xrdp_from_override_enabled = self.sessions_channel_override_active_list[idx_from]
-
-        # step 2 - make a copy of xrdp_to
-        xrdp_to_items = self.xrdp_ini_file.items(xrdp_to)
-        xrdp_to_overrides = self.overridearray[idx_to[0]]
-        xrdp_to_override_enabled = self.sessions_channel_override_active_list[idx_to[0]]
-
-        # step 3 - remove xrdp_from and to sections...
-        self.xrdp_ini_file.remove_section(xrdp_from)
-        self.xrdp_ini_file.remove_section(xrdp_to)
-
-        # step 4 - create new xrdp_from section with contents of xrdp_to
-        self.xrdp_ini_file.add_section(xrdp_from)
-        for item in xrdp_to_items:
-            self.xrdp_ini_file.set(xrdp_from, item[0], item[1])
-
-        # step 5 - create new xrdp_to section with contents of xrdp_from
-        self.xrdp_ini_file.add_section(xrdp_to)
-        for item in xrdp_from_items:
-            self.xrdp_ini_file.set(xrdp_to, item[0], item[1])
-
-        # step 6 - update sessionsTab with new section names...
-        self.sessionsTab.widget(idx_from).findChild(QtGui.QLabel, "sessionSectionName").setText("[" + xrdp_from + "]")
-        self.sessionsTab.widget(idx_to[0]).findChild(QtGui.QLabel, "sessionSectionName").setText("[" + xrdp_to + "]")
-
-        # step 7 - handle the debug checkbox stuff...
-
-        # Debug was DISABLED and need to move the checkbox over...
-        if (self.xrdp_debug_checkbox.checkState() != QtCore.Qt.CheckState.Checked) and (idx_from in (0, 1)) and (idx_to[0] in (0, 1)):
-            self.xrdp_debug_checkbox.clicked.disconnect(self.debugClicked)
-            debugcheckbox.setStyleSheet("")
-            debugcheckbox.setVisible(False)
-            self.xrdp_debug_checkbox = self.sessionsTab.widget(0).findChild(QtGui.QCheckBox, "debugXRDPCheckbox")
-            self.xrdp_debug_checkbox.clicked.connect(self.debugClicked)
-            self.xrdp_debug_checkbox.setVisible(True)
-
-        # Debug was ENABLED and need to move the settings over...   
-        if (self.xrdp_debug_checkbox.checkState() == QtCore.Qt.CheckState.Checked) and (idx_from in (0, 1)) and (idx_to[0] in (0, 1)):
-            self.xrdp_debug_checkbox.clicked.disconnect(self.debugClicked)
-            debugcheckbox.setCheckState(QtCore.Qt.CheckState.Unchecked)
-            self.debugHandler(1, "xrdp2")
-            debugcheckbox.setStyleSheet("")
-            debugcheckbox.setVisible(False)
-            self.xrdp_debug_checkbox = self.sessionsTab.widget(0).findChild(QtGui.QCheckBox, "debugXRDPCheckbox")
-            self.xrdp_debug_checkbox.clicked.connect(self.debugClicked)
-            self.xrdp_debug_checkbox.setVisible(True)
-            self.xrdp_debug_checkbox.setCheckState(QtCore.Qt.CheckState.Checked)
-            self.debugHandler(0, "xrdp1")
-
-        # step 8 - swap the overridearray values over for the two sessions...
-        self.overridearray[idx_to[0]] = xrdp_from_overrides
-        self.overridearray[idx_from] = xrdp_to_overrides
-        self.sessions_channel_override_active_list[idx_to[0]] = xrdp_from_override_enabled
-        self.sessions_channel_override_active_list[idx_from] = xrdp_to_override_enabled
-
-        # step 9 - resequence the [xrdp] sections in the INI file to keep it tidy.
-        # Update the Autorun and modulebox (login sim) comboboxes as well...
-
-        self.resequenceINI()
+        self.commitSessionEditor()
+
+        # step 1 - the debug settings belong to whichever session is [xrdp1], so note whether they're on...
+        debugging = self.xrdpDebugEnabled() and 0 in (idx_from, idx_to)
+
+        # step 2 - move the session in the xrdp.ini model. The sessions' section names follow their
+        # positions, so nothing else in the file needs rebuilding...
+        self.xrdp_ini_file.moveSession(idx_from, idx_to)
+
+        # step 3 - the session editor moved along with its tab, so keep track of which session it shows...
+        if self.session_editor_index == idx_from:
+            self.session_editor_index = idx_to
+        elif idx_from < self.session_editor_index <= idx_to:
+            self.session_editor_index -= 1
+        elif idx_to <= self.session_editor_index < idx_from:
+            self.session_editor_index += 1
+
+        # step 4 - if debugging was enabled, hand the settings over to the new [xrdp1] session...
+        if debugging:
+            old_first = idx_to if idx_from == 0 else 1
+            self.debugHandler(old_first, "xrdp" + str(old_first + 1), False)
+            self.debugHandler(0, "xrdp1", True)
+
+        # step 5 - move the session's channel overrides along with it...
+        self.channel_overrides.move(idx_from, idx_to)
+        self.channel_resolver.invalidate()
+
+        # step 6 - the editor's section name (and maybe its debug checkbox) depend on its position...
+        if self.session_editor_index >= 0:
+            self.loadSessionEditor(self.session_editor_index)
+
+        # step 7 - update the Autorun and modulebox (login sim) comboboxes...
+        self.resetSessionComboBoxes()
 
         # Also set AutoRun combobox index if autorun has been selected...
         if self.xrdp_ini_file.has_option('globals', 'autorun'):
@@ -1371,63 +1208,44 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
                 self.autoRunComboBox.setCurrentIndex(index)
                 if autorun_text in self.autoRunComboBox.currentText():
                     break
-        self.something_xrdp_changed = 1
-        self.settitleforxrdp()
+        self.xrdp_changed("Sessions")
 
-    def resequenceINI(self):
-        tab_count = self.sessionsTab.count()
+    # Fills the Autorun and modulebox (login sim) comboboxes with the sessions' names, in session order.
+    def resetSessionComboBoxes(self):
         self.resetAutorunComboBox()
         self.resetModuleBox()
-        xrdpN_sections = []
-        for index in range(0, tab_count):
-            xrdpN_sections.append([])
-            secname = "xrdp" + str((index + 1))
-            items = self.xrdp_ini_file.items(secname)
-            xrdpN_sections[index].append(items)
-            self.xrdp_ini_file.remove_section(secname)
-        for index in range(0, tab_count):
-            secname = "xrdp" + str((index + 1))
-            self.xrdp_ini_file.add_section(secname)
-            items = xrdpN_sections[index]
-            for item in items[0]:
-                self.xrdp_ini_file.set(secname, item[0], item[1])
-                if item[0] in "name":
-                    self.autoRunComboBox.addItem(item[1])
-                    self.simmodulebox.addItem(item[1])
+        for name in self.xrdp_ini_file.sessionNames():
+            self.autoRunComboBox.addItem(name)
+            self.simmodulebox.addItem(name)
 
     def deleteSession(self):
         tab_count = self.sessionsTab.count()
         if tab_count == 0:
             return
         index = self.sessionsTab.currentIndex()
-        session_name = "xrdp" + str(index + 1)
-        self.sessionsTab.removeTab(index)
-        self.xrdp_ini_file.remove_section(session_name)
+        # The sessions after this one move up a place in the model, taking their section names with them.
+        self.xrdp_ini_file.removeSession(index)
         self.autoRunComboBox.removeItem(index + 1)
         self.simmodulebox.removeItem(index)
-        del self.overridearray[index]
-        self.sessionsOverrideUpdateActiveList(index, "delete")
-        if index < tab_count - 1:
-            for sesnum in range(index, tab_count - 1):
-                old_sesname = "xrdp" + str(sesnum + 2)
-                new_sesname = "xrdp" + str(sesnum + 1)
-                items = self.xrdp_ini_file.items(old_sesname)
-                self.xrdp_ini_file.add_section(new_sesname)
-                for item in items:
-                    self.xrdp_ini_file.set(new_sesname, item[0], item[1])
-                self.xrdp_ini_file.remove_section(old_sesname)
-                self.sessionsTab.widget(sesnum).findChild(QtGui.QLabel, 'sessionSectionName').setText(
-                    "[" + new_sesname + "]")
-            if index == 0:
-                self.setXrdpCheckboxVisibility()
+        self.channel_overrides.delete(index)
+        self.channel_resolver.invalidate()
+        # Take the session editor out of the tab before it goes, without applying its edits anywhere...
+        self.session_editor_index = -1
+        if self.session_editor is not None:
+            self.session_editor.setParent(None)
+        page = self.sessionsTab.widget(index)
+        self.sessionsTab.removeTab(index)
+        page.deleteLater()
+        if self.session_editor_index < 0:
+            self.showSessionEditor(self.sessionsTab.currentIndex())
         self.configuredSessionsLabel.setText(str(self.sessionsTab.count()))
         self.xrdp_changed()
         if self.sessionsTab.count() == 0:
             self.deleteSessionButton.setEnabled(False)
 
     def addNewSession(self):
-        self.newsesswindow.buttonBox.rejected.connect(self.newsesswindow.close)
-        self.newsesswindow.buttonBox.accepted.connect(self.newsession)
+        self.connections.connect(self.newsesswindow.buttonBox, "rejected", self.newsesswindow.close)
+        self.connections.connect(self.newsesswindow.buttonBox, "accepted", self.newsession)
         self.newsesswindow.exec_()
         self.xrdp_changed()
 
@@ -1449,6 +1267,8 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
             self.editingXrdpIni = True
             self.menuPage.setEnabled(True)
             self.actionXrdp_ini.setEnabled(True)
+            self.actionImport_sessions.setEnabled(True)
+            self.actionEdit_sessions.setEnabled(True)
             self.actionLogin_Window.setEnabled(True)
             if self.sesman_ini_file_opened == 0:
                 self.actionSesman_ini.setEnabled(False)
@@ -1507,78 +1327,87 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
         elif self.editingXrdpIni:
             self.fileSaveXrdpIniAs()
 
-    # This function generates the header for the configfile to be saved...
-    def ConfigFileGenerator(self, filetype):
-        config = StringIO()
-        config.write("# " + filetype + " configuration file.\n")
-        config.write("# Generated by XRDPConfigurator v" + self.Version + "\n")
-        config.write("#\n")
-        config.write("# File creation date : " + strftime("%Y-%m-%d %H:%M:%S") + "\n")
-        config.write("#\n")
-        return config
+    # Anything other than a permissions problem, e.g. a full disk. The original file is left untouched.
+    @staticmethod
+    def showSaveError(error):
+        message_window = InfoWindow(
+            "<html><head/><body><p>The file could not be saved:</p><p>" + str(error.strerror) +
+            "</p></body></html>")
+        message_window.exec_()
+
+    # The file itself may be writable, but saving also needs to create a file in its directory.
+    @staticmethod
+    def showDirectoryPermissionError(error):
+        message_window = InfoWindow(
+            "<html><head/><body><p>You do not have permission to create files in</p><p>" +
+            html.escape(error.filename) +
+            "</p><p>which saving the file needs. Try saving to a different location.</p></body></html>")
+        message_window.exec_()
 
+    # Saves are atomic - the file is written to a temporary file which then replaces the original,
+    # so a crash or a full disk can never leave a half written INI file behind.
     def fileSaveXrdpIni(self):
-        config = self.ConfigFileGenerator("xrdp.ini")
-        self.xrdp_ini_file.write(config, space_around_delimiters=False)
         try:
-            with open(self.xrdp_ini_filename, 'w') as configfile:
-                configfile.writelines(config.getvalue())
-            configfile.close()
+            self.xrdp_ini_file.save(self.xrdp_ini_filename)
             self.something_xrdp_changed = 0
             self.settitleforxrdp()
+        except DirectoryPermissionError as error:
+            self.showDirectoryPermissionError(error)
         except PermissionError:
             message_window = InfoWindow(
                 "<html><head/><body><p>You do not have permission to save the INI file.</p><p>Try saving to a different location.</p></body></html>")
             message_window.exec_()
+        except OSError as error:
+            self.showSaveError(error)
 
     def fileSaveXrdpIniAs(self):
         fname = QtGui.QFileDialog.getSaveFileName(self, "Save file as...", "xrdp.ini", "Ini files (*.ini)")
         if fname[0] != "":
-            config = self.ConfigFileGenerator("xrdp.ini")
-            self.xrdp_ini_file.write(config, space_around_delimiters=False)
             try:
-                with open(fname[0], 'w') as configfile:
-                    configfile.writelines(config.getvalue())
-                    configfile.close()
-                    self.nameOfOpenFile.setText(fname[0])
-                    self.xrdp_ini_filename = fname[0]
-                    self.something_xrdp_changed = 0
-                    self.settitleforxrdp()
+                self.xrdp_ini_file.save(fname[0])
+                self.nameOfOpenFile.setText(fname[0])
+                self.xrdp_ini_filename = fname[0]
+                self.something_xrdp_changed = 0
+                self.settitleforxrdp()
+            except DirectoryPermissionError as error:
+                self.showDirectoryPermissionError(error)
             except PermissionError:
                 message_window = InfoWindow("<html><head/><body><p>You do not have permission</p><p>to overwrite the INI file.</p></body></html>")
                 message_window.exec_()
+            except OSError as error:
+                self.showSaveError(error)
 
     def fileSaveSesmanIniAs(self):
         fname = QtGui.QFileDialog.getSaveFileName(self, "Save file as...", "sesman.ini", "Ini files (*.ini)")
         if fname[0] != "":
-            config = self.ConfigFileGenerator("sesman.ini")
-            self.sesman_ini_file.write(config, space_around_delimiters=False)
             try:
-                with open(fname[0], 'w') as configfile:
-                    configfile.writelines(config.getvalue())
-                configfile.close()
+                self.sesman_ini_file.save(fname[0])
                 self.nameOfOpenFile.setText(fname[0])
                 self.sesman_ini_filename = fname[0]
                 self.something_sesman_changed = 0
                 self.settitleforsesman()
+            except DirectoryPermissionError as error:
+                self.showDirectoryPermissionError(error)
             except PermissionError:
                 message_window = InfoWindow(
                     "<html><head/><body><p>You do not have permission</p><p>to overwrite the INI file.</p></body></html>")
                 message_window.exec_()
+            except OSError as error:
+                self.showSaveError(error)
 
     def fileSaveSesmanIni(self):
-        config = self.ConfigFileGenerator("sesman.ini")
-        self.sesman_ini_file.write(config, space_around_delimiters=False)
         try:
-            with open(self.sesman_ini_filename, 'w') as configfile:
-                configfile.writelines(config.getvalue())
-            configfile.close()
+            self.sesman_ini_file.save(self.sesman_ini_filename)
             self.something_sesman_changed = 0
             self.settitleforsesman()
+        except DirectoryPermissionError as error:
+            self.showDirectoryPermissionError(error)
         except PermissionError:
             message_window = InfoWindow(
                 "<html><head/><body><p>You do not have permission to save the INI file.</p><p>Try saving to a different location.</p></body></html>")
             message_window.exec_()
+        except OSError as error:
+            self.showSaveError(error)
 
     # User wants to quit...
     def fileQuit(self):
@@ -1602,25 +1431,130 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
             result = 1
         if result == 1:
             filename = QtGui.QFileDialog.getOpenFileName(self, "Open xrdp.ini file...", "xrdp.ini", "Ini files (*.ini)")
-            if filename[0] != "" and verifyXrdpIni(filename) is True:
-                self.new_version_flag = 0
-                self.xrdp_ini_filename = filename[0]
-                self.parseXrdpIni(str(self.xrdp_ini_filename))
-                self.something_xrdp_changed = 0
-                self.settitleforxrdp()
+            if filename[0] == "":
+                return
+            self.startLoad(XrdpIniModel, filename[0])
+
+    def xrdpIniLoaded(self, load):
+        in_file = load.model
+        if verifyXrdpIni(in_file) is True:
+            self.new_version_flag = 0
+            self.xrdp_ini_filename = load.filename
+            self.parseXrdpIni(in_file)
+            self.something_xrdp_changed = 0
+            self.settitleforxrdp()
 
-    def xrdp_changed(self):
-        #print("calling function : ", inspect.stack()[1][3])
-        if self.something_xrdp_changed != 1:
-            self.something_xrdp_changed = 1
-            title = self.windowTitle()
-            self.setWindowTitle("*" + title)
+    # Starts loading a file in the background; modelLoaded() picks up the model when it's ready.
+    # Opening another file of the same type before then cancels this load.
+    def startLoad(self, model_class, fname):
+        filetype = model_class.FILETYPE
+        self.model_loader.start(model_class, fname,
+                                progress=lambda percent: self.load_signals.progress.emit(filetype, percent),
+                                done=self.load_signals.finished.emit)
+        self.loadProgress(filetype, 0)
+
+    def loadProgress(self, filetype, percent):
+        if self.model_loader.isLoading(filetype):
+            self.statusBar().showMessage("Loading " + filetype + "... " + str(percent) + "%")
+
+    def modelLoaded(self, load):
+        if not self.model_loader.isCurrent(load):
+            return  # cancelled by opening another file
+        self.model_loader.finish(load)
+        if not self.model_loader.isLoading():
+            self.statusBar().clearMessage()
+        if load.filetype() == XrdpIniModel.FILETYPE:
+            self.xrdpIniLoaded(load)
+        else:
+            self.sesmanIniLoaded(load)
 
-    def sesman_changed(self):
-        if self.something_sesman_changed != 1:
-            self.something_sesman_changed = 1
-            title = self.windowTitle()
-            self.setWindowTitle("*" + title)
+    # User wants to add sessions from a CSV or JSON table, see libxrdpconfigurator.sessionimport.
+    # Every row is checked first; then they are all added in one go.
+    def importSessions(self):
+        if not self.xrdp_ini_file_opened:
+            return
+        filename = QtGui.QFileDialog.getOpenFileName(self, "Import sessions...", "",
+                                                     "Session tables (*.csv *.json);;All files (*)")
+        if filename[0] == "":
+            return
+        try:
+            sessions = importSessions(filename[0], self.xrdp_ini_file.sessionNames())
+        except (OSError, ValueError) as error:
+            InfoWindow("<html><head/><body><p>The sessions could not be read:</p><p>" + html.escape(str(error)) +
+                       "</p></body></html>").exec_()
+            return
+        if not sessions.isValid():
+            InfoWindow("<html><head/><body><p>No sessions were imported, because of these problems:</p><p>" +
+                       self.problemList(sessions.result.errors()) + "</p></body></html>").exec_()
+            return
+        if self.editingSesman:
+            self.showXrdpIniPage()
+        self.addSessions(sessions.sessions)
+        self.sessionsTab.setCurrentIndex(self.sessionsTab.count() - 1)
+        self.xrdp_changed()
+        if sessions.result.warnings():
+            InfoWindow("<html><head/><body><p>" + str(len(sessions.sessions)) + " sessions were imported, "
+                       "but please check these:</p><p>" + self.problemList(sessions.result.warnings()) +
+                       "</p></body></html>").exec_()
+
+    # User wants to change several sessions at once...
+    def editSessions(self):
+        if not self.xrdp_ini_file_opened or self.sessionsTab.count() == 0:
+            return
+        self.commitSessionEditor()
+        window = BulkEditWindow(self.xrdp_ini_file.sessionNames(), self.session_editor_index, self.SESSION_LIBRARIES,
+                                self.SERVER_BPP_LIST)
+        if window.exec_() == QtGui.QDialog.Accepted:
+            self.bulkEditSessions(window.selectedSessions(), window.changes())
+
+    # Makes the same changes to many sessions as one update: the model is changed, the session editor is
+    # filled in again if it is showing one of the sessions, and the file is marked as changed, once each.
+    # @param indexes: the sessions' tab indexes
+    # @param changes: {option: new value}, see BulkEditWindow.changes
+    def bulkEditSessions(self, indexes, changes):
+        if not indexes or not changes:
+            return
+        sections = ["xrdp" + str(index + 1) for index in indexes]
+        for option, value in changes.items():
+            if option == "lib":
+                self.xrdp_ini_file.setSessionsLibrary(sections, value)
+            else:
+                self.xrdp_ini_file.setSessionsOption(sections, option, value)
+        if self.session_editor_index in indexes:
+            with BulkUpdate(self.session_editor):
+                self.loadSessionEditor(self.session_editor_index)
+        self.xrdp_changed()
+
+    # The first few problems, for an InfoWindow
+    @staticmethod
+    def problemList(problems, limit=15):
+        lines = [html.escape(problem.toText()) for problem in problems[:limit]]
+        if len(problems) > limit:
+            lines.append("... and " + str(len(problems) - limit) + " more")
+        return "<br/>".join(lines)
+
+    # The file has unsaved changes straight away; the title bar catches up when the change bus flushes.
+    # @param section: the section which was changed, if the caller knows
+    def xrdp_changed(self, section=None):
+        self.something_xrdp_changed = 1
+        self.change_bus.notify(XrdpIniModel.FILETYPE, section)
+
+    def sesman_changed(self, section=None):
+        self.something_sesman_changed = 1
+        self.change_bus.notify(SesmanIniModel.FILETYPE, section)
+
+    # Called by the change bus with {filetype: sections} for each batch of edits.
+    # noinspection PyUnusedLocal
+    def filesChanged(self, changes):
+        self.updateTitle()
+
+    # Only the xrdp.ini and sesman.ini pages' titles say whether there are unsaved changes...
+    def updateTitle(self):
+        page = self.stackedWidget.currentIndex()
+        if page == 1:
+            self.settitleforxrdp()
+        elif page == 2:
+            self.settitleforsesman()
 
     def fileOpenSesmanIni(self):
         if self.something_sesman_changed == 1:
@@ -1634,11 +1568,15 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
             filename = QtGui.QFileDialog.getOpenFileName(self, "Open sesman.ini file...", "sesman.ini",
                                                          "Ini files (*.ini)")
             if filename[0] != "":
-                if verifySesmanIni(filename[0]):
-                    self.sesman_ini_filename = filename[0]
-                    self.parseSesmanIni(str(self.sesman_ini_filename))
-                    self.something_sesman_changed = 0
-                    self.settitleforsesman()
+                self.startLoad(SesmanIniModel, filename[0])
+
+    def sesmanIniLoaded(self, load):
+        in_file = load.model
+        if verifySesmanIni(in_file):
+            self.sesman_ini_filename = load.filename
+            self.parseSesmanIni(in_file)
+            self.something_sesman_changed = 0
+            self.settitleforsesman()
 
     def updateMaxBppCombo(self, bpp):
         self.maxBppComboBox.blockSignals(True)
@@ -1664,74 +1602,25 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
 
     # Event Handlers for Session Tabs Updates start here...
 
-    def tabUserPasswordToggle(self, tabID, makeVisible):
-        section_name = "xrdp" + str(tabID + 1)
-        lib_widget = self.sessionsTab.widget(tabID).findChild(QtGui.QComboBox, "libraryComboBox")
-        if not lib_widget:
-            return
-        username_widget = self.sessionsTab.widget(tabID).findChild(QtGui.QLabel, "label_4")
-        username_entrybox = self.sessionsTab.widget(tabID).findChild(QtGui.QLineEdit, "sessionUserNameEntryBox")
-        password_label = self.sessionsTab.widget(tabID).findChild(QtGui.QLabel, "label_8")
-        password_entrybox = self.sessionsTab.widget(tabID).findChild(QtGui.QLineEdit, "sessionPasswordEntryBox")
-        if makeVisible == 0:
-            username_widget.setVisible(False)
-            username_entrybox.setVisible(False)
-            password_label.setVisible(False)
-            password_entrybox.setVisible(False)
-            if self.xrdp_ini_file.has_option(section_name, "username"):
-                self.xrdp_ini_file.remove_option(section_name, "username")
-            if self.xrdp_ini_file.has_option(section_name, "password"):
-                self.xrdp_ini_file.remove_option(section_name, "password")
-        if makeVisible == 1:
-            username_widget.setVisible(True)
-            username_entrybox.setVisible(True)
-            password_label.setVisible(True)
-            password_entrybox.setVisible(True)
-            self.xrdp_ini_file.set(section_name, "username", "ask")
-            self.xrdp_ini_file.set(section_name, "password", "ask")
-
-    def setCodeTen(self, section, set_to):  # Adds or removes "code=10" depending on library used.
-        if set_to == 0:  # Remove "code=10"
-            if self.xrdp_ini_file.has_option(section, 'code'):
-                self.xrdp_ini_file.remove_option(section, 'code')
-        if set_to == 1:  # Add "code=10"
-            if not self.xrdp_ini_file.has_option(section, 'code'):
-                self.xrdp_ini_file.set(section, 'code', '10')
-
     # noinspection PyUnusedLocal
     def tabLibraryComboBoxChanged(self, arg):
-        tabID = self.sessionsTab.currentIndex()
-        lib_widget = self.sessionsTab.widget(tabID).findChild(QtGui.QComboBox, "libraryComboBox")
-        library = ""
+        tabID = self.session_editor_index
+        if tabID < 0:
+            return
         section = "xrdp" + str(tabID + 1)
-        index = lib_widget.currentIndex()
-        if index == 0:
-            library = "libxup.so"
-            self.setCodeTen(section, 1)
-        if index == 1:
-            library = "libvnc.so"
-            self.setCodeTen(section, 0)
-        if index == 2:
-            library = "librdp.so"
-            self.setCodeTen(section, 0)
-        if index == 3:
-            library = "libxrdpfreerdp1.so"
-            self.setCodeTen(section, 0)
-        if index == 4:
-            library = "libxrdpneutrinordp.so"
-            self.setCodeTen(section, 0)
-        if "librdp.so" in library:
-            self.tabUserPasswordToggle(tabID, 0)
-        else:
-            self.tabUserPasswordToggle(tabID, 1)
-        self.xrdp_ini_file.set(section, "lib", library)
+        library = self.SESSION_LIBRARIES[self.session_widgets.libraryComboBox.currentIndex()]
+        # The library brings code=, username= and password= changes with it, so the editor is filled in again...
+        self.commitSessionEditor()
+        self.xrdp_ini_file.setSessionLibrary(section, library)
+        self.loadSessionEditor(tabID)
         self.xrdp_changed()
-        lib_widget.setStyleSheet(self.combobox_changed_stylesheet)
 
     # noinspection PyUnusedLocal
     def sessionbppcomboboxchanged(self, arg):
-        tabID = self.sessionsTab.currentIndex()
-        widget = self.sessionsTab.widget(tabID).findChild(QtGui.QComboBox, 'serverbppcombobox')
+        tabID = self.session_editor_index
+        if tabID < 0:
+            return
+        widget = self.session_widgets.serverbppcombobox
         section = "xrdp" + str(tabID + 1)
         index = widget.currentIndex()
         if index != 0:
@@ -1740,13 +1629,12 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
             self.xrdp_ini_file.remove_option(section, 'xserverbpp')
         widget.setStyleSheet(self.combobox_changed_stylesheet)
         self.xrdp_changed()
-        widget.setStyleSheet(self.combobox_changed_stylesheet)
 
     def sessionNameBoxChanged(self):
-        tabID = self.sessionsTab.currentIndex()
-        sessname_widget = self.sessionsTab.widget(tabID).findChild(QtGui.QLineEdit, "sessionNameBox")
-        if not sessname_widget:
+        tabID = self.session_editor_index
+        if tabID < 0:
             return
+        sessname_widget = self.session_widgets.sessionNameBox
         if sessname_widget.isModified():
             section = "xrdp" + str(tabID + 1)
             name = sessname_widget.text()
@@ -1762,10 +1650,10 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
             sessname_widget.setModified(0)
 
     def sessionIPAddressChanged(self):
-        tabID = self.sessionsTab.currentIndex()
-        sess_ip_widget = self.sessionsTab.widget(tabID).findChild(QtGui.QLineEdit, "sessionIPAddress")
-        if not sess_ip_widget:
+        tabID = self.session_editor_index
+        if tabID < 0:
             return
+        sess_ip_widget = self.session_widgets.sessionIPAddress
         if sess_ip_widget.isModified():
             section = "xrdp" + str(tabID + 1)
             address = sess_ip_widget.text()
@@ -1775,10 +1663,10 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
             sess_ip_widget.setModified(0)
 
     def sessionPortBoxChanged(self):
-        tabID = self.sessionsTab.currentIndex()
-        sess_port_widget = self.sessionsTab.widget(tabID).findChild(QtGui.QLineEdit, "sessionPortEntryBox")
-        if sess_port_widget is None:
+        tabID = self.session_editor_index
+        if tabID < 0:
             return
+        sess_port_widget = self.session_widgets.sessionPortEntryBox
         if sess_port_widget.isModified():
             section = "xrdp" + str(tabID + 1)
             port = sess_port_widget.text()
@@ -1788,10 +1676,10 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
             sess_port_widget.setModified(0)
 
     def sessionUsernameBoxChanged(self):
-        tabID = self.sessionsTab.currentIndex()
-        sess_username_widget = self.sessionsTab.widget(tabID).findChild(QtGui.QLineEdit, "sessionUserNameEntryBox")
-        if sess_username_widget is None:
+        tabID = self.session_editor_index
+        if tabID < 0:
             return
+        sess_username_widget = self.session_widgets.sessionUserNameEntryBox
         if sess_username_widget.isModified():
             section = "xrdp" + str(tabID + 1)
             username = sess_username_widget.text()
@@ -1801,10 +1689,10 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
             sess_username_widget.setModified(0)
 
     def sessionPasswordBoxChanged(self):
-        tabID = self.sessionsTab.currentIndex()
-        sess_password_widget = self.sessionsTab.widget(tabID).findChild(QtGui.QLineEdit, "sessionPasswordEntryBox")
-        if sess_password_widget is None:
+        tabID = self.session_editor_index
+        if tabID < 0:
             return
+        sess_password_widget = self.session_widgets.sessionPasswordEntryBox
         if sess_password_widget.isModified():
             section = "xrdp" + str(tabID + 1)
             password = sess_password_widget.text()
@@ -1816,13 +1704,12 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
     # Channel overrides event handler...
     def sessionOverridesEventHandler(self):
         #listIndex = 0
-        tabID = self.sessionsTab.currentIndex()
-        section = "xrdp" + str(tabID + 1)
-        enable_overrides = self.sessionsTab.widget(tabID).findChild(QtGui.QCheckBox, 'enableOverridesCheckBox')
-        channelsFrame = self.sessionsTab.widget(tabID).findChild(QtGui.QFrame, 'channelsFrame')
-        # If we can't find the Enable Overrides checkbox then give up...
-        if enable_overrides is None:
+        tabID = self.session_editor_index
+        if tabID < 0:
             return
+        section = "xrdp" + str(tabID + 1)
+        enable_overrides = self.session_widgets.enableOverridesCheckBox
+        channelsFrame = self.session_widgets.channelsFrame
         # If a session's Enable Channel Overrides checkbox is ticked...
         if enable_overrides.checkState() == 2:
             # If channelsFrame isn't already enabled,
@@ -1833,115 +1720,50 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
         else:  # IF ENABLE_OVERRIDES IS UNCHECKED...
             self.sessionOverridesUnticked(section, tabID)
             channelsFrame.setEnabled(False)
-        self.sessionsOverrideUpdateActiveList(tabID, "update")
-        self.xrdp_changed()
+        self.channel_resolver.invalidate(section)
+        self.xrdp_changed(section)
         enable_overrides.setStyleSheet(self.checkbox_changed_stylesheet)
 
-    # User has ticked the session's Enable Channel Override tick box...
+    # User has ticked the session's Enable Channel Override tick box, or one of its channel tick boxes...
     def sessionOverridesTicked(self, section, tabID):
-        #print("Session Overrides were already enabled for tabID", tabID, ",section",section)
-        listIndex = 0
-        # For each of the globals channel names, session channel names, and the Qt checkbox name
-        # in the SESSIONOVERRIDESLIST array...
-        for globals_channel_name, session_channel_name, checkbox_name in self.SESSIONOVERRIDESLIST:
-            # If the channel override doesn't exist in INI file, then add that option
-            # then set the tick state of each tick box, then update the override array to suit...
-            if not self.xrdp_ini_file.has_option(section, session_channel_name):
-                # Get the enabled/disabled state of each of the global channel settings...
-                global_channel_state = self.xrdp_ini_file.get('channels', globals_channel_name)
-                # set the INI file's corresponding  session override to be the same...
-                self.xrdp_ini_file.set(section, session_channel_name, global_channel_state)
-                # set the overridearray list to reflect that...
-                self.sessionOverrideChannelState(section, tabID, session_channel_name, checkbox_name)
-                session_channel_tickbox_state = self.sessionsTab.widget(tabID).findChild(QtGui.QCheckBox, checkbox_name).checkState()
-                if session_channel_tickbox_state == 2:
-                    self.overridearray[tabID][listIndex] = 2
-                elif session_channel_tickbox_state == 0:
-                    self.overridearray[tabID][listIndex] = 0
-            else:
-                # If the channel override option is already in the INI file, then look at the option, and
-                # tick or untick the relevent checkbox...
-                session_channel_tickbox = self.sessionsTab.widget(tabID).findChild(QtGui.QCheckBox, checkbox_name)
-                session_channel_tickbox_state = int(session_channel_tickbox.checkState())
-                override_array_state = self.overridearray[tabID][listIndex]
-                if session_channel_tickbox_state == 2:
-                    self.xrdp_ini_file.set(section, session_channel_name, 'true')
-                else:
-                    self.xrdp_ini_file.set(section, session_channel_name, '0')
-                if override_array_state != session_channel_tickbox_state:
-                    # If the Session's old state was unchecked, don't update the stylesheet
-                    # because we're merely enabling the overrides and setting or unsetting the
-                    # relevent checkbox according to the corresponding Global channels settings...
-                    if self.sessions_channel_override_active_list[tabID] == 1:
-                        session_channel_tickbox.setStyleSheet(self.checkbox_changed_stylesheet)
-                    if session_channel_tickbox_state == 2:
-                        self.overridearray[tabID][listIndex] = 2
-                    elif session_channel_tickbox_state == 0:
-                        self.overridearray[tabID][listIndex] = 0
-
-                self.sessionOverrideChannelState(section, tabID, session_channel_name, checkbox_name)
-            listIndex += 1
+        overrides = self.channel_overrides
+        checkboxes = self.session_widgets.channelCheckBoxes
+        if overrides.isActive(tabID):
+            # The overrides were already on, so the user has clicked one of the channel tick boxes...
+            old_mask = overrides.mask(tabID)
+            mask = 0
+            for channel_index, (globals_channel_name, session_channel_name, checkbox_name) in enumerate(
+                    self.SESSIONOVERRIDESLIST):
+                bit = channelBit(channel_index)
+                if checkboxes[checkbox_name].checkState() == 2:
+                    mask |= bit
+                if mask & bit != old_mask & bit:
+                    checkboxes[checkbox_name].setStyleSheet(self.checkbox_changed_stylesheet)
+        else:
+            # The overrides have just been switched on, so start them off the same as the [channels] settings...
+            mask = self.channel_resolver.globalMask()
+            for channel_index, (globals_channel_name, session_channel_name, checkbox_name) in enumerate(
+                    self.SESSIONOVERRIDESLIST):
+                checkboxes[checkbox_name].setCheckState(
+                    QtCore.Qt.CheckState(2 if mask & channelBit(channel_index) else 0))
+        overrides.setMask(tabID, mask)
+        overrides.setActive(tabID, True)
+        overrides.writeSession(self.xrdp_ini_file, tabID)
 
     # User has un-ticked the session's Enable Channel Overrides box...
     def sessionOverridesUnticked(self, section, tabID):
-        listIndex = 0
-        for globals_channel_name, session_channel_name, checkbox_name in self.SESSIONOVERRIDESLIST:
-            if self.xrdp_ini_file.has_option(section, session_channel_name):
-                # Remove the channel override option from the section...
-                self.xrdp_ini_file.remove_option(section, session_channel_name)
-                # Untick the corresponding tickbox...
-                self.sessionsTab.widget(tabID).findChild(QtGui.QCheckBox, checkbox_name).setCheckState(QtCore.Qt.CheckState(0))
-                # Set the corresponding tickboxe's stylesheet back to its default...
-                self.sessionsTab.widget(tabID).findChild(QtGui.QCheckBox, checkbox_name).setStyleSheet("")
-                # set the value of the channel overrides array to the checked/unchecked value...
-                self.overridearray[tabID][listIndex] = 0
-                self.sessions_channel_override_active_list[tabID] = 0
-                listIndex += 1
-
-    def sessionOverrideChannelState(self, section, tabID, channel, checkbox):
-        if self.xrdp_ini_file.get(section, channel) == '0':
-            self.sessionsTab.widget(tabID).findChild(QtGui.QCheckBox, checkbox).setCheckState(QtCore.Qt.CheckState(0))
-        if self.xrdp_ini_file.get(section, channel) == 'true':
-            self.sessionsTab.widget(tabID).findChild(QtGui.QCheckBox, checkbox).setCheckState(QtCore.Qt.CheckState(2))
-
-    # We keep tabs (heh cwutididthar!) on which session has Enable Channel Overrides ticked or unticked.
-    # @param tab_index: The index/id of the session's tab being updated
-    # @param option: whether to /add/ to the array, /update/ an existing entry, or /remove/ one
-    def sessionsOverrideUpdateActiveList(self, tab_index, option):
-        if option == "add":
-            self.sessions_channel_override_active_list.append([])
-            # Update the list of sessions with channel overrides - to be used when checking old value if user clicks checkbox...
-            if self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox,
-                                                            "enableOverridesCheckBox").checkState() == 2:
-                self.sessions_channel_override_active_list[tab_index] = 1
-            else:
-                self.sessions_channel_override_active_list[tab_index] = 0
-            self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox, 'enableOverridesCheckBox').clicked.connect(
-                self.sessionOverridesEventHandler)
-        if option == "update":
-            overridescheckbox = self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox, 'enableOverridesCheckBox')
-            if overridescheckbox.checkState() == 2:
-                self.sessions_channel_override_active_list[tab_index] = 1
-            else:
-                self.sessions_channel_override_active_list[tab_index] = 0
-        if option == "delete":
-            del self.sessions_channel_override_active_list[tab_index]
-
-    # This function gets called whenever a new session is added either by reading in an INI file, or by the user.
-    # It appends a new set of override states (0=disabled, 2=enabled) to the array self.overridearray.
-    def sessionsOverrideAddToArray(self, tab_index):
-        # NEW IMPROVED ARRAY[tm] ...
-        self.overridearray.append([])
-        # For each channel in the CHANNEL_LIST array...
-        for override_channel_name in self.CHANNEL_LIST:
-            # Find the widget with that channel name...
-            widget = self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox, override_channel_name)
-            if widget.checkState() == 2:
-                self.overridearray[tab_index].append(2)
-            else:
-                self.overridearray[tab_index].append(0)
-            self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox, override_channel_name).clicked.connect(
-                self.sessionOverridesEventHandler)
+        # The session goes back to the [channels] settings...
+        global_mask = self.channel_resolver.globalMask()
+        for channel_index, (globals_channel_name, session_channel_name, checkbox_name) in enumerate(
+                self.SESSIONOVERRIDESLIST):
+            # Show the corresponding tickbox's [channels] state, and set its stylesheet back to its default...
+            self.session_widgets.channelCheckBoxes[checkbox_name].setCheckState(
+                QtCore.Qt.CheckState(2 if global_mask & channelBit(channel_index) else 0))
+            self.session_widgets.channelCheckBoxes[checkbox_name].setStyleSheet("")
+        # ...and remove the session's channel override options...
+        self.channel_overrides.setMask(tabID, 0)
+        self.channel_overrides.setActive(tabID, False)
+        self.channel_overrides.writeSession(self.xrdp_ini_file, tabID)
 
     # ###END OF SESSIONS EVENT HANDLERS###
 
@@ -2116,7 +1938,7 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
         # WINSIM Set up the view and scene for the login window area...
         self.simscene = QtGui.QGraphicsScene()
         self.simscene.setSceneRect(QtCore.QRectF(self.winSim.xrdp_window.viewport().rect()))
-        self.winSim.resized.connect(self.winSimResized)
+        self.connections.connect(self.winSim, "resized", self.winSimResized)
         self.winSim.xrdp_window.setScene(self.simscene)
         self.winSim.xrdp_window.setRenderHints(QtGui.QPainter.CompositionMode_Destination)
         self.winSim.xrdp_window.scale(1, 1)
@@ -2318,11 +2140,13 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
 
         self.simmodproxy = self.simscene.addWidget(self.simmodulebox)
 
-        # Add the Window logo...
+        # Add the Window logo, forgetting the connections of the previous file's logo...
+        if getattr(self, "simwinlogo", None) is not None:
+            self.connections.disconnectAll(self.simwinlogo)
         self.simwinlogo_pixmap, self.simwinlogo, self.simlogo_filename = self.windowLogoLoadToDialog()
         self.simwinlogoproxy = self.simscene.addWidget(self.simwinlogo)
         self.windowLogoUpdate(self.simwinlogo_pixmap, self.simwinlogo, self.simlogo_filename, self.x_pos, self.y_pos)
-        self.simwinlogo.clicked.connect(self.windowLogoClicked)
+        self.connections.connect(self.simwinlogo, "clicked", self.windowLogoClicked)
         self.simgroupitems = (self.simloginwindow.loginrect,
                               self.simloginwindow.leftline,
                               self.simloginwindow.topline,
@@ -2529,7 +2353,7 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
 
     def windowLogoPositionClicked(self):
         self.logoStartGeometry = self.simwinlogo.geometry()
-        self.simwinlogo.clicked.disconnect(self.windowLogoClicked)
+        self.connections.disconnect(self.simwinlogo, "clicked", self.windowLogoClicked)
         self.logoPosDialog = LogoPositionWidget()
         #self.logoPosDialog.move(1000,20)
         self.logoPosDialog.move(self.winSim.width() - self.logoPosDialog.width() - 25, 0)
@@ -2540,8 +2364,8 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
         self.logoPosDialog.cancelBtn.clicked.connect(self.windowlogoPositionRejected)
         self.logoPosDialog.xSpinBox.valueChanged.connect(self.windowlogoXYSpinboxValueChanged)
         self.logoPosDialog.ySpinBox.valueChanged.connect(self.windowlogoXYSpinboxValueChanged)
-        self.simwinlogo.clicked.connect(self.windowLogoPositionInitialClick)
-        self.simwinlogo.moved.connect(self.windowlogoPositionMove)
+        self.connections.connect(self.simwinlogo, "clicked", self.windowLogoPositionInitialClick)
+        self.connections.connect(self.simwinlogo, "moved", self.windowlogoPositionMove)
         self.winSim.DialogGroupBox.setEnabled(False)
         self.winSim.ColoursGroupBox.setEnabled(False)
         self.simlogin_window_group.setFlag(QtGui.QGraphicsItemGroup.ItemIsMovable, False)
@@ -2566,11 +2390,17 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
         self.logoPosDialog.ySpinBox.setValue(self.simwinlogo.y())
         self.logoPosDialog.xSpinBox.blockSignals(False)
 
+    # Clicking the logo goes back to bringing up the logo customization window...
+    def windowLogoPositionFinished(self):
+        self.connections.disconnect(self.simwinlogo, "clicked", self.windowLogoPositionInitialClick)
+        self.connections.disconnect(self.simwinlogo, "moved", self.windowlogoPositionMove)
+        self.connections.connect(self.simwinlogo, "clicked", self.windowLogoClicked)
+
     def windowlogoPositionAccepted(self):
         self.xrdp_ini_file.set('globals', 'ls_logo_x_pos', str(self.simwinlogo.x()))
         self.xrdp_ini_file.set('globals', 'ls_logo_y_pos', str(self.simwinlogo.y()))
         self.logoPosDialog.deleteLater()
-        self.simwinlogo.clicked.connect(self.windowLogoClicked)
+        self.windowLogoPositionFinished()
         self.winSim.DialogGroupBox.setEnabled(True)
         self.winSim.ColoursGroupBox.setEnabled(True)
         self.simlogin_window_group.setFlag(QtGui.QGraphicsItemGroup.ItemIsMovable, True)
@@ -2579,7 +2409,7 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
 
     def windowlogoPositionRejected(self):
         self.simwinlogo.setGeometry(self.logoStartGeometry)
-        self.simwinlogo.clicked.connect(self.windowLogoClicked)
+        self.windowLogoPositionFinished()
         self.logoPosDialog.deleteLater()
         self.winSim.DialogGroupBox.setEnabled(True)
         self.winSim.ColoursGroupBox.setEnabled(True)
@@ -4400,13 +4230,6 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
                     self.sysLogLevelComboBox.setCurrentIndex(4)
                 self.sysLogLevelComboBox.blockSignals(False)
 
-    def addDefaultLoggingSection(self):
-        self.xrdp_ini_file.add_section("Logging")
-        self.xrdp_ini_file.set('Logging', 'logfile', 'xrdp.log')
-        self.xrdp_ini_file.set('Logging', 'loglevel', 'DEBUG')
-        self.xrdp_ini_file.set('Logging', 'enablesyslog', '1')
-        self.xrdp_ini_file.set('Logging', 'sysloglevel', 'DEBUG')
-
     def parseXrdpChannelsSection(self):
         for name, value in self.xrdp_ini_file.items("channels"):
             if name == "rdpdr" and value in ["1", "true", "yes"]:
@@ -4434,179 +4257,173 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
                 self.useXrdpVrCheckBox.setCheckState(QtCore.Qt.Checked)
                 self.useXrdpVrCheckBox.blockSignals(False)
 
-    def addDefaultChannelsSection(self):
-        self.xrdp_ini_file.add_section('channels')
-        self.xrdp_ini_file.set('channels', 'rdpdr', 'true')
-        self.xrdp_ini_file.set('channels', 'rdpsnd', 'true')
-        self.xrdp_ini_file.set('channels', 'drdynvc', 'true')
-        self.xrdp_ini_file.set('channels', 'cliprdr', 'true')
-        self.xrdp_ini_file.set('channels', 'rail', 'true')
-        self.xrdp_ini_file.set('channels', 'xrdpvr', 'true')
-
     # Parse and Create tabs for each of the Sessions...
 
     # Define functions for each part of a session...
 
-    # This will be called for any session which becomes "[xrdp1]"
-    # It enables the "Debug xrdp" checkbox for that particular session
-    def setXrdpCheckboxVisibility(self):
-        self.xrdp_debug_checkbox = self.sessionsTab.widget(0).findChild(QtGui.QCheckBox, 'debugXRDPCheckbox')
-        self.xrdp_debug_checkbox.setVisible(True)
-        self.xrdp_debug_checkbox.clicked.connect(self.debugClicked)
+    # The session tabs hold nothing but empty placeholder pages. A single sessionConfigForm, the session
+    # editor, is created the first time it is needed and moved into whichever tab is current, then filled
+    # in from that session's section of the xrdp.ini model. So a file with hundreds of sessions costs
+    # hundreds of tab labels rather than hundreds of complete forms.
+
+    # Returns the shared session editor, creating it (and connecting its signals) the first time around.
+    def sessionEditor(self):
+        if self.session_editor is None:
+            editor = sessionConfigForm()
+            widgets = SessionWidgets(editor, self.CHANNEL_LIST)
+            connect = self.connections.connect
+            connect(widgets.sessionNameBox, "editingFinished", self.sessionNameBoxChanged)
+            connect(widgets.libraryComboBox, "currentIndexChanged", self.tabLibraryComboBoxChanged)
+            connect(widgets.serverbppcombobox, "currentIndexChanged", self.sessionbppcomboboxchanged)
+            connect(widgets.sessionIPAddress, "editingFinished", self.sessionIPAddressChanged)
+            connect(widgets.sessionPortEntryBox, "editingFinished", self.sessionPortBoxChanged)
+            connect(widgets.sessionUserNameEntryBox, "editingFinished", self.sessionUsernameBoxChanged)
+            connect(widgets.sessionPasswordEntryBox, "editingFinished", self.sessionPasswordBoxChanged)
+            connect(widgets.enableOverridesCheckBox, "clicked", self.sessionOverridesEventHandler)
+            for checkbox in widgets.channelCheckBoxes.values():
+                connect(checkbox, "clicked", self.sessionOverridesEventHandler)
+            connect(widgets.debugXRDPCheckbox, "clicked", self.debugClicked)
+            self.session_editor = editor
+            self.session_widgets = widgets
+        return self.session_editor
+
+    # Called whenever a different session tab becomes current.
+    def showSessionEditor(self, index):
+        self.commitSessionEditor()
+        if index < 0 or index >= len(self.channel_overrides):
+            self.session_editor_index = -1
+            return
+        editor = self.sessionEditor()
+        page = self.sessionsTab.widget(index)
+        layout = page.layout()
+        if layout is None:
+            layout = QtGui.QVBoxLayout(page)
+            layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(editor)
+        self.session_editor_index = index
+        self.loadSessionEditor(index)
+        editor.setVisible(True)
+
+    # A QLineEdit only reports editingFinished when it loses focus, and clicking on another tab doesn't
+    # take the focus away from it, so apply anything still being typed before the editor is reused.
+    def commitSessionEditor(self):
+        if self.session_editor is None or self.session_editor_index < 0:
+            return
+        self.sessionNameBoxChanged()
+        self.sessionIPAddressChanged()
+        self.sessionPortBoxChanged()
+        self.sessionUsernameBoxChanged()
+        self.sessionPasswordBoxChanged()
+
+    # Fills the session editor in from the model.
+    # Widgets for options which have been changed since the file was opened (or saved) are highlighted.
+    def loadSessionEditor(self, tab_index):
+        widgets = self.session_widgets
+        section = "xrdp" + str(tab_index + 1)
+        changed = self.xrdp_ini_file.dirtyKeys(section)
+        for widget in widgets.editables:
+            widget.blockSignals(True)
+
+        widgets.sessionSectionName.setText("[" + section + "]")
+        for option, widget in [["name", widgets.sessionNameBox], ["ip", widgets.sessionIPAddress],
+                               ["port", widgets.sessionPortEntryBox], ["username", widgets.sessionUserNameEntryBox],
+                               ["password", widgets.sessionPasswordEntryBox]]:
+            widget.setText(self.xrdp_ini_file.get(section, option, fallback=""))
+            widget.setModified(False)
+            widget.setStyleSheet(self.line_edit_changed_stylesheet if option in changed else "")
+
+        lib = self.xrdp_ini_file.get(section, "lib", fallback="")
+        widgets.libraryComboBox.setCurrentIndex(self.SESSION_LIBRARIES.index(lib) if lib in self.SESSION_LIBRARIES else 0)
+        widgets.libraryComboBox.setStyleSheet(self.combobox_changed_stylesheet if "lib" in changed else "")
+        self.showSessionUserPassword("librdp.so" not in lib)
+
+        bpp = self.xrdp_ini_file.get(section, "xserverbpp", fallback="")
+        widgets.serverbppcombobox.setCurrentIndex(self.SERVER_BPP_LIST.index(bpp) if bpp in self.SERVER_BPP_LIST else 0)
+        widgets.serverbppcombobox.setStyleSheet(self.combobox_changed_stylesheet if "xserverbpp" in changed else "")
+
+        # Only [xrdp1] can be used to debug xrdp...
+        widgets.debugXRDPCheckbox.setVisible(tab_index == 0)
+        widgets.debugXRDPCheckbox.setCheckState(
+            QtCore.Qt.CheckState(2 if tab_index == 0 and self.xrdpDebugEnabled() else 0))
+        widgets.debugXRDPCheckbox.setStyleSheet(self.checkbox_changed_stylesheet if "chansrvport" in changed else "")
+        self.showSessionPorts(section)
+
+        self.loadSessionChannels(tab_index)
+
+        for widget in widgets.editables:
+            widget.blockSignals(False)
+
+    # Fills in the session editor's channel overrides. The channel tickboxes show the channels the session
+    # actually gets - its own overrides if they're switched on, the [channels] settings if not.
+    def loadSessionChannels(self, tab_index):
+        widgets = self.session_widgets
+        changed = self.xrdp_ini_file.dirtyKeys("xrdp" + str(tab_index + 1))
+        overrides_active = self.channel_overrides.isActive(tab_index)
+        effective_mask = self.channel_resolver.effectiveMask(tab_index)
+        widgets.enableOverridesCheckBox.setCheckState(QtCore.Qt.CheckState(2 if overrides_active else 0))
+        widgets.enableOverridesCheckBox.setStyleSheet("")
+        widgets.channelsFrame.setEnabled(overrides_active)
+        for listIndex, (globals_channel_name, session_channel_name, checkbox_name) in enumerate(
+                self.SESSIONOVERRIDESLIST):
+            checkbox = widgets.channelCheckBoxes[checkbox_name]
+            checkbox.setCheckState(QtCore.Qt.CheckState(2 if effective_mask & channelBit(listIndex) else 0))
+            checkbox.setStyleSheet(self.checkbox_changed_stylesheet if session_channel_name in changed else "")
+
+    # Shows or hides the session editor's username and password boxes. librdp.so sessions have neither.
+    def showSessionUserPassword(self, makeVisible):
+        widgets = self.session_widgets
+        for widget in [widgets.username_label, widgets.sessionUserNameEntryBox,
+                       widgets.password_label, widgets.sessionPasswordEntryBox]:
+            widget.setVisible(makeVisible)
+
+    # The port and chansrvport boxes, which depend on whether the session is set up for debugging xrdp.
+    def showSessionPorts(self, section):
+        widgets = self.session_widgets
+        port = self.xrdp_ini_file.get(section, "port", fallback="")
+        debugging = port == self.XRDP_DEBUG_PORT
+        widgets.sessionPortEntryBox.setText(port)
+        widgets.sessionPortEntryBox.setEnabled(not debugging)
+        widgets.sessionport_label.setEnabled(not debugging)
+        widgets.chansrvPortEntryBox.setText(self.xrdp_ini_file.get(section, "chansrvport", fallback=""))
+        widgets.chansrvPortEntryBox.setVisible(debugging)
+        widgets.chansrvport_label.setVisible(debugging)
+
+    def xrdpDebugEnabled(self):
+        return self.xrdp_ini_file.get("xrdp1", "port", fallback="") == self.XRDP_DEBUG_PORT
 
     def createsessionstab(self, session_name):
-        self.sessionsTab.addTab(sessionConfigForm(), session_name)
-
-    def addSessionName(self, tab_index, value):
-        section_name = "xrdp" + str(tab_index + 1)
-        self.sessionsTab.widget(tab_index).findChild(QtGui.QLabel, 'sessionSectionName').setText(
-            "[" + section_name + "]")
-        namebox = self.sessionsTab.widget(tab_index).findChild(QtGui.QLineEdit, "sessionNameBox")
-        namebox.setText(value)
-        namebox.editingFinished.connect(self.sessionNameBoxChanged)
-        self.sessionsTab.setTabText(tab_index, value)
-        self.autoRunComboBox.addItem(value)
-        self.simmodulebox.addItem(value)  # Login Sim combobox
-        if self.sessionsTab.count() > 0:
-            if tab_index == 0:
-                self.setXrdpCheckboxVisibility()
-            else:
-                self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox, 'debugXRDPCheckbox').setVisible(False)
-            self.deleteSessionButton.setEnabled(True)
-
-    def addSessionLib(self, tab_index, value):
-        lib_box = self.sessionsTab.widget(tab_index).findChild(QtGui.QComboBox, "libraryComboBox")
-        if value == "libxup.so":
-            lib_box.setCurrentIndex(0)
-        if value == "libvnc.so":
-            lib_box.setCurrentIndex(1)
-        if value == "librdp.so":
-            lib_box.setCurrentIndex(2)
-            self.tabUserPasswordToggle(tab_index, 0)
-        if value == "libxrdpfreerdp1.so":
-            lib_box.setCurrentIndex(3)
-        if value == "libxrdpneutrinordp.so":
-            lib_box.setCurrentIndex(4)
-        lib_box.currentIndexChanged.connect(self.tabLibraryComboBoxChanged)
-
-    def setsessionserverbpp(self, tab_index, value):
-        bppbox = self.sessionsTab.widget(tab_index).findChild(QtGui.QComboBox, 'serverbppcombobox')
-        if value == "15":
-            bppbox.setCurrentIndex(1)
-        if value == "16":
-            bppbox.setCurrentIndex(2)
-        if value == "24":
-            bppbox.setCurrentIndex(3)
-        if value == "32":
-            bppbox.setCurrentIndex(4)
-
-    def addSessionIP(self, tab_index, value):
-        sess_ip = self.sessionsTab.widget(tab_index).findChild(QtGui.QLineEdit, "sessionIPAddress")
-        sess_ip.setText(value)
-        sess_ip.editingFinished.connect(self.sessionIPAddressChanged)
-
-    def addSessionPort(self, tab_index, value):
-        sess_port = self.sessionsTab.widget(tab_index).findChild(QtGui.QLineEdit, "sessionPortEntryBox")
-        chansrvport_widget = self.sessionsTab.widget(tab_index).findChild(QtGui.QLineEdit, "chansrvPortEntryBox")
-        chansrvport_label_widget = self.sessionsTab.widget(tab_index).findChild(QtGui.QLabel, "chansrvport_label")
-        if value == "/tmp/.xrdp/xrdp_display_10":
-            self.xrdp_debug_checkbox.setCheckState(QtCore.Qt.CheckState(2))
-            chansrvport_widget.setText("/tmp/.xrdp/xrdp_chansrv_socket_7210")
-            if not self.xrdp_ini_file.has_option('xrdp1', 'chansrvport'):
-                self.xrdp_ini_file.set('xrdp1', 'chansrvport', '/tmp/.xrdp/xrdp_chansrv_socket_7210')
-        else:
-            chansrvport_widget.setVisible(False)
-            chansrvport_label_widget.setVisible(False)
-        sess_port.setText(value)
-        sess_port.editingFinished.connect(self.sessionPortBoxChanged)
-
-    def addSessionUsername(self, tab_index, value):
-        uname_widget = self.sessionsTab.widget(tab_index).findChild(QtGui.QLineEdit, "sessionUserNameEntryBox")
-        uname_widget.setText(value)
-        uname_widget.editingFinished.connect(self.sessionUsernameBoxChanged)
-
-    def addSessionPassword(self, tab_index, value):
-        pass_widget = self.sessionsTab.widget(tab_index).findChild(QtGui.QLineEdit, "sessionPasswordEntryBox")
-        pass_widget.setText(value)
-        pass_widget.editingFinished.connect(self.sessionPasswordBoxChanged)
+        self.sessionsTab.addTab(QtGui.QWidget(), session_name)
+        self.deleteSessionButton.setEnabled(True)
+
+    # Removes every session tab, keeping hold of the session editor.
+    def clearSessionTabs(self):
+        self.session_editor_index = -1
+        if self.session_editor is not None:
+            self.session_editor.setParent(None)
+        signals_blocked = self.sessionsTab.blockSignals(True)
+        while self.sessionsTab.count() > 0:
+            page = self.sessionsTab.widget(0)
+            self.sessionsTab.removeTab(0)
+            page.deleteLater()
+        self.sessionsTab.blockSignals(signals_blocked)
 
     def parseXrdpIniSessions(self):
-        tab_index = 0
-        for sectname in self.xrdp_ini_file.sections():
-            if "xrdp" in sectname:  # for each [xrdpN] section...
-                self.createsessionstab(sectname)  # create the session tab...
-                for name, value in self.xrdp_ini_file.items(sectname):
-                    if name == "name":
-                        self.addSessionName(tab_index, value)
-                    elif name == "xserverbpp":
-                        self.setsessionserverbpp(tab_index, value)
-                    elif name == "lib":
-                        self.addSessionLib(tab_index, value)
-                    elif name == "ip":
-                        self.addSessionIP(tab_index, value)
-                    elif name == "port":
-                        self.addSessionPort(tab_index, value)
-                    elif name == "username":
-                        self.addSessionUsername(tab_index, value)
-                    elif name == "password":
-                        self.addSessionPassword(tab_index, value)
-                    elif name == "channel.rdpdr" and value == "true":
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QFrame, "channelsFrame").setEnabled(True)
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox,
-                                                                     "enableOverridesCheckBox").setCheckState(
-                            QtCore.Qt.CheckState(2))
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox, "useRdpDrCheckBox").setCheckState(
-                            QtCore.Qt.CheckState(2))
-                    elif name == "channel.rdpsnd" and value == "true":
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QFrame, "channelsFrame").setEnabled(True)
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox,
-                                                                     "enableOverridesCheckBox").setCheckState(
-                            QtCore.Qt.CheckState(2))
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox,
-                                                                     "useRdpSndCheckBox").setCheckState(
-                            QtCore.Qt.CheckState(2))
-                    elif name == "channel.drdynvc" and value == "true":
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QFrame, "channelsFrame").setEnabled(True)
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox,
-                                                                     "enableOverridesCheckBox").setCheckState(
-                            QtCore.Qt.CheckState(2))
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox,
-                                                                     "useDrDynVcCheckBox").setCheckState(
-                            QtCore.Qt.CheckState(2))
-                    elif name == "channel.cliprdr" and value == "true":
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QFrame, "channelsFrame").setEnabled(True)
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox,
-                                                                     "enableOverridesCheckBox").setCheckState(
-                            QtCore.Qt.CheckState(2))
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox,
-                                                                     "useClipRdrCheckBox").setCheckState(
-                            QtCore.Qt.CheckState(2))
-                    elif name == "channel.rail" and value == "true":
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QFrame, "channelsFrame").setEnabled(True)
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox,
-                                                                     "enableOverridesCheckBox").setCheckState(
-                            QtCore.Qt.CheckState(2))
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox, "useRAILCheckBox").setCheckState(
-                            QtCore.Qt.CheckState(2))
-                    elif name == "channel.xrdpvr" and value == "true":
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QFrame, "channelsFrame").setEnabled(True)
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox,
-                                                                     "enableOverridesCheckBox").setCheckState(
-                            QtCore.Qt.CheckState(2))
-                        self.sessionsTab.widget(tab_index).findChild(QtGui.QCheckBox,
-                                                                     "useXrdpVrCheckBox").setCheckState(
-                            QtCore.Qt.CheckState(2))
-                self.sessionsOverrideUpdateActiveList(tab_index, "add")
-                self.sessionsOverrideAddToArray(tab_index)
-                self.sessionsTab.widget(tab_index).findChild(QtGui.QComboBox,
-                                                             'serverbppcombobox').currentIndexChanged.connect(
-                    self.sessionbppcomboboxchanged)
-                tab_index += 1
-            self.configuredSessionsLabel.setText(str(tab_index))
+        # The tabs are added with signals blocked, and the editor is filled in once they are all there.
+        signals_blocked = self.sessionsTab.blockSignals(True)
+        self.channel_overrides.load(self.xrdp_ini_file)
+        self.channel_resolver.reset(self.xrdp_ini_file)
+        for sectname in self.xrdp_ini_file.sessionSections():  # for each [xrdpN] section...
+            self.createsessionstab(self.xrdp_ini_file.get(sectname, "name", fallback=sectname))
+        self.sessionsTab.blockSignals(signals_blocked)
+        if self.xrdpDebugEnabled() and not self.xrdp_ini_file.has_option('xrdp1', 'chansrvport'):
+            self.xrdp_ini_file.set('xrdp1', 'chansrvport', self.XRDP_DEBUG_CHANSRVPORT)
+        self.configuredSessionsLabel.setText(str(self.sessionsTab.count()))
+        self.resetSessionComboBoxes()
+        self.showSessionEditor(self.sessionsTab.currentIndex())
 
     def parseXrdpAutoRun(self):
         if self.xrdp_ini_file.has_option('globals', 'autorun'):
-            self.autoRunComboBox.blockSignals(True)
+            signals_blocked = self.autoRunComboBox.blockSignals(True)
             value = self.xrdp_ini_file.get('globals', 'autorun')
             count = self.autoRunComboBox.count()
             index = 0
@@ -4616,18 +4433,18 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
                 if index > count:
                     self.xrdp_ini_file.remove_option('globals', 'autorun')
                     break
-            self.autoRunComboBox.blockSignals(False)
+            self.autoRunComboBox.blockSignals(signals_blocked)
 
     def resetAutorunComboBox(self):
         # Reset Autorun Combo Box...
         items = self.autoRunComboBox.count()
         if items > 1:
-            self.autoRunComboBox.blockSignals(True)
+            signals_blocked = self.autoRunComboBox.blockSignals(True)
             count = items
             while count >= 1:
                 self.autoRunComboBox.removeItem(count)
                 count -= 1
-            self.autoRunComboBox.blockSignals(False)
+            self.autoRunComboBox.blockSignals(signals_blocked)
 
     def resetModuleBox(self):
         count = self.simmodulebox.count()
@@ -4635,101 +4452,93 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
             self.simmodulebox.removeItem(count)
             count -= 1
 
-    def parseXrdpIni(self, fname):
+    # @param in_file: an XrdpIniModel which has already been loaded and verified
+    def parseXrdpIni(self, in_file):
 
         self.xrdp_ini_file_opened = 1
 
         # Display the filename of the ini file
-        self.xrdpfilename = fname
-        self.nameOfOpenFile.setText(fname)
+        self.xrdpfilename = in_file.filename
+        self.nameOfOpenFile.setText(in_file.filename)
         # Set up the xrdp.ini editor page
         self.showXrdpIniPage()
 
-        # reset/clear any existing data...
-        del self.xrdp_ini_file
-        self.xrdp_ini_file = ConfigParser()
+        # Take over the already parsed contents of the xrdp.ini file
+        self.xrdp_ini_file = in_file
 
-        # Initialise and keep note of original channel overrides state for each session
-        self.sessions_channel_override_active_list[:] = []
-        self.overridearray[:] = []
-        # clear any sessionTabs...
-        if self.sessionsTab.count() > 0:
-            self.sessionsTab.clear()
+        if self.xrdp_ini_file.isNewVersion():
+            self.new_version_flag = 1
 
-        # Reset Autorun Combo Box...
-        self.resetAutorunComboBox()
-
-        # Parse the contents of the xrdp.ini file
-        self.xrdp_ini_file.read(fname)
-
-        if self.xrdp_ini_file.has_option('globals', 'ini_version'):
-            if self.xrdp_ini_file.get('globals', 'ini_version') == '1':
-                self.new_version_flag = 1
-
-        #Initialize the Login Window Simulator...
-        self.setupWinSim()
-        self.resetPage(self.xrdpIniEditPage)
-
-        # [GLOBALS] section...
-        self.parseXrdpGlobalsSection()
-        # [LOGGING] section...
-        if self.xrdp_ini_file.has_section("Logging"):
-            self.parseXrdpLoggingSection()
-        else:  # if no [logging] section then add one...
+        # Add any sections the file is missing before the page gets filled in...
+        if not self.xrdp_ini_file.has_section("Logging"):  # if no [logging] section then add one...
             message_window = InfoWindow(
                 "<html><head/><body><p>This xrdp.ini file didn't have a [Logging] section."
                 "<p>A default one has been added.</p></body></html>")
             message_window.exec_()
-            self.addDefaultLoggingSection()
-            self.parseXrdpLoggingSection()
-        #[CHANNELS] section...
-        if self.xrdp_ini_file.has_section("channels"):
-            self.parseXrdpChannelsSection()
-        else:  # If no [channels] section, add one...
+            self.xrdp_ini_file.addDefaultLoggingSection()
+        if not self.xrdp_ini_file.has_section("channels"):  # If no [channels] section, add one...
             message_window = InfoWindow(
                 "<html><head/><body><p>This xrdp.ini file didn't have a [channels] section."
                 "<p>A default one has been added.</p></body></html>")
             message_window.exec_()
-            self.addDefaultChannelsSection()
+            self.xrdp_ini_file.addDefaultChannelsSection()
+
+        # Then fill the whole page in from the model in one go, without a repaint or a signal for every
+        # widget along the way...
+        with BulkUpdate(self, self.sessionsTab, self.autoRunComboBox, self.simmodulebox):
+            self.channel_overrides.clear()
+            # clear any sessionTabs...
+            self.clearSessionTabs()
+
+            # Reset Autorun Combo Box...
+            self.resetAutorunComboBox()
+
+            #Initialize the Login Window Simulator...
+            self.setupWinSim()
+            self.resetPage(self.xrdpIniEditPage)
+
+            # [GLOBALS] section...
+            self.parseXrdpGlobalsSection()
+            # [LOGGING] section...
+            self.parseXrdpLoggingSection()
+            #[CHANNELS] section...
             self.parseXrdpChannelsSection()
 
-        # [SESSIONS Tabs]...
-        self.parseXrdpIniSessions()
-        # Finally, parse the "autorun" option, if any.
-        # we do this last because at the parsing Globals stage we
-        # haven't added any sessions yet.
-        self.parseXrdpAutoRun()
-        self.resequenceINI()
+            # [SESSIONS Tabs]...
+            self.parseXrdpIniSessions()
+            # Finally, parse the "autorun" option, if any.
+            # we do this last because at the parsing Globals stage we
+            # haven't added any sessions yet.
+            self.parseXrdpAutoRun()
 
         self.something_xrdp_changed = 0
 
-    def parseSesmanIni(self, fname):
+    # @param in_file: a SesmanIniModel which has already been loaded and verified
+    def parseSesmanIni(self, in_file):
         # clear edited params indicators...
         self.resetPage(self.sesmanIniEditPage)
         self.sesman_ini_file_opened = 1
-        self.sesmanfilename = fname
+        self.sesmanfilename = in_file.filename
         self.nameOfOpenFile.setText(self.sesmanfilename)
         self.fileopenlabel.setVisible(True)
         self.nameOfOpenFile.setVisible(True)
         self.filenameFrame.setVisible(True)
         self.showSesmanIniPage()
-        # reset/clear any existing data...
-        self.sesman_ini_file = ConfigParser()
-        self.sesman_ini_file.optionxform = str
-        # read in the ini file...
-        self.sesman_ini_file.read(fname)
-        # globals
-        self.parseSesmanGlobalsSection()
-        # security
-        self.parseSesmanSecuritySection()
-        # sessions
-        self.parseSesmanSessionsSection()
-        # Logging
-        self.parseSesmanLoggingSection()
-        #X11rdp params
-        self.parseSesmanXServerParamSections("X11rdp")
-        # Xvnc params
-        self.parseSesmanXServerParamSections("Xvnc")
+        # Take over the already parsed ini file...
+        self.sesman_ini_file = in_file
+        with BulkUpdate(self):
+            # globals
+            self.parseSesmanGlobalsSection()
+            # security
+            self.parseSesmanSecuritySection()
+            # sessions
+            self.parseSesmanSessionsSection()
+            # Logging
+            self.parseSesmanLoggingSection()
+            #X11rdp params
+            self.parseSesmanXServerParamSections("X11rdp")
+            # Xvnc params
+            self.parseSesmanXServerParamSections("Xvnc")
 
         self.something_sesman_changed = 0
 
@@ -4819,9 +4628,8 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
 
     def parseSesmanXServerParamSections(self, secname):
         text = ""
-        for name, value in self.sesman_ini_file.items(secname):
-            if "param" in name:
-                text = text + value + " "
+        for value in self.sesman_ini_file.xserverParams(secname):
+            text = text + value + " "
         if secname == "X11rdp":
             self.x11rdpParamsLineEdit.setText(text)
         elif secname == "Xvnc":
@@ -4995,21 +4803,13 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
         elif calling_function == "xvncParamsLineEdit":
             secname = "Xvnc"
             widget = self.xvncParamsLineEdit
-        for option in self.sesman_ini_file.items(secname):
-            self.sesman_ini_file.remove_option(secname, option[0])
-        param_num = 1
         if widget.isModified():
+            self.sesman_ini_file.setXserverParams(secname, widget.text().split())
             if widget.text() == "":
                 return
             else:
-                for value in widget.text().split():
-                    param = "param" + str(param_num)
-                    if value != '':
-                        self.sesman_ini_file.set(secname, param, value)
-                    param_num += 1
                 widget.setStyleSheet(self.line_edit_changed_stylesheet)
-                self.something_sesman_changed = 1
-                self.settitleforsesman()
+                self.sesman_changed(secname)
 
     @staticmethod
     def resetPage(parent_widget):
@@ -5023,29 +4823,32 @@ class XRDPConfigurator(QtGui.QMainWindow, Ui_XRDPConfigurator):
                     widget.clear()
 
 # xrdpconfigurator.setStyle("cleanlooks") <--Uncomment this, change to your chosen Qt look if you want it hard coded.
-xrdpconfigurator = QtGui.QApplication(sys.argv)
-window = XRDPConfigurator()
-window.setAttribute(QtCore.Qt.WA_DeleteOnClose)
-winSim = LoginWindowSimulator(None)
-# At startup, we need to "display" the Login Window Simulator window then hide again, because
-# otherwise the Qt widgets don't seem to get initialised properly.
-#
-# For example - if I don't do this, the colour "swatches" in the Login Simulator
-# don't get initialised, and odd things then happen.
-
-winSim.setAttribute(QtCore.Qt.WA_ShowWithoutActivating)
-winSim.setAttribute(QtCore.Qt.WA_DontShowOnScreen, True)
-winSim.show()
-winSim.hide()
-window.setupColourSelector()
-window.setupWinSimButtonConnections()
-winSim.setAttribute(QtCore.Qt.WA_DontShowOnScreen, False)
-window.setWindowIcon(QtGui.QPixmap(":/icons/images/icons/XRDPConfiguratorWindowIcon.png"))
-winSim.setWindowIcon(QtGui.QPixmap(":/icons/images/icons/XRDPConfiguratorWindowIcon.png"))
-window.filenameFrame.setVisible(False)
-window.sesmanIniEditPage.setVisible(False)
-window.newsesswindow = NewSession()  # <-- new session window
-window.show()
-xrdpconfigurator.exec_()
-xrdpconfigurator.deleteLater()
-sys.exit()
+if __name__ == "__main__":
+    xrdpconfigurator = QtGui.QApplication(sys.argv)
+    window = XRDPConfigurator()
+    window.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+    winSim = LoginWindowSimulator(None)
+    # At startup, we need to "display" the Login Window Simulator window then hide again, because
+    # otherwise the Qt widgets don't seem to get initialised properly.
+    #
+    # For example - if I don't do this, the colour "swatches" in the Login Simulator
+    # don't get initialised, and odd things then happen.
+
+    winSim.setAttribute(QtCore.Qt.WA_ShowWithoutActivating)
+    winSim.setAttribute(QtCore.Qt.WA_DontShowOnScreen, True)
+    winSim.show()
+    winSim.hide()
+    window.setupColourSelector()
+    window.setupWinSimButtonConnections()
+    winSim.setAttribute(QtCore.Qt.WA_DontShowOnScreen, False)
+    window.setWindowIcon(QtGui.QPixmap(":/icons/images/icons/XRDPConfiguratorWindowIcon.png"))
+    winSim.setWindowIcon(QtGui.QPixmap(":/icons/images/icons/XRDPConfiguratorWindowIcon.png"))
+    window.filenameFrame.setVisible(False)
+    window.sesmanIniEditPage.setVisible(False)
+    window.newsesswindow = NewSession()  # <-- new session window
+    window.show()
+    xrdpconfigurator.exec_()
+    window.model_loader.shutdown()
+    window.keymap_backend.close()
+    xrdpconfigurator.deleteLater()
+    sys.exit()